@@ -1,50 +1,177 @@
 import os
+import re
+import asyncio
+import json
+import time
+import uuid
+import logging
 import requests
 from agno.agent import Agent
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
 from agno.db.sqlite import SqliteDb
+from agno.db.base import SessionType
 from agno.models.google import Gemini
 from datetime import datetime, timedelta
-from agno.session import SessionSummaryManager
+from agno.session import SessionSummaryManager, AgentSession
+from agno.session.summary import SessionSummary
+from agno.models.message import Message
+from agno.run.agent import RunEvent, RunInput, RunOutput
+from agno.run.base import RunStatus
+from dataclasses import dataclass, field
+from metrics import tool_metrics_hook, atool_metrics_hook, LLM_CALLS, LLM_DURATION, LLM_TOKENS, ANSWER_CACHE
+from tracing import span, trace_turn
+from answer_cache import get_answer_cache, depends_on_history, is_follow_up, ANSWER_CACHE_ENABLED
+from intent_router import IntentRouter, is_useful, record_route
+from summary_queue import get_summary_queue
+from session_history import save_summary, has_runs
+from session_store import create_session_db
 from tools.pdf_tools import read_pdf, find_pdf_links
 from tools.selenium_tools import open_link_in_selenium
-from tools.web_tools import open_link, site_search_simple, site_search, get_page_navigation, get_site_highlights
+from tools.search_tools import local_search
+from tools.docentes_tools import find_docentes
+from tools.calendario_tools import calendar_events, get_cardapio
+from tools.tool_results import compact_tool_results, compact_messages, HISTORY_COMPACTION
+from tools.tool_results_tools import recall_tool_result
+from tools.link_graph_tools import find_documents
+from tools.async_tools import async_tools
+from tools.web_tools import open_link, open_links, site_search_simple, site_search, get_page_navigation, get_site_highlights
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+AGENT_DB = os.getenv("AGENT_DB", "tmp/agent.db")
+AGENT_DEBUG = os.getenv("AGENT_DEBUG", "1") == "1"  # Logs detalhados do agno (desligue em produção)
+
+URL_PATTERN = re.compile(r'https?://[^\s)\]>"\']+')
+
+# Atalhos do site usados nas instruções do agente (e como sementes do crawler)
+MAIN_PAGES = {
+    "Fale Conosco": "https://www.ifsudestemg.edu.br/barbacena/fale-conosco",
+    "Corpo Docente": "https://www.ifsudestemg.edu.br/barbacena/institucional/corpo-docente",
+    "Página Inicial": "https://www.ifsudestemg.edu.br/barbacena",
+    "Notícias": "https://www.ifsudestemg.edu.br/noticias/barbacena",
+    "Calendário": "https://www.ifsudestemg.edu.br/documentos-institucionais/unidades/barbacena/diretorias-sistemicas/ensino/calendario-academico",
+    "Assistência Estudantil": "https://www.ifsudestemg.edu.br/barbacena/institucional/ensino/apoio-ao-discente/assistencia-estudantil",
+    "Mapa do Site": "https://www.ifsudestemg.edu.br/barbacena/mapadosite",
+}
+
+@dataclass
+class InstrumentedGemini(Gemini):
+    """
+        Gemini que registra duração, tokens e erros de cada chamada nas métricas (/metrics).
+    """
+    metrics_role: str = "agent"  # Rótulo 'role' das métricas: 'agent' ou 'summary'
+
+    def _record(self, started: float, usage, outcome: str, current=None):
+        LLM_DURATION.observe(time.perf_counter() - started, role=self.metrics_role)
+        LLM_CALLS.inc(role=self.metrics_role, outcome=outcome)
+        if usage:
+            LLM_TOKENS.inc(usage.input_tokens or 0, role=self.metrics_role, kind="prompt")
+            LLM_TOKENS.inc(usage.output_tokens or 0, role=self.metrics_role, kind="completion")
+            if current:
+                current.set(input_tokens=usage.input_tokens, output_tokens=usage.output_tokens)
+
+    def invoke(self, *args, **kwargs):
+        started = time.perf_counter()
+        with span(f"llm:{self.metrics_role}", "llm", model=self.id) as current:
+            try:
+                response = super().invoke(*args, **kwargs)
+            except Exception:
+                self._record(started, None, "error")
+                raise
+            self._record(started, response.response_usage, "ok", current)
+            return response
+
+    def invoke_stream(self, *args, **kwargs):
+        started, usage = time.perf_counter(), None
+        with span(f"llm:{self.metrics_role}", "llm", model=self.id) as current:
+            try:
+                for response in super().invoke_stream(*args, **kwargs):
+                    # O Gemini envia o uso acumulado; fica o do último trecho que o trouxe
+                    usage = response.response_usage or usage
+                    yield response
+            except Exception:
+                self._record(started, usage, "error")
+                raise
+            self._record(started, usage, "ok", current)
+
+    async def ainvoke(self, *args, **kwargs):
+        started = time.perf_counter()
+        with span(f"llm:{self.metrics_role}", "llm", model=self.id) as current:
+            try:
+                response = await super().ainvoke(*args, **kwargs)
+            except Exception:
+                self._record(started, None, "error")
+                raise
+            self._record(started, response.response_usage, "ok", current)
+            return response
+
+    async def ainvoke_stream(self, *args, **kwargs):
+        started, usage = time.perf_counter(), None
+        with span(f"llm:{self.metrics_role}", "llm", model=self.id) as current:
+            try:
+                async for response in super().ainvoke_stream(*args, **kwargs):
+                    usage = response.response_usage or usage
+                    yield response
+            except Exception:
+                self._record(started, usage, "error")
+                raise
+            self._record(started, usage, "ok", current)
+
+
 class ChatAgent:
     """
         Classe para inicializar e gerenciar a instância do Agente.
     """
-    def __init__(self):
+    def __init__(self, db: SqliteDb = None, model=None, summary_model=None):
         """
             Inicializa o modelo LLM e a intância do Agente.
+
+            Args:
+                db (SqliteDb): Banco de sessões compartilhado. Várias instâncias (uma por thread
+                    do servidor) podem usar o mesmo banco; se omitido, abre AGENT_DB.
+                model: Modelo do agente; se omitido, usa o Gemini (os benchmarks passam um modelo simulado).
+                summary_model: Modelo que gera o resumo da sessão; se omitido, usa o Gemini.
         """
         GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
         SUMMARIZER_API_KEY = os.getenv("SUMMARIZER_API_KEY")
 
-        self.model = Gemini(
+        self.model = model or InstrumentedGemini(
             id="models/gemini-2.5-flash-lite",
             api_key=GOOGLE_API_KEY
         )
-        self.db = SqliteDb(db_file="tmp/agent.db")
-
-        main_pages = (
-            "URLs DIRETAS PARA ATALHOS IMPORTANTES (USE SEMPRE):\n"
-            "- Fale Conosco: https://www.ifsudestemg.edu.br/barbacena/fale-conosco\n"
-            "- Corpo Docente: https://www.ifsudestemg.edu.br/barbacena/institucional/corpo-docente\n"
-            "- Página Inicial: https://www.ifsudestemg.edu.br/barbacena\n"
-            "- Notícias: https://www.ifsudestemg.edu.br/noticias/barbacena\n"
-            "- Calendário: https://www.ifsudestemg.edu.br/documentos-institucionais/unidades/barbacena/diretorias-sistemicas/ensino/calendario-academico\n"
-            "- Assistência Estudantil: https://www.ifsudestemg.edu.br/barbacena/institucional/ensino/apoio-ao-discente/assistencia-estudantil\n"
-            "- Mapa do Site: https://www.ifsudestemg.edu.br/barbacena/mapadosite\n"
+        self.db = db or create_session_db(AGENT_DB)
+
+        main_pages = "URLs DIRETAS PARA ATALHOS IMPORTANTES (USE SEMPRE):\n" + "".join(
+            f"- {name}: {url}\n" for name, url in MAIN_PAGES.items()
         )
         
-        self.available_tools = [open_link, open_link_in_selenium, site_search_simple, site_search, 
-                                read_pdf, find_pdf_links, get_page_navigation,  get_site_highlights]
+        self.available_tools = [open_link, open_links, open_link_in_selenium, site_search_simple, site_search, 
+                                read_pdf, find_pdf_links, get_page_navigation,  get_site_highlights,
+                                local_search, find_docentes, calendar_events, get_cardapio, recall_tool_result,
+                                find_documents]
+        self.tools_by_name = {tool.name: tool for tool in self.available_tools}
+        self.router = IntentRouter(pages=MAIN_PAGES)
+
+        # O resumo (título exibido no histórico) é gerado em segundo plano, fora do turno (ver _schedule_summary)
+        self.summary_manager = SessionSummaryManager(
+            model=summary_model or InstrumentedGemini(
+                id="models/gemini-2.5-flash-lite",
+                api_key=SUMMARIZER_API_KEY,
+                metrics_role="summary"
+            ), 
+            session_summary_prompt= """
+            Gere um título curto para ser exibido no histórico do usuário.
+
+            Estilo: Use frases nominais curtas (ex: 'Planejamento de Viagem', 'Erro no Python', 'Receita de Bolo'). Evite frases completas ou verbos narrativos como 'Usuário pede...', 'Assistente fala...'.   
+            Tamanho: De 3 a 6 palavras.
+            Objetivo: O título deve resumir o tópico principal ou a intenção do usuário.
+            """
+        )
 
-        self.agno_agent = Agent(
+        options = dict(
             name = 'IFinder - Agente de Informação IF Barbacena',
             description = "Você é um agente de IA que busca informações no site do Instituto Federal - Campus Barbacena.",
             instructions = [
@@ -55,18 +182,24 @@ class ChatAgent:
                 "",
                 "1. PRIMEIRA ESCOLHA - Ferramentas diretas (use quando aplicável):",
                 "   • get_site_highlights: Para notícias/novidades (não precisa parâmetros)",
+                "   • find_docentes: Para professores/docentes (nome, área, e-mail, Lattes)",
+                "   • calendar_events: Para datas do calendário acadêmico (férias, início das aulas, feriados, matrículas)",
+                "   • get_cardapio: Para o cardápio do refeitório de um dia",
                 "   • open_link: Quando tiver URL específica (páginas institucionais, links conhecidos)",
+                "   • open_links: Quando tiver VÁRIAS URLs para conferir (ex: notícias de get_site_highlights, candidatas de uma busca); abre todas de uma vez",
                 "   • get_page_navigation: Para descobrir links/seções disponíveis em uma página",
                 "",
                 "2. SEGUNDA ESCOLHA - Conteúdo dinâmico:",
                 "   • open_link_in_selenium: Se open_link falhar ou conteúdo carregar via JavaScript",
                 "",
                 "3. ARQUIVOS PDF (Exclusivo):",
-                "   • read_pdf: ÚNICA forma de ler arquivos PDF. Use se URL terminar em .pdf",
+                "   • read_pdf: ÚNICA forma de ler arquivos PDF. Use se URL terminar em .pdf. Em PDFs longos (editais, calendários) passe 'query' com o assunto ou 'pages' com as páginas",
+                "   • find_documents: Para encontrar um PDF pelo assunto (ex: query='calendário 2025', section='calendário acadêmico') em uma única chamada",
                 "   • find_pdf_links: Para encontrar PDFs em uma página",
                 "",
                 "4. ÚLTIMO RECURSO - Busca (só se NÃO souber onde procurar):",
-                "   • site_search_simple ou site_search: Quando nenhuma das acima for aplicável",
+                "   • local_search: Busca no índice local do site (rápida, tolera acentos e variações). Use PRIMEIRO",
+                "   • site_search_simple ou site_search: Quando local_search não encontrar resultados",
                 "   • AVISO: Busca interna do site é RUIM, DESATUALIZADA e requer texto EXATO",
                 "",
                 "REGRA DE OURO: Sempre que souber ou descobrir uma URL, use open_link. NUNCA busque se tiver URL!",
@@ -75,27 +208,32 @@ class ChatAgent:
                 "- COMPORTAMENTO CRÍTICO:",
                 "- Se uma ferramenta falhar, tente a próxima da MESMA CATEGORIA antes de descer de nível.",
                 "- Só use ferramentas de busca após TODAS as outras opções falharem.",
-                "- Se o conteúdo de uma página parecer cortado ou incompleto, OBRIGATORIAMENTE use 'open_link_in_selenium'.",
-                "- Para listas longas (como Corpo Docente), saiba que o texto pode exceder o limite; use Selenium se não encontrar o que busca de primeira.",
+                "- Se o retorno de 'open_link' trouxer 'next_cursor', a página continua: chame 'open_link' novamente com cursor=next_cursor para ler o restante.",
+                "- Se o conteúdo de uma página parecer vazio ou incompleto mesmo sem 'next_cursor', OBRIGATORIAMENTE use 'open_link_in_selenium'.",
+                "- Para listas longas, leia as continuações com o cursor antes de recorrer ao Selenium.",
+                "- Resultados de ferramentas de turnos anteriores aparecem resumidos no histórico com uma chave (tr_...). Se o resumo não bastar, use 'recall_tool_result' com a chave em vez de abrir a página ou o PDF de novo.",
 
                 "- ESTRATÉGIA POR CATEGORIA:",
                 
                 "PROFESSORES E DOCENTES:",
-                "- Vá DIRETO para: 'https://www.ifsudestemg.edu.br/barbacena/institucional/corpo-docente'.",
-                "- Se não encontrar o nome (ex: Herlon) com 'open_link', use 'open_link_in_selenium' imediatamente, pois a página é longa e pode carregar via JS.",
+                "- Use 'find_docentes' com o nome (ex: name='Herlon') ou a área (ex: area='informática'). Ela já traz e-mail, área e Lattes.",
+                "- Só se 'find_docentes' estiver indisponível, abra 'https://www.ifsudestemg.edu.br/barbacena/institucional/corpo-docente' com 'open_link'.",
 
                 "NOTÍCIAS E DESTAQUES:",
                 "- Use a tool 'get_site_highlights'. Se falhar, use 'open_link_in_selenium' na página de notícias.",
                 "- Ou acesse 'https://www.ifsudestemg.edu.br/noticias/barbacena' para ler detalhes.",
+                "- Para ler os detalhes de várias notícias, passe os links delas juntos em 'open_links' (uma chamada só).",
 
                 "CARDÁPIO E REFEITÓRIO:",
-                "- O cardápio geralmente é uma NOTÍCIA recente. Verifique 'get_site_highlights' ou a página de notícias primeiro.",
+                "- Use 'get_cardapio' com a data (padrão: hoje). Só se não houver cardápio para a data, continue abaixo.",
+                "- O cardápio geralmente é uma NOTÍCIA recente. Verifique 'get_site_highlights' ou a página de notícias.",
                 "- Alternativa: Navegue em 'https://www.ifsudestemg.edu.br/barbacena/estudante' usando 'get_page_navigation' para achar a seção de Assistência Estudantil/Refeitório.",
-                "- Se achar um link de PDF, use 'read_pdf'. Verifique se a DATA no PDF condiz com a semana atual.",
+                "- Se achar um link de PDF de cardápio, passe-o em 'get_cardapio' (parâmetro url); use 'read_pdf' se ela não extrair o cardápio. Verifique se a DATA no PDF condiz com a semana atual.",
 
                 "CALENDÁRIO ACADÊMICO:",
+                "- Use 'calendar_events' com o período (start/end) e o assunto em 'query' (ex: query='férias'). Só se não houver resultado, continue abaixo.",
                 "- Tente navegar via 'https://www.ifsudestemg.edu.br/documentos-institucionais/unidades/barbacena/diretorias-sistemicas/ensino/calendario-academico'.",
-                "- Procure o PDF do ano letivo atual (ex: 2024 ou 2025) usando 'find_pdf_links' e 'read_pdf'.",
+                "- Procure o PDF do ano letivo atual (ex: 2024 ou 2025) com 'find_documents' (section='calendário acadêmico'), ou com 'find_pdf_links', e leia com 'read_pdf'.",
 
                 "CONTATOS E COORDENAÇÕES:",
                 "- Use 'get_page_navigation' na Home ou na página 'Fale Conosco'.",
@@ -103,41 +241,389 @@ class ChatAgent:
 
                 "- REGRAS DE EXECUÇÃO:",
                 "- Se 'open_link' retornar um erro ou texto vazio, use 'open_link_in_selenium'.",
+                "- Em 'open_links', cada URL tem seu próprio resultado ou erro; URLs em 'pending' não terminaram a tempo e podem ser abertas de novo (já estarão em cache).",
                 "- Se a informação for um documento (Cardápio, Edital, Calendário), você PRECISA ler o conteúdo do PDF com 'read_pdf' antes de responder.",
-                "- No site do instituto, arquivos podem ser organizados por pastas (ex: Calendario 2025/calendario.pdf). Portanto quando for necessario encontrar um pdf, navegue pelas pastas (links) ate que seja encontrado",
+                "- No site do instituto, arquivos podem ser organizados por pastas (ex: Calendario 2025/calendario.pdf). Para encontrar um pdf, use PRIMEIRO 'find_documents' (já percorre as pastas); só se ela não encontrar, navegue pelas pastas (links) até que seja encontrado",
                 "- As ferramentas aceitam URLs relativas (ex: /barbacena/cursos) ou completas.",
                 "- Responda em pt-BR, de forma prestativa, clara e sempre citando a fonte (o link) da informação encontrada."
             ],
             model=self.model,
             tools=self.available_tools,
+            tool_hooks=[tool_metrics_hook], # Duração e erros de cada ferramenta em /metrics
+            post_hooks=[compact_tool_results], # Resume os resultados das ferramentas antes de irem para o histórico
 
             db=self.db,
             add_history_to_context=True, # Adiciona o histórico ao contexto do chat 
             num_history_runs=5,          # Últimos 5 turnos
 
-            enable_session_summaries=True, # Permite criação de um resumo do chat
-            session_summary_manager = SessionSummaryManager(
-                model=Gemini(
-                    id="models/gemini-2.5-flash-lite",
-                    api_key=SUMMARIZER_API_KEY
-                ), 
-                session_summary_prompt= """
-                Gere um título curto para ser exibido no histórico do usuário.
-
-                Estilo: Use frases nominais curtas (ex: 'Planejamento de Viagem', 'Erro no Python', 'Receita de Bolo'). Evite frases completas ou verbos narrativos como 'Usuário pede...', 'Assistente fala...'.   
-                Tamanho: De 3 a 6 palavras.
-                Objetivo: O título deve resumir o tópico principal ou a intenção do usuário.
-                """
-            ),
+            enable_session_summaries=False, # O resumo é gerado pela fila de resumos, depois do turno
             add_session_summary_to_context=False,
-            debug_mode=True,
+            debug_mode=AGENT_DEBUG,
             debug_level=2
         )
+        self.agno_agent = Agent(**options)
+        # Mesmo agente para o caminho assíncrono (aprocess_message): ferramentas que baixam
+        # páginas e PDFs pelo httpx e as demais executadas em threads, fora do event loop
+        self.async_agent = Agent(**{**options, "tools": async_tools(self.available_tools),
+                                    "tool_hooks": [atool_metrics_hook]})
 
     
+    def _cached_answer(self, prompt: str):
+        """
+            Procura a pergunta no cache de respostas. Perguntas que dependem do histórico
+            da conversa (ex: 'e amanhã?', 'qual o e-mail dele?') não usam o cache.
+
+            Returns:
+                dict | None: Resposta guardada ({answer, sources, question}) ou None.
+        """
+        if not ANSWER_CACHE_ENABLED:
+            return None
+        if depends_on_history(prompt):
+            ANSWER_CACHE.inc(result="bypass")
+            return None
+
+        with span("answer_cache") as current:
+            cached = get_answer_cache().get(prompt)
+            if current:
+                current.set(result="hit" if cached else "miss")
+        ANSWER_CACHE.inc(result="hit" if cached else "miss")
+        return cached
+
+    def _record_turn(self, prompt: str, answer: str, user_id: str, session_id: str, title: str = None,
+                     tool_messages: list = None):
+        """
+            Salva na sessão um turno respondido sem o modelo (pelo cache ou pelo roteador), para
+            que ele apareça no histórico e sirva de contexto para as próximas perguntas.
+
+            Args:
+                title (str): Título provisório da sessão, até a fila de resumos gerar o definitivo.
+                tool_messages (list): Chamada de ferramenta e resultado que produziram a resposta.
+        """
+        session = self.agno_agent.get_session(session_id=session_id, user_id=user_id)
+        if session is None:
+            session = AgentSession(session_id=session_id, agent_id=self.agno_agent.id, user_id=user_id,
+                                   session_data={}, runs=[], created_at=int(time.time()))
+        if tool_messages and HISTORY_COMPACTION:
+            compact_messages(tool_messages)
+        if session.summary is None and title:
+            session.summary = SessionSummary(summary=title, updated_at=datetime.now())
+
+        run = RunOutput(
+            run_id=str(uuid.uuid4()),
+            agent_id=self.agno_agent.id,
+            session_id=session_id,
+            user_id=user_id,
+            input=RunInput(input_content=prompt),
+            content=answer,
+            messages=[Message(role="user", content=prompt), *(tool_messages or []), Message(role="assistant", content=answer)],
+            status=RunStatus.completed,
+        )
+        session.upsert_run(run)
+        self.agno_agent.save_session(session)
+        if hasattr(self.db, "upsert_run"):  # Versões novas do agno guardam as execuções em uma tabela à parte
+            self.db.upsert_run(run=run, session_id=session_id, user_id=user_id, run_index=len(session.runs) - 1)
+
+    def _routed_tool(self, prompt: str):
+        """
+            Passa a pergunta pelo roteador de intenções e, se ele reconhecer a intenção com
+            confiança, executa a ferramenta sem esperar o modelo decidir chamá-la.
+
+            Returns:
+                tuple | None: (rota, mensagens da chamada e do resultado) ou None para seguir com o agente completo.
+        """
+        if is_follow_up(prompt):
+            return None
+        route = self.router.route(prompt)
+        if route is None or route.tool not in self.tools_by_name:
+            return None
+
+        call_id = f"router_{uuid.uuid4().hex[:12]}"
+        result = str(tool_metrics_hook(route.tool, self.tools_by_name[route.tool].entrypoint, dict(route.args)))
+        # Resultado vazio ou com erro: o modelo recebe a saída e decide como continuar
+        route.direct = route.direct and is_useful(result)
+        record_route(route, "direct" if route.direct else "assist")
+
+        messages = [
+            Message(role="assistant", content=None, tool_calls=[{
+                "id": call_id,
+                "type": "function",
+                "function": {"name": route.tool, "arguments": json.dumps(route.args, ensure_ascii=False)},
+            }]),
+            Message(role="tool", content=result, tool_call_id=call_id, tool_name=route.tool, tool_args=route.args),
+        ]
+        return route, messages
+
+    def _answer_cacheable(self, prompt: str, session_id: str) -> bool:
+        """
+            Indica se a resposta do turno pode ir para o cache, que é compartilhado entre os
+            usuários: só perguntas que não dependem da conversa, feitas em uma sessão sem turnos
+            anteriores (o modelo recebe o histórico, então a resposta poderia depender dele).
+        """
+        return ANSWER_CACHE_ENABLED and not depends_on_history(prompt) and not has_runs(self.db, session_id)
+
+    def _store_answer(self, prompt: str, answer: str, sources: list):
+        """
+            Guarda a resposta no cache com as fontes usadas (só turnos aprovados por _answer_cacheable).
+        """
+        if not answer:
+            return
+        try:
+            get_answer_cache().put(prompt, answer, sources)
+        except Exception as e:
+            logger.exception("Erro ao guardar a resposta no cache: %s", e)
+
+    def _summarize(self, session_id: str, user_id: str):
+        """
+            Gera o resumo da sessão com o modelo de resumo e grava só a coluna do resumo.
+        """
+        session = self.db.get_session(session_id=session_id, session_type=SessionType.AGENT, user_id=user_id)
+        if session is None or not session.runs:
+            return
+        summary = self.summary_manager.create_session_summary(session)
+        if summary:
+            save_summary(self.db, session_id, summary.to_dict())
+
+    def _schedule_summary(self, session_id: str, user_id: str):
+        """
+            Agenda o resumo da sessão na fila de fundo; turnos seguidos geram um único resumo.
+        """
+        get_summary_queue().schedule(session_id, lambda: self._summarize(session_id, user_id))
+
     def process_message(self, prompt: str, user_id: str, session_id: str) -> str:
         """
             Processa a mensagem do usuário.
         """
-        response = self.agno_agent.run(prompt, user_id=user_id, session_id=session_id)
-        return response.content
\ No newline at end of file
+        try:
+            return self._process_message(prompt, user_id, session_id)
+        finally:
+            self._schedule_summary(session_id, user_id)
+
+    async def aprocess_message(self, prompt: str, user_id: str, session_id: str) -> str:
+        """
+            Versão assíncrona do process_message (ver async_runtime.py): o modelo e as ferramentas
+            rodam pelo arun do agno, então o turno não ocupa uma thread enquanto espera o site ou o Gemini.
+        """
+        try:
+            return await self._aprocess_message(prompt, user_id, session_id)
+        finally:
+            self._schedule_summary(session_id, user_id)
+
+    def _process_message(self, prompt: str, user_id: str, session_id: str) -> str:
+        with trace_turn(session_id, user_id, prompt):
+            answer, run_input, tool_args, cacheable = self._start_turn(prompt, user_id, session_id)
+            if answer is not None:
+                return answer
+            response = self.agno_agent.run(run_input, user_id=user_id, session_id=session_id)
+        return self._finish_turn(prompt, response, tool_args, cacheable)
+
+    async def _aprocess_message(self, prompt: str, user_id: str, session_id: str) -> str:
+        with trace_turn(session_id, user_id, prompt):
+            # Cache, roteador e banco de sessões são síncronos: rodam em threads, fora do event loop
+            answer, run_input, tool_args, cacheable = await asyncio.to_thread(self._start_turn, prompt, user_id, session_id)
+            if answer is not None:
+                return answer
+            response = await self.async_agent.arun(run_input, user_id=user_id, session_id=session_id)
+        return await asyncio.to_thread(self._finish_turn, prompt, response, tool_args, cacheable)
+
+    def _start_turn(self, prompt: str, user_id: str, session_id: str) -> tuple:
+        """
+            Parte do turno antes do agente: cache de respostas e roteador de intenções.
+
+            Returns:
+                tuple: (resposta pronta ou None, entrada do agente, argumentos das ferramentas já executadas,
+                        se a resposta do agente pode ir para o cache)
+        """
+        cached = self._cached_answer(prompt)
+        if cached:
+            self._record_turn(prompt, cached["answer"], user_id, session_id)
+            return cached["answer"], None, [], False
+
+        # Intenção reconhecida pelo roteador: a resposta é a saída da ferramenta (direct)
+        # ou o modelo recebe o resultado já pronto e só redige a resposta (assist)
+        routed = self._routed_tool(prompt)
+        if routed:
+            route, tool_messages = routed
+            if route.direct:
+                answer = tool_messages[-1].content
+                self._record_turn(prompt, answer, user_id, session_id, title=route.title, tool_messages=tool_messages)
+                return answer, None, [], False
+        cacheable = self._answer_cacheable(prompt, session_id)
+        if routed:
+            return None, [Message(role="user", content=prompt), *tool_messages], [route.args], cacheable
+        return None, prompt, [], cacheable
+
+    def _finish_turn(self, prompt: str, response, tool_args: list, cacheable: bool) -> str:
+        if cacheable and response.status != RunStatus.error and isinstance(response.content, str):
+            tool_args += [tool.tool_args for tool in response.tools or [] if tool.tool_args]
+            sources = [args[key] for args in tool_args for key in ("url", "path") if isinstance(args.get(key), str)]
+            sources.extend(URL_PATTERN.findall(response.content))
+            self._store_answer(prompt, response.content, sources)
+        return response.content
+
+    def process_message_stream(self, prompt: str, user_id: str, session_id: str):
+        """
+            Processa a mensagem do usuário em modo streaming.
+
+            Produz tuplas (evento, dados) na ordem em que acontecem:
+                - ("tool_start", {...}) quando uma ferramenta começa a executar
+                - ("tool_end", {...}) quando ela termina, com a duração
+                - ("token", {"content": ...}) para cada trecho da resposta gerado pelo modelo
+                - ("error", {"error": ...}) se a execução falhar
+                - ("done", {...}) ao final, com as fontes consultadas e os tempos da execução
+                  ('cached': True quando a resposta veio do cache, em um único "token";
+                  'routed': intenção quando a resposta é a saída da ferramenta escolhida pelo roteador)
+        """
+        state = _StreamState()
+        try:
+            with trace_turn(session_id, user_id, prompt):
+                events, run_input = self._start_stream(prompt, user_id, session_id, state)
+                yield from events
+                if run_input is None:
+                    return
+
+                stream = self.agno_agent.run(run_input, user_id=user_id, session_id=session_id, stream=True, stream_events=True)
+                for event in stream:
+                    yield from self._stream_events(event, state)
+
+                yield "done", state.done()
+                if state.cacheable and not state.failed:
+                    self._store_answer(prompt, "".join(state.answer), state.sources)
+        finally:
+            self._schedule_summary(session_id, user_id)
+
+    async def aprocess_message_stream(self, prompt: str, user_id: str, session_id: str):
+        """
+            Versão assíncrona do process_message_stream, com os mesmos eventos.
+        """
+        state = _StreamState()
+        try:
+            with trace_turn(session_id, user_id, prompt):
+                events, run_input = await asyncio.to_thread(self._start_stream, prompt, user_id, session_id, state)
+                for item in events:
+                    yield item
+                if run_input is None:
+                    return
+
+                stream = self.async_agent.arun(run_input, user_id=user_id, session_id=session_id, stream=True, stream_events=True)
+                async for event in stream:
+                    for item in self._stream_events(event, state):
+                        yield item
+
+                yield "done", state.done()
+                if state.cacheable and not state.failed:
+                    await asyncio.to_thread(self._store_answer, prompt, "".join(state.answer), state.sources)
+        finally:
+            self._schedule_summary(session_id, user_id)
+
+    def _start_stream(self, prompt: str, user_id: str, session_id: str, state: "_StreamState") -> tuple:
+        """
+            Parte do turno em streaming antes do agente (cache e roteador).
+
+            Returns:
+                tuple: (eventos já prontos, entrada do agente ou None se o turno terminou)
+        """
+        cached = self._cached_answer(prompt)
+        if cached:
+            self._record_turn(prompt, cached["answer"], user_id, session_id)
+            return [
+                ("token", {"content": cached["answer"]}),
+                ("done", {
+                    "sources": cached["sources"],
+                    "elapsed_ms": state.elapsed_ms(state.started),
+                    "time_to_first_token_ms": state.elapsed_ms(state.started),
+                    "cached": True,
+                }),
+            ], None
+
+        routed = self._routed_tool(prompt)
+        if not routed or not routed[0].direct:
+            state.cacheable = self._answer_cacheable(prompt, session_id)
+        if not routed:
+            return [], prompt
+
+        route, tool_messages = routed
+        call_id = tool_messages[-1].tool_call_id
+        state.sources.extend(value for key, value in route.args.items() if key in ("url", "path"))
+        events = [
+            ("tool_start", {"id": call_id, "tool": route.tool, "args": route.args}),
+            ("tool_end", {"id": call_id, "tool": route.tool, "duration_ms": state.elapsed_ms(state.started),
+                          "error": tool_messages[-1].content.startswith("Erro")}),
+        ]
+        if not route.direct:
+            return events, [Message(role="user", content=prompt), *tool_messages]
+
+        result = tool_messages[-1].content
+        self._record_turn(prompt, result, user_id, session_id, title=route.title, tool_messages=tool_messages)
+        events += [
+            ("token", {"content": result}),
+            ("done", {
+                "sources": list(dict.fromkeys(state.sources + URL_PATTERN.findall(result))),
+                "elapsed_ms": state.elapsed_ms(state.started),
+                "time_to_first_token_ms": state.elapsed_ms(state.started),
+                "routed": route.intent,
+            }),
+        ]
+        return events, None
+
+    def _stream_events(self, event, state: "_StreamState") -> list:
+        """
+            Traduz um evento do agno para os eventos do process_message_stream.
+        """
+        if event.event == RunEvent.tool_call_started and event.tool:
+            tool = event.tool
+            state.tool_started[tool.tool_call_id] = time.perf_counter()
+
+            args = tool.tool_args or {}
+            for key in ("url", "path"):
+                if isinstance(args.get(key), str):
+                    state.sources.append(args[key])
+
+            return [("tool_start", {"id": tool.tool_call_id, "tool": tool.tool_name, "args": args})]
+
+        if event.event == RunEvent.tool_call_completed and event.tool:
+            tool = event.tool
+            since = state.tool_started.pop(tool.tool_call_id, state.started)
+            return [("tool_end", {
+                "id": tool.tool_call_id,
+                "tool": tool.tool_name,
+                "duration_ms": state.elapsed_ms(since),
+                "error": bool(tool.tool_call_error),
+            })]
+
+        if event.event == RunEvent.run_content and isinstance(event.content, str) and event.content:
+            if state.first_token_ms is None:
+                state.first_token_ms = state.elapsed_ms(state.started)
+            state.answer.append(event.content)
+            return [("token", {"content": event.content})]
+
+        if event.event == RunEvent.run_error:
+            state.failed = True
+            return [("error", {"error": event.content})]
+        return []
+
+
+@dataclass
+class _StreamState:
+    """
+        Estado de um turno em streaming (tempos, fontes e resposta acumulada).
+    """
+    started: float = field(default_factory=time.perf_counter)
+    first_token_ms: int = None
+    tool_started: dict = field(default_factory=dict)
+    sources: list = field(default_factory=list)
+    answer: list = field(default_factory=list)
+    failed: bool = False
+    cacheable: bool = False  # A resposta do agente pode ir para o cache (ver _answer_cacheable)
+
+    @staticmethod
+    def elapsed_ms(since: float) -> int:
+        return round((time.perf_counter() - since) * 1000)
+
+    def done(self) -> dict:
+        # Fontes: URLs passadas às ferramentas e URLs citadas na resposta, sem repetição
+        self.sources.extend(URL_PATTERN.findall("".join(self.answer)))
+        return {
+            "sources": list(dict.fromkeys(self.sources)),
+            "elapsed_ms": self.elapsed_ms(self.started),
+            "time_to_first_token_ms": self.first_token_ms,
+        }
\ No newline at end of file
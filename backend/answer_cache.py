@@ -0,0 +1,333 @@
+import os
+import re
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from tools.http_cache import cached_fetch
+from tools.pdf_cache import get_pdf_cache
+from tools.content_extractor import DOCUMENT_LINK
+from tools.text_utils import tokenize, stem
+
+# Cache de respostas para perguntas repetidas (ex: "notícias recentes", "cardápio da semana").
+# Cada resposta guarda as páginas/PDFs usados e uma impressão digital de cada um; se alguma
+# fonte mudar, ou o TTL vencer, ou o dia virar (as respostas dependem da data de hoje), a
+# resposta é descartada.
+ANSWER_CACHE_DB = os.getenv("ANSWER_CACHE_DB", "tmp/answer_cache.db")
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "1") == "1"
+TTL = float(os.getenv("ANSWER_CACHE_TTL_HOURS", "6")) * 3600
+RECHECK_AFTER = float(os.getenv("ANSWER_CACHE_RECHECK_MINUTES", "10")) * 60  # Intervalo entre verificações das fontes
+SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.8"))  # Jaccard mínimo para perguntas quase iguais
+MAX_ENTRIES = 2000
+
+SITE_HOST = "ifsudestemg.edu.br"
+
+# Palavras que indicam que a pergunta depende do que já foi conversado na sessão
+CONTEXT_WORDS = {
+    'ele', 'ela', 'eles', 'elas', 'dele', 'dela', 'deles', 'delas', 'nele', 'nela', 'isso', 'isto', 'disso', 'disto',
+    'esse', 'essa', 'esses', 'essas', 'desse', 'dessa', 'nesse', 'nessa', 'aquele', 'aquela', 'daquele', 'daquela',
+    'anterior', 'acima', 'mesmo', 'mesma', 'outro', 'outra', 'outros', 'outras', 'ultimo', 'ultima', 'resposta',
+    # Pedidos sobre a própria conversa ('resuma a conversa', 'o que eu perguntei?', 'traduza para inglês')
+    'conversa', 'conversamos', 'perguntei', 'perguntou', 'falei', 'falou', 'falamos', 'disse', 'dissemos',
+    'mencionei', 'mencionou', 'resuma', 'resumir', 'traduza', 'traduzir', 'repita', 'repetir', 'reescreva', 'reformule',
+}
+_FOLLOW_UP = re.compile(r'^\s*(e|mas|então|entao|também|tambem)(?=[\s,?])', re.IGNORECASE)
+
+
+def question_terms(question: str) -> list:
+    """
+        Palavras da pergunta sem acentos e sem stopwords, usadas como chave do cache.
+        As palavras ficam inteiras: o radical junta masculino e feminino e perguntas
+        sobre pessoas diferentes ('Lattes do Daniel' e 'Lattes da Daniela') teriam a mesma chave.
+    """
+    return sorted(set(tokenize(question)))
+
+
+def question_key(question: str) -> str:
+    return " ".join(question_terms(question))
+
+
+def _shingles(terms: list) -> set:
+    # Trigramas do radical de cada palavra, tolerando erros de digitação e variações de flexão
+    shingles = set()
+    for term in terms:
+        padded = f" {stem(term)} "
+        shingles.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return shingles
+
+
+def _other_inflection(term_a: str, term_b: str) -> bool:
+    # Mesmo radical, mas não só singular/plural (ex: 'daniel'/'daniela', 'paulo'/'paula')
+    if term_a == term_b or stem(term_a) != stem(term_b):
+        return False
+    shorter, longer = sorted((term_a, term_b), key=len)
+    return longer not in (shorter + 's', shorter + 'es')
+
+
+def similarity(terms_a: list, terms_b: list) -> float:
+    """
+        Similaridade (Jaccard dos trigramas) entre duas perguntas já normalizadas.
+        Perguntas com números diferentes (ex: 'edital 2024' e 'edital 2025') ou com palavras
+        que só diferem no gênero (ex: 'contato do Paulo' e 'contato da Paula') nunca são iguais.
+    """
+    if {t for t in terms_a if t.isdigit()} != {t for t in terms_b if t.isdigit()}:
+        return 0.0
+    only_a, only_b = set(terms_a) - set(terms_b), set(terms_b) - set(terms_a)
+    if any(_other_inflection(a, b) for a in only_a for b in only_b):
+        return 0.0
+    a, b = _shingles(terms_a), _shingles(terms_b)
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def is_follow_up(question: str) -> bool:
+    """
+        Indica se a pergunta continua a anterior ('e amanhã?', 'qual o e-mail dele?', 'me fale mais sobre isso').
+    """
+    if _FOLLOW_UP.match(question):
+        return True
+    return any(word in CONTEXT_WORDS for word in tokenize(question, drop_stopwords=False))
+
+
+def depends_on_history(question: str) -> bool:
+    """
+        Indica se a pergunta provavelmente só faz sentido com o histórico da conversa:
+        continuações e mensagens curtas demais para serem entendidas sozinhas ('sim', 'e aí?').
+    """
+    return is_follow_up(question) or len(tokenize(question)) < 2
+
+
+def fingerprint(url: str):
+    """
+        Impressão digital do conteúdo atual de uma fonte (hash do PDF ou da página),
+        lida pelos caches HTTP e de PDFs; None se a fonte não puder ser lida.
+    """
+    try:
+        if DOCUMENT_LINK.search(url):
+            return get_pdf_cache().document(url)[0]
+        response = cached_fetch(url, timeout=15)
+        if not response.ok:
+            return None
+        return hashlib.sha256(response.content).hexdigest()
+    except Exception:
+        return None
+
+
+def _end_of_day(timestamp: float) -> float:
+    day = datetime.fromtimestamp(timestamp).date() + timedelta(days=1)
+    return datetime(day.year, day.month, day.day).timestamp()
+
+
+class AnswerCache:
+    """
+        Respostas do agente em SQLite, procuradas pela pergunta normalizada e, se não houver
+        igual, pela pergunta mais parecida (similaridade >= SIMILARITY).
+    """
+    def __init__(self, db_file: str = ANSWER_CACHE_DB, ttl: float = TTL, recheck_after: float = RECHECK_AFTER,
+                 threshold: float = SIMILARITY):
+        self.ttl = ttl
+        self.recheck_after = recheck_after
+        self.threshold = threshold
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY,
+                question_key TEXT UNIQUE NOT NULL,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                sources TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                checked_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_answers_expires ON answers (expires_at);
+            CREATE TABLE IF NOT EXISTS answer_sources (
+                answer_id INTEGER NOT NULL REFERENCES answers (id) ON DELETE CASCADE,
+                url TEXT NOT NULL,
+                PRIMARY KEY (answer_id, url)
+            );
+            CREATE INDEX IF NOT EXISTS idx_answer_sources_url ON answer_sources (url);
+        """)
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.commit()
+
+    def _candidates(self, key: str) -> list:
+        with self._lock:
+            self._conn.execute("DELETE FROM answers WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+            row = self._conn.execute(
+                "SELECT id, question_key, question, answer, sources, checked_at FROM answers WHERE question_key = ?",
+                (key,)
+            ).fetchone()
+            if row:
+                return [row]
+            return self._conn.execute(
+                "SELECT id, question_key, question, answer, sources, checked_at FROM answers ORDER BY hits DESC LIMIT ?",
+                (MAX_ENTRIES,)
+            ).fetchall()
+
+    def get(self, question: str):
+        """
+            Procura uma resposta válida para a pergunta.
+
+            Returns:
+                dict | None: {answer, sources, question} ou None se não houver.
+        """
+        terms = question_terms(question)
+        if not terms:
+            return None
+        key = " ".join(terms)
+
+        best, best_score = None, 0.0
+        for row in self._candidates(key):
+            score = 1.0 if row[1] == key else similarity(terms, row[1].split())
+            if score >= self.threshold and score > best_score:
+                best, best_score = row, score
+        if best is None:
+            return None
+
+        answer_id, _, cached_question, answer, sources, checked_at = best
+        sources = json.loads(sources)
+        if time.time() - checked_at > self.recheck_after and not self._still_valid(answer_id, sources):
+            return None
+
+        with self._lock:
+            self._conn.execute("UPDATE answers SET hits = hits + 1 WHERE id = ?", (answer_id,))
+            self._conn.commit()
+        return {"answer": answer, "sources": list(sources), "question": cached_question}
+
+    def _still_valid(self, answer_id: int, sources: dict) -> bool:
+        # Compara a impressão digital atual de cada fonte com a guardada junto da resposta
+        for url, digest in sources.items():
+            if digest and fingerprint(url) != digest:
+                self.remove(answer_id)
+                return False
+        with self._lock:
+            self._conn.execute("UPDATE answers SET checked_at = ? WHERE id = ?", (time.time(), answer_id))
+            self._conn.commit()
+        return True
+
+    def put(self, question: str, answer: str, sources: list) -> bool:
+        """
+            Guarda a resposta com as impressões digitais das fontes do site usadas para montá-la.
+            O cache é compartilhado entre os usuários, então só entram respostas baseadas em pelo
+            menos uma fonte do site, todas com impressão digital; as demais (conversa, tradução,
+            conhecimento do modelo) não têm como ser validadas.
+
+            Returns:
+                bool: True se a resposta foi guardada.
+        """
+        key = question_key(question)
+        if not key or not answer:
+            return False
+
+        # Fontes de fora do site são guardadas só para exibição, sem impressão digital
+        digests = {}
+        for url in dict.fromkeys(sources):
+            digests[url] = fingerprint(url) if SITE_HOST in url else None
+            if SITE_HOST in url and digests[url] is None:
+                return False
+        if not any(digests.values()):
+            return False
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM answers WHERE question_key = ?", (key,))
+            answer_id = self._conn.execute(
+                "INSERT INTO answers (question_key, question, answer, sources, created_at, expires_at, checked_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, question, answer, json.dumps(digests), now, min(now + self.ttl, _end_of_day(now)), now)
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO answer_sources (answer_id, url) VALUES (?, ?)",
+                [(answer_id, url) for url in digests]
+            )
+            self._conn.commit()
+        return True
+
+    def remove(self, answer_id: int):
+        with self._lock:
+            self._conn.execute("DELETE FROM answers WHERE id = ?", (answer_id,))
+            self._conn.commit()
+
+    def invalidate_url(self, url: str) -> int:
+        """
+            Descarta as respostas construídas a partir da URL (listener do crawler).
+
+            Returns:
+                int: Quantidade de respostas descartadas.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM answers WHERE id IN (SELECT answer_id FROM answer_sources WHERE url IN (?, ?))",
+                (url, url.rstrip('/') + '/')
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> AnswerCache:
+    """
+        Retorna o cache de respostas compartilhado (criado na primeira chamada).
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AnswerCache()
+    return _cache
+
+
+# Pares de perguntas que o cache precisa separar (False) ou juntar (True); conferidos por
+# `python answer_cache.py check`
+KEY_CHECKS = (
+    ("Lattes do Daniel", "Lattes da Daniela", False),
+    ("contato do Paulo", "contato da Paula", False),
+    ("e-mail do professor Mário", "e-mail da professora Maria", False),
+    ("edital 2024", "edital 2025", False),
+    ("notícias recentes", "notícia recente", True),
+    ("cardápio da semana", "cardapio da semana", True),
+    ("quando são as matrículas", "quando é a matrícula", True),
+)
+
+
+def check_keys(threshold: float = SIMILARITY) -> list:
+    """
+        Confere KEY_CHECKS com a chave e a similaridade atuais.
+
+        Returns:
+            list: Descrição de cada par com resultado diferente do esperado.
+    """
+    failures = []
+    for question_a, question_b, same in KEY_CHECKS:
+        terms_a, terms_b = question_terms(question_a), question_terms(question_b)
+        score = 1.0 if terms_a == terms_b else similarity(terms_a, terms_b)
+        if (score >= threshold) != same:
+            failures.append(f"{question_a!r} x {question_b!r}: similaridade {score:.2f}, esperado {'igual' if same else 'diferente'}")
+    return failures
+
+
+if __name__ == '__main__':
+    import sys
+
+    if sys.argv[1:] != ["check"]:
+        sys.exit("Uso: python answer_cache.py check")
+    failures = check_keys()
+    for failure in failures:
+        print(failure)
+    print(f"{len(KEY_CHECKS) - len(failures)}/{len(KEY_CHECKS)} pares corretos")
+    sys.exit(1 if failures else 0)
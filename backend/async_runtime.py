@@ -0,0 +1,102 @@
+import os
+import queue
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Event loop do processo para o caminho assíncrono do agente (ChatAgent.aprocess_message).
+# As rotas do Flask continuam síncronas: cada requisição entrega a corrotina do turno a este
+# loop e só espera o resultado. Enquanto os turnos esperam o site (httpx) ou o Gemini, o loop
+# atende os outros; o parsing e as ferramentas síncronas rodam no pool de threads do loop.
+ASYNC_AGENT = os.getenv("ASYNC_AGENT", "1") == "1"
+ASYNC_WORKER_THREADS = int(os.getenv("ASYNC_WORKER_THREADS", "32"))  # Threads para parsing e ferramentas síncronas
+CLOSE_TIMEOUT = 10  # Segundos que o stream espera o gerador fechar quando o cliente desconecta
+
+
+class EventLoopThread:
+    """
+        Event loop rodando em uma thread daemon, criado no primeiro uso (depois do fork
+        dos workers do gunicorn).
+    """
+    def __init__(self, worker_threads: int = ASYNC_WORKER_THREADS):
+        self.loop = asyncio.new_event_loop()
+        self.loop.set_default_executor(ThreadPoolExecutor(max_workers=worker_threads, thread_name_prefix="async-worker"))
+        self._thread = threading.Thread(target=self.loop.run_forever, name="async-agent-loop", daemon=True)
+        self._thread.start()
+
+    def run(self, coroutine, timeout: float = None):
+        """
+            Executa a corrotina no loop e espera o resultado na thread atual.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def iterate(self, generator):
+        """
+            Consome um gerador assíncrono a partir de uma thread síncrona (ex: o stream SSE
+            do Flask). O gerador roda inteiro em uma única tarefa do loop (o rastro do turno
+            fica no mesmo contexto) e os itens chegam por uma fila; se quem consome parar
+            antes do fim, a tarefa é cancelada, o gerador é fechado com aclose() e a thread
+            espera o fechamento (o finally do gerador já rodou quando iterate termina).
+        """
+        items = queue.Queue()
+        closed = threading.Event()
+
+        async def pump():
+            try:
+                async for item in generator:
+                    items.put((True, item))
+            except asyncio.CancelledError:
+                raise
+            except BaseException as e:
+                items.put((False, e))
+            else:
+                items.put((False, None))
+            finally:
+                try:
+                    await generator.aclose()
+                finally:
+                    closed.set()
+
+        task = asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        try:
+            while True:
+                is_item, value = items.get()
+                if is_item:
+                    yield value
+                elif value is None:
+                    return
+                else:
+                    raise value
+        finally:
+            task.cancel()
+            closed.wait(CLOSE_TIMEOUT)
+
+
+_runtime = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> EventLoopThread:
+    """
+        Retorna o event loop compartilhado do processo (criado na primeira chamada).
+    """
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = EventLoopThread()
+    return _runtime
+
+
+def run_async(coroutine, timeout: float = None):
+    """
+        Atalho para get_runtime().run(...).
+    """
+    return get_runtime().run(coroutine, timeout)
+
+
+def iterate_async(generator):
+    """
+        Atalho para get_runtime().iterate(...).
+    """
+    return get_runtime().iterate(generator)
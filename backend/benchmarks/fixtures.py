@@ -0,0 +1,135 @@
+"""
+    Substituto local do site do Instituto para os benchmarks: um servidor HTTP que serve
+    cópias gravadas das páginas e PDFs (benchmarks/fixtures/site) e um adapter do requests
+    que desvia as requisições das ferramentas para ele.
+
+    Em modo de gravação (record=True) as páginas que ainda não existem nas fixtures são
+    baixadas do site real e salvas; sem ele, uma página não gravada responde 404.
+    As fixtures versionadas são geradas por benchmarks/synthetic_site.py (layout do Portal
+    Padrão, sem acessar a rede); páginas gravadas do site real têm o mesmo formato.
+"""
+import os
+import json
+import hashlib
+import threading
+import mimetypes
+import requests
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from requests.adapters import HTTPAdapter
+
+from tools.http_client import get_session, HEADERS
+
+SITE_ORIGIN = "https://www.ifsudestemg.edu.br"
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "site")
+MANIFEST = "manifest.json"
+
+
+class FixtureStore:
+    """
+        Páginas gravadas, indexadas por caminho + query string (manifest.json aponta para o arquivo).
+    """
+    def __init__(self, directory: str = FIXTURES_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        path = os.path.join(directory, MANIFEST)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                self.entries = json.load(file)
+        else:
+            self.entries = {}
+
+    def get(self, target: str):
+        entry = self.entries.get(target)
+        if entry is None:
+            return None
+        with open(os.path.join(self.directory, entry["file"]), "rb") as file:
+            return entry["status"], entry["content_type"], file.read()
+
+    def put(self, target: str, status: int, content_type: str, body: bytes):
+        extension = mimetypes.guess_extension((content_type or "").split(";")[0].strip()) or ".bin"
+        name = hashlib.sha1(target.encode()).hexdigest()[:16] + extension
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, name), "wb") as file:
+                file.write(body)
+            self.entries[target] = {"file": name, "status": status, "content_type": content_type}
+            with open(os.path.join(self.directory, MANIFEST), "w", encoding="utf-8") as file:
+                json.dump(self.entries, file, ensure_ascii=False, indent=1, sort_keys=True)
+
+
+class FixtureServer:
+    """
+        Servidor HTTP local (em uma thread) que responde com as páginas gravadas
+        e conta quantos bytes entregou.
+    """
+    def __init__(self, store: FixtureStore = None, record: bool = False, origin: str = SITE_ORIGIN):
+        self.store = store or FixtureStore()
+        self.record = record
+        self.origin = origin
+        self.bytes_served = 0
+        self.misses = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fixture = server.store.get(self.path)
+                if fixture is None and server.record:
+                    fixture = server._record(self.path)
+                if fixture is None:
+                    with server._lock:
+                        server.misses.append(self.path)
+                    fixture = (404, "text/plain; charset=utf-8", b"Pagina nao gravada nas fixtures.")
+
+                status, content_type, body = fixture
+                self.send_response(status)
+                self.send_header("Content-Type", content_type or "application/octet-stream")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with server._lock:
+                    server.bytes_served += len(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def _record(self, target: str):
+        response = requests.get(self.origin + target, headers=HEADERS, timeout=60)
+        fixture = (response.status_code, response.headers.get("Content-Type"), response.content)
+        self.store.put(target, *fixture)
+        return fixture
+
+    def start(self) -> "FixtureServer":
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class _FixtureAdapter(HTTPAdapter):
+    # Reescreve a origem do site para o servidor local; o restante da URL é mantido
+    def __init__(self, origin: str, target: str):
+        super().__init__()
+        self.origin = origin
+        self.target = target
+
+    def send(self, request, **kwargs):
+        request.url = self.target + request.url[len(self.origin):]
+        return super().send(request, **kwargs)
+
+
+def route_site_to(server: FixtureServer):
+    """
+        Faz a sessão HTTP compartilhada das ferramentas buscar as páginas do site no servidor local.
+        As URLs vistas pelas ferramentas (e as chaves dos caches) continuam sendo as do site real.
+    """
+    get_session().mount(server.origin + "/", _FixtureAdapter(server.origin, server.url))
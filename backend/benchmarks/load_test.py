@@ -0,0 +1,170 @@
+"""
+    Teste de carga do servidor de produção: sobe o gunicorn com diferentes quantidades
+    de workers e mede a vazão do /chat.
+
+    Por padrão usa o SimulatedAgent (sem LLM nem acesso ao site), que imita um turno com
+    espera de rede e um trecho de CPU (parsing). Para medir o agente real, use --real-agent.
+
+        cd backend
+        python -m benchmarks.load_test --workers 1 2 4 --concurrency 16 --requests 200
+"""
+import os
+import sys
+import time
+import uuid
+import asyncio
+import socket
+import argparse
+import threading
+import subprocess
+import statistics
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+LATENCY_MS = float(os.getenv("LOAD_TEST_LATENCY_MS", "200"))  # Espera simulada (LLM + site)
+CPU_MS = float(os.getenv("LOAD_TEST_CPU_MS", "50"))           # CPU simulada por turno (parsing)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class SimulatedAgent:
+    """
+        Substituto do ChatAgent com a mesma interface, para medir o servidor isoladamente.
+    """
+    def __init__(self, db=None):
+        self.db = db
+
+    def _turn(self):
+        time.sleep(LATENCY_MS / 1000)
+        self._busy_cpu()
+
+    def process_message(self, prompt: str, user_id: str, session_id: str) -> str:
+        self._turn()
+        return f"Resposta simulada para: {prompt}"
+
+    def process_message_stream(self, prompt: str, user_id: str, session_id: str):
+        self._turn()
+        yield "token", {"content": f"Resposta simulada para: {prompt}"}
+        yield "done", {"sources": [], "elapsed_ms": LATENCY_MS + CPU_MS, "time_to_first_token_ms": LATENCY_MS}
+
+    # Caminho assíncrono (ASYNC_AGENT): a espera fica no event loop e a CPU vai para uma thread,
+    # como o parsing das ferramentas assíncronas
+    async def _aturn(self):
+        await asyncio.sleep(LATENCY_MS / 1000)
+        await asyncio.to_thread(self._busy_cpu)
+
+    def _busy_cpu(self):
+        deadline = time.perf_counter() + CPU_MS / 1000
+        while time.perf_counter() < deadline:
+            pass
+
+    async def aprocess_message(self, prompt: str, user_id: str, session_id: str) -> str:
+        await self._aturn()
+        return f"Resposta simulada para: {prompt}"
+
+    async def aprocess_message_stream(self, prompt: str, user_id: str, session_id: str):
+        await self._aturn()
+        yield "token", {"content": f"Resposta simulada para: {prompt}"}
+        yield "done", {"sources": [], "elapsed_ms": LATENCY_MS + CPU_MS, "time_to_first_token_ms": LATENCY_MS}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(workers: int, threads: int, max_in_flight: int, real_agent: bool):
+    port = _free_port()
+    env = dict(
+        os.environ,
+        WEB_BIND=f"127.0.0.1:{port}",
+        WEB_WORKERS=str(workers),
+        CRAWLER_INTERVAL_MINUTES="0",
+        SELENIUM_POOL_WARM="0",
+        WEB_ACCESS_LOG=os.devnull,
+    )
+    # Sem valor, valem os padrões do servidor (que dependem de ASYNC_AGENT)
+    if threads:
+        env["WEB_THREADS"] = str(threads)
+    if max_in_flight:
+        env["MAX_IN_FLIGHT_CHATS"] = str(max_in_flight)
+    if not real_agent:
+        env["AGENT_FACTORY"] = "benchmarks.load_test:SimulatedAgent"
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("O gunicorn terminou antes de aceitar conexões.")
+        try:
+            requests.get(f"{base_url}/auth/generate", timeout=5)
+            return process, base_url
+        except requests.RequestException:  # Workers ainda importando o agno
+            time.sleep(0.2)
+
+    process.terminate()
+    raise RuntimeError("O gunicorn não respondeu em 60s.")
+
+
+def _run_load(base_url: str, total: int, concurrency: int) -> dict:
+    local = threading.local()
+    user_id = str(uuid.uuid4())
+
+    def one(i):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.perf_counter()
+        response = session.post(f"{base_url}/chat", json={
+            "prompt": f"Pergunta de teste {i}",
+            "user_id": user_id,
+            "session_id": f"load-{i % concurrency}",
+        }, timeout=300)
+        return response.status_code, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    ok = sorted(ms for status, ms in results if status == 200)
+    return {
+        "ok": len(ok),
+        "busy": sum(1 for status, _ in results if status == 503),
+        "errors": sum(1 for status, _ in results if status not in (200, 503)),
+        "rps": len(ok) / elapsed,
+        "p50": statistics.median(ok) if ok else 0,
+        "p95": ok[int(len(ok) * 0.95) - 1] if ok else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede a vazão do /chat com diferentes quantidades de workers.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Quantidades de workers a testar.")
+    parser.add_argument("--threads", type=int, default=None, help="Threads por worker (padrão: o do gunicorn.conf.py).")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Turnos simultâneos por worker antes do 503 (padrão: o do main.py).")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clientes simultâneos.")
+    parser.add_argument("--requests", type=int, default=200, help="Total de requisições por rodada.")
+    parser.add_argument("--real-agent", action="store_true", help="Usa o ChatAgent real (consome a cota do Gemini).")
+    args = parser.parse_args()
+
+    print(f"{'workers':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'ok':>5} {'503':>5} {'erros':>5}")
+    for workers in args.workers:
+        process, base_url = _start_server(workers, args.threads, args.max_in_flight, args.real_agent)
+        try:
+            result = _run_load(base_url, args.requests, args.concurrency)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+        print(f"{workers:>7} {result['rps']:>8.1f} {result['p50']:>8.0f} {result['p95']:>8.0f} "
+              f"{result['ok']:>5} {result['busy']:>5} {result['errors']:>5}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""
+    Modelo simulado para os benchmarks: em vez de chamar o Gemini, reproduz uma sequência
+    roteirizada de chamadas de ferramentas para cada pergunta e termina com uma resposta fixa.
+    Assim um turno completo do ChatAgent roda sem rede e sempre do mesmo jeito.
+"""
+import json
+import time
+from dataclasses import dataclass, field
+from agno.models.base import Model
+from agno.metrics import MessageMetrics
+from agno.models.response import ModelResponse
+
+
+@dataclass
+class ScriptedModel(Model):
+    """
+        Cada roteiro é uma lista de passos. Um passo é uma lista de chamadas de ferramenta
+        [(nome, argumentos)] executadas juntas, ou um texto, que encerra o turno.
+
+        O passo atual é o número de respostas do modelo desde a última mensagem do usuário;
+        perguntas sem roteiro recebem `default_answer`.
+    """
+    id: str = "scripted"
+    name: str = "ScriptedModel"
+    provider: str = "Benchmark"
+    scripts: dict = field(default_factory=dict)
+    default_answer: str = "Resposta simulada."
+    latency_ms: float = 0  # Espera simulada por chamada (tempo de resposta do LLM)
+
+    def _next_step(self, messages: list):
+        prompt, step = None, 0
+        for message in messages:
+            if message.role == "user":
+                prompt, step = message.content, 0
+            elif message.role == "assistant":
+                step += 1
+
+        script = self.scripts.get(prompt, [])
+        return script[step] if step < len(script) else self.default_answer
+
+    def _respond(self, messages: list) -> ModelResponse:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+        step = self._next_step(messages)
+        response = ModelResponse(role="assistant", response_usage=MessageMetrics(input_tokens=0, output_tokens=0))
+        if isinstance(step, str):
+            response.content = step
+            return response
+
+        for number, (name, arguments) in enumerate(step):
+            response.tool_calls.append({
+                "id": f"call_{len(messages)}_{number}",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(arguments, ensure_ascii=False)},
+            })
+        return response
+
+    def invoke(self, messages: list, assistant_message=None, **kwargs) -> ModelResponse:
+        return self._respond(messages)
+
+    async def ainvoke(self, messages: list, assistant_message=None, **kwargs) -> ModelResponse:
+        return self._respond(messages)
+
+    def invoke_stream(self, messages: list, assistant_message=None, **kwargs):
+        yield self._respond(messages)
+
+    async def ainvoke_stream(self, messages: list, assistant_message=None, **kwargs):
+        yield self._respond(messages)
+
+    def _parse_provider_response(self, response, **kwargs) -> ModelResponse:
+        return response
+
+    def _parse_provider_response_delta(self, response) -> ModelResponse:
+        return response
@@ -0,0 +1,172 @@
+"""
+    Vazão do banco de sessões com turnos gravando e o histórico sendo lido ao mesmo tempo,
+    comparando o SqliteDb padrão do agno com o banco ajustado de session_store.py (WAL,
+    busy_timeout, synchronous=NORMAL e índices).
+
+    Cada escritor imita o fim de um turno (grava a execução na tabela de execuções e atualiza
+    a sessão) e cada leitor imita /sessions/getall + /sessions/get.
+
+        cd backend
+        python -m benchmarks.session_db --writers 4 --readers 8 --seconds 10
+"""
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import statistics
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from agno.db.sqlite import SqliteDb
+
+from session_store import create_session_db, ensure_indexes
+from session_history import list_sessions, get_conversation
+
+TOOL_RESULT = "Resultado de ferramenta com o texto da página. " * 60  # ~3 KB por resultado
+
+
+def _run(run_id: str, number: int) -> dict:
+    return {
+        "run_id": run_id,
+        "status": "COMPLETED",
+        "messages": [
+            {"role": "user", "content": f"Pergunta {number} sobre o campus"},
+            {"role": "assistant", "content": None, "tool_calls": [{"id": f"call-{number}"}]},
+            {"role": "tool", "content": TOOL_RESULT, "tool_call_id": f"call-{number}"},
+            {"role": "assistant", "content": f"Resposta {number} com a fonte do site."},
+        ],
+    }
+
+
+def _insert_runs(conn, db: SqliteDb, runs: list):
+    conn.execute(text(f"""
+        INSERT INTO {db.runs_table_name} (run_id, session_id, run_type, user_id, run_index, run_data, created_at)
+        VALUES (:run_id, :session_id, 'agent', :user_id, :run_index, :run_data, :created_at)
+    """), runs)
+
+
+def _seed(db: SqliteDb, users: int, sessions_per_user: int, runs: int):
+    # Tabelas de sessões e de execuções no formato do agno 3 (uma linha por execução), criadas
+    # aqui para a medição não depender da versão instalada do agno
+    now = int(time.time())
+    sessions = [
+        {"session_id": f"s-{user}-{number}", "user_id": f"u-{user}", "created_at": now - number * 60,
+         "updated_at": now - number * 60}
+        for user in range(users) for number in range(sessions_per_user)
+    ]
+    run_rows = [
+        {"run_id": f"{session['session_id']}-{i}", "session_id": session["session_id"], "user_id": session["user_id"],
+         "run_index": i, "run_data": json.dumps(_run(f"{session['session_id']}-{i}", i)), "created_at": session["created_at"]}
+        for session in sessions for i in range(runs)
+    ]
+    with db.db_engine.begin() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {db.session_table_name} (
+                session_id VARCHAR PRIMARY KEY, session_type VARCHAR NOT NULL, agent_id VARCHAR, user_id VARCHAR,
+                session_data JSON, summary JSON, created_at BIGINT NOT NULL, updated_at BIGINT
+            )
+        """))
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {db.runs_table_name} (
+                run_id VARCHAR PRIMARY KEY, session_id VARCHAR NOT NULL, run_type VARCHAR NOT NULL, user_id VARCHAR,
+                parent_run_id VARCHAR, status VARCHAR, run_index BIGINT, run_data JSON NOT NULL,
+                created_at BIGINT NOT NULL, updated_at BIGINT
+            )
+        """))
+        conn.execute(text(f"""
+            INSERT OR REPLACE INTO {db.session_table_name} (session_id, session_type, user_id, created_at, updated_at)
+            VALUES (:session_id, 'agent', :user_id, :created_at, :updated_at)
+        """), sessions)
+        _insert_runs(conn, db, run_rows)
+
+
+def _measure(db: SqliteDb, writers: int, readers: int, seconds: float, users: int, sessions_per_user: int) -> dict:
+    stop = time.monotonic() + seconds
+    results = {"write": [], "read": [], "locked": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def write_loop(worker: int):
+        rng = random.Random(worker)
+        turn = 0
+        while time.monotonic() < stop:
+            user, number = rng.randrange(users), rng.randrange(sessions_per_user)
+            session_id = f"s-{user}-{number}"
+            run_id = f"w{worker}-{turn}"
+            turn += 1
+            started = time.perf_counter()
+            try:
+                with db.db_engine.begin() as conn:
+                    now = int(time.time())
+                    _insert_runs(conn, db, [{"run_id": run_id, "session_id": session_id, "user_id": f"u-{user}",
+                                             "run_index": now, "run_data": json.dumps(_run(run_id, turn)),
+                                             "created_at": now}])
+                    conn.execute(text(f"UPDATE {db.session_table_name} SET updated_at = :now WHERE session_id = :id"),
+                                 {"now": now, "id": session_id})
+                elapsed = time.perf_counter() - started
+                with lock:
+                    results["write"].append(elapsed)
+            except OperationalError as e:
+                with lock:
+                    results["locked" if "locked" in str(e) else "errors"] += 1
+
+    def read_loop(worker: int):
+        rng = random.Random(1000 + worker)
+        while time.monotonic() < stop:
+            user = rng.randrange(users)
+            started = time.perf_counter()
+            try:
+                page = list_sessions(db, f"u-{user}", limit=20)
+                if page["sessions"]:
+                    get_conversation(db, page["sessions"][0]["session_id"], limit=30)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    results["read"].append(elapsed)
+            except OperationalError as e:
+                with lock:
+                    results["locked" if "locked" in str(e) else "errors"] += 1
+
+    threads = [threading.Thread(target=write_loop, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=read_loop, args=(i,)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    def p95(values):
+        return round(statistics.quantiles(values, n=20)[-1] * 1000, 1) if len(values) >= 20 else None
+
+    return {
+        "writes_per_s": round(len(results["write"]) / seconds, 1),
+        "reads_per_s": round(len(results["read"]) / seconds, 1),
+        "write_p95_ms": p95(results["write"]),
+        "read_p95_ms": p95(results["read"]),
+        "locked": results["locked"],
+        "errors": results["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vazão do banco de sessões com leituras e gravações simultâneas.")
+    parser.add_argument("--writers", type=int, default=4, help="Threads gravando turnos.")
+    parser.add_argument("--readers", type=int, default=8, help="Threads lendo o histórico.")
+    parser.add_argument("--seconds", type=float, default=10, help="Duração de cada medição.")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=5, help="Sessões por usuário.")
+    parser.add_argument("--runs", type=int, default=8, help="Execuções iniciais por sessão.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, factory in (("padrão", lambda path: SqliteDb(db_file=path)), ("ajustado", create_session_db)):
+            db = factory(os.path.join(directory, f"{name}.db"))
+            _seed(db, args.users, args.sessions, args.runs)
+            if name == "ajustado":
+                ensure_indexes(db)  # A tabela só existe depois do _seed
+            result = _measure(db, args.writers, args.readers, args.seconds, args.users, args.sessions)
+            print(f"{name:>9}: {result}")
+            db.db_engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,240 @@
+"""
+    Benchmarks offline das ferramentas e de turnos completos do ChatAgent, sem acessar o
+    site real nem o Gemini: as páginas vêm das fixtures gravadas (benchmarks/fixtures) e o
+    modelo é o ScriptedModel, que repete sempre as mesmas chamadas de ferramentas.
+
+    Para cada caso mede p50/p95 da latência, o pico de memória (tracemalloc) e os bytes
+    entregues pelo site local, e compara com a linha de base salva (benchmarks/baseline.json).
+
+        cd backend
+        python -m benchmarks.synthetic_site          # gera as fixtures que faltam, sem rede
+        python -m benchmarks.suite --record          # grava/atualiza as fixtures (precisa de rede)
+        python -m benchmarks.suite --save-baseline   # mede e salva a linha de base
+        python -m benchmarks.suite                   # mede e compara; sai com código 1 se piorou
+                                                     # e 2 se faltar alguma página nas fixtures
+
+    Os caches (HTTP e PDF) são esvaziados antes de cada execução, então os tempos são do
+    caminho completo: download, parsing e extração.
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import statistics
+import tracemalloc
+
+# Bancos temporários, para não misturar com os dados do servidor (antes de importar as ferramentas)
+_TMP = tempfile.mkdtemp(prefix="ifinder-bench-")
+os.environ["HTTP_CACHE_DB"] = os.path.join(_TMP, "http_cache.db")
+os.environ["PDF_CACHE_DB"] = os.path.join(_TMP, "pdf_cache.db")
+os.environ["PDF_DOWNLOAD_DIR"] = os.path.join(_TMP, "pdf_downloads")
+os.environ["TRACES_DB"] = os.path.join(_TMP, "traces.db")
+os.environ["ANSWER_CACHE_ENABLED"] = "0"  # Mede sempre o turno completo, não a resposta guardada
+os.environ["AGENT_DEBUG"] = "0"
+os.environ["HTTP_RATE_PER_SECOND"] = "0"  # O servidor das fixtures é local; não limita as requisições
+
+from agno.db.sqlite import SqliteDb
+from agent_core import ChatAgent, MAIN_PAGES
+from benchmarks.fixtures import FixtureServer, FixtureStore, route_site_to, FIXTURES_DIR
+from benchmarks.mock_model import ScriptedModel
+from tools.http_cache import get_cache
+from tools.pdf_cache import get_pdf_cache
+from tools.web_tools import get_site_highlights, get_page_navigation, open_link, open_links, site_search_simple, site_search
+from tools.pdf_tools import find_pdf_links, read_pdf
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+CALENDAR_PDF = "{calendar_pdf}"  # Primeiro PDF da página do calendário, descoberto na execução
+
+# Chamadas das ferramentas medidas isoladamente: (nome do caso, ferramenta, argumentos).
+# open_link_in_selenium fica de fora: o navegador não passa pela sessão HTTP desviada para as fixtures.
+TOOL_CASES = [
+    ("get_site_highlights", get_site_highlights, {}),
+    ("get_page_navigation", get_page_navigation, {"url": MAIN_PAGES["Página Inicial"]}),
+    ("open_link:corpo-docente", open_link, {"url": MAIN_PAGES["Corpo Docente"]}),
+    ("open_link:noticias", open_link, {"url": MAIN_PAGES["Notícias"]}),
+    ("open_links:atalhos", open_links, {"urls": [MAIN_PAGES["Corpo Docente"], MAIN_PAGES["Notícias"], MAIN_PAGES["Página Inicial"]]}),
+    ("site_search_simple", site_search_simple, {"query": "calendário acadêmico"}),
+    ("site_search", site_search, {"query": "edital", "item_types": ["Edital"], "sort_by": "Data (Mais Recente)"}),
+    ("find_pdf_links:calendario", find_pdf_links, {"url": MAIN_PAGES["Calendário"]}),
+    ("read_pdf:calendario", read_pdf, {"path": CALENDAR_PDF}),
+    ("read_pdf:calendario:query", read_pdf, {"path": CALENDAR_PDF, "query": "matrícula"}),
+]
+
+# Turnos completos: pergunta e roteiro do modelo simulado (passos de ferramentas e a resposta final)
+TURN_CASES = {
+    "Quais são as últimas notícias do campus?": [
+        [("get_site_highlights", {})],
+        "Estas são as últimas notícias do campus.",
+    ],
+    "Quem são os professores do campus?": [
+        [("open_link", {"url": MAIN_PAGES["Corpo Docente"]})],
+        "Estes são os professores do campus.",
+    ],
+    "Quando começam as aulas?": [
+        [("find_pdf_links", {"url": MAIN_PAGES["Calendário"]})],
+        [("read_pdf", {"path": CALENDAR_PDF, "query": "início das aulas"})],
+        "As aulas começam na data indicada no calendário acadêmico.",
+    ],
+    "Tem edital de monitoria aberto?": [
+        [("site_search_simple", {"query": "monitoria"})],
+        [("site_search", {"query": "monitoria", "item_types": ["Edital"], "date_range": "Sempre"})],
+        "Encontrei estes editais de monitoria.",
+    ],
+}
+
+
+def _resolve(value, context: dict):
+    if isinstance(value, str):
+        return value.format(**context)
+    if isinstance(value, dict):
+        return {key: _resolve(item, context) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_resolve(item, context) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_resolve(item, context) for item in value)
+    return value
+
+
+def _clear_caches():
+    get_cache().clear()
+    get_pdf_cache().clear()
+
+
+def _measure(run, iterations: int, server: FixtureServer) -> dict:
+    """
+        Executa `run` sem cache `iterations` vezes para a latência e mais uma vez
+        com o tracemalloc ligado para o pico de memória e os bytes recebidos.
+        Uma execução inicial (imports e inicializações preguiçosas) fica de fora.
+    """
+    _clear_caches()
+    run()
+
+    timings = []
+    for _ in range(iterations):
+        _clear_caches()
+        started = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    _clear_caches()
+    served = server.bytes_served
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[max(int(len(timings) * 0.95) - 1, 0)], 2),
+        "peak_kb": round(peak / 1024, 1),
+        "bytes": server.bytes_served - served,
+    }
+
+
+def run_suite(server: FixtureServer, iterations: int, selected: str = None) -> dict:
+    context = {"calendar_pdf": ""}
+    pdfs = find_pdf_links.entrypoint(url=MAIN_PAGES["Calendário"])
+    if pdfs:
+        context["calendar_pdf"] = pdfs[0]["url"]
+
+    results = {}
+    for name, function, arguments in TOOL_CASES:
+        if selected and selected not in name:
+            continue
+        arguments = _resolve(arguments, context)
+        if arguments.get("path") == "":
+            sys.exit(f"Erro: nenhum PDF na página do calendário para {name} (fixtures incompletas).")
+        results[f"tool:{name}"] = _measure(lambda: function.entrypoint(**arguments), iterations, server)
+        print(f"  tool:{name}")
+
+    model = ScriptedModel(scripts=_resolve(TURN_CASES, context))
+    summary_model = ScriptedModel(default_answer=json.dumps({"summary": "Benchmark", "topics": []}))
+    agent = ChatAgent(db=SqliteDb(db_file=os.path.join(_TMP, "agent.db")), model=model, summary_model=summary_model)
+
+    for number, prompt in enumerate(TURN_CASES):
+        name = f"turn:{prompt}"
+        if selected and selected not in name:
+            continue
+        runs = iter(range(iterations + 2))
+        results[name] = _measure(
+            lambda: agent.process_message(prompt, user_id="benchmark", session_id=f"bench-{number}-{next(runs)}"),
+            iterations, server,
+        )
+        print(f"  {name}")
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+        Imprime a tabela de resultados com a variação em relação à linha de base.
+
+        Returns:
+            list: Casos em que p50, p95 ou o pico de memória pioraram além da tolerância.
+    """
+    regressions = []
+    print(f"\n{'caso':<50} {'p50 ms':>9} {'p95 ms':>9} {'pico KB':>9} {'bytes':>10}  variação (p50/p95/memória)")
+    for name, result in results.items():
+        line = f"{name[:50]:<50} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['peak_kb']:>9.0f} {result['bytes']:>10}"
+        reference = baseline.get(name)
+        if reference:
+            changes = []
+            for key in ("p50_ms", "p95_ms", "peak_kb"):
+                change = (result[key] - reference[key]) / reference[key] if reference[key] else 0
+                changes.append(f"{change:+.0%}")
+                if change > tolerance:
+                    regressions.append((name, key, reference[key], result[key]))
+            line += "  " + " / ".join(changes)
+            if result["bytes"] != reference["bytes"]:
+                line += f"  (bytes na base: {reference['bytes']}; fixtures mudaram?)"
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks offline das ferramentas e dos turnos do agente.")
+    parser.add_argument("--iterations", type=int, default=10, help="Execuções medidas por caso.")
+    parser.add_argument("--case", default=None, help="Mede apenas os casos cujo nome contém este texto.")
+    parser.add_argument("--record", action="store_true", help="Baixa do site real as páginas que faltam nas fixtures.")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Pasta das páginas gravadas.")
+    parser.add_argument("--save-baseline", action="store_true", help="Salva os resultados como nova linha de base.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Piora aceita em relação à base (0.2 = 20%%).")
+    args = parser.parse_args()
+
+    server = FixtureServer(FixtureStore(args.fixtures), record=args.record).start()
+    route_site_to(server)
+    try:
+        results = run_suite(server, args.iterations, args.case)
+    finally:
+        server.stop()
+
+    # Páginas sem fixture respondem 404 do servidor local: os tempos não medem nada
+    if server.misses:
+        print(f"\nErro: {len(set(server.misses))} página(s) sem fixture (rode python -m benchmarks.synthetic_site "
+              "ou --record): " + ", ".join(sorted(set(server.misses))))
+        sys.exit(2)
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, encoding="utf-8") as file:
+            baseline = json.load(file)
+    regressions = compare(results, {} if args.save_baseline else baseline, args.tolerance)
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(BASELINE_FILE, "w", encoding="utf-8") as file:
+            json.dump(baseline, file, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"\nLinha de base salva em {BASELINE_FILE}")
+    elif regressions:
+        print("\nRegressões:")
+        for name, key, before, after in regressions:
+            print(f"  {name}: {key} {before} -> {after}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+    Gera as fixtures do site para os benchmarks (benchmarks/fixtures/site) sem acessar a rede:
+    páginas no layout do Portal Padrão (Plone) usado pelo site do Instituto, com o mesmo
+    volume de menus, rodapé e scripts das páginas reais, e os PDFs do calendário acadêmico.
+
+    As páginas gravadas do site real (python -m benchmarks.suite --record) têm prioridade:
+    este script só cria as que ainda não existem, a não ser com --overwrite.
+
+        cd backend
+        python -m benchmarks.synthetic_site
+"""
+import random
+import argparse
+import requests
+from datetime import date, timedelta
+
+from agent_core import MAIN_PAGES
+from benchmarks.fixtures import FixtureStore, SITE_ORIGIN, FIXTURES_DIR
+from tools.web_tools import HIGHLIGHTS_URL, SEARCH_URL, search_params
+from tools.lazy_import import lazy_import
+
+fitz = lazy_import("fitz")
+
+HTML = "text/html;charset=utf-8"
+PDF = "application/pdf"
+CALENDAR_DIR = f"{SITE_ORIGIN}/documentos-institucionais/unidades/barbacena/diretorias-sistemicas/ensino/calendario-academico"
+
+FIRST_NAMES = ["Ana", "Bruno", "Carla", "Daniel", "Daniela", "Eduardo", "Fernanda", "Gustavo", "Helena", "Igor",
+               "Juliana", "Leonardo", "Mariana", "Marcelo", "Natália", "Otávio", "Paula", "Paulo", "Rafael", "Sabrina",
+               "Tiago", "Vanessa", "Wagner", "Luciana", "Rodrigo", "Patrícia", "André", "Cristina", "Fábio", "Renata"]
+LAST_NAMES = ["Silva", "Souza", "Oliveira", "Pereira", "Costa", "Rodrigues", "Almeida", "Nascimento", "Lima", "Araújo",
+              "Fernandes", "Carvalho", "Gomes", "Martins", "Rocha", "Ribeiro", "Alves", "Monteiro", "Mendes", "Barros"]
+AREAS = ["Agronomia", "Ciência da Computação", "Matemática", "Química", "Biologia", "Física", "Letras", "Educação Física",
+         "Nutrição", "Administração", "Zootecnia", "Enfermagem", "Gestão Ambiental", "História", "Geografia"]
+TOPICS = ["monitoria", "assistência estudantil", "iniciação científica", "extensão", "vestibular", "matrícula",
+          "estágio", "bolsas", "feira de ciências", "semana acadêmica", "mostra de extensão", "processo seletivo"]
+MONTHS = ["janeiro", "fevereiro", "março", "abril", "maio", "junho", "julho", "agosto", "setembro", "outubro",
+          "novembro", "dezembro"]
+CALENDAR_EVENTS = [
+    "Matrícula dos calouros", "Rematrícula dos veteranos", "Início das aulas", "Término das aulas",
+    "Prazo para trancamento de matrícula", "Semana acadêmica", "Recesso escolar", "Feriado", "Conselho de classe",
+    "Entrega de notas", "Exames finais", "Reunião pedagógica", "Colação de grau", "Férias escolares",
+]
+
+
+def _target(url: str, params=None) -> str:
+    # Caminho + query string exatamente como o requests monta a URL (chave do manifest.json)
+    return requests.Request("GET", url, params=params).prepare().path_url
+
+
+def _person(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def _sentence(rng: random.Random, words: int = 18) -> str:
+    vocabulary = ("o campus barbacena informa aos estudantes servidores que as inscrições período prazo edital "
+                  "documentos conforme cronograma publicado coordenação curso setor atendimento presencial "
+                  "comunidade acadêmica resultado etapa avaliação projeto atividades horário local").split()
+    text = " ".join(rng.choice(vocabulary) for _ in range(words))
+    return text[0].upper() + text[1:] + "."
+
+
+def page(title: str, content: str, rng: random.Random) -> bytes:
+    """
+        Página completa do Portal Padrão: cabeçalho, barra do governo, menus laterais,
+        breadcrumbs, conteúdo (#content/#content-core), rodapé e scripts.
+    """
+    menu = "".join(
+        f'<li class="portletItem"><a href="{SITE_ORIGIN}/barbacena/menu/{section}/{item}" title="{topic.title()}">'
+        f'{topic.title()} {item}</a></li>'
+        for section, topic in enumerate(TOPICS) for item in range(1, 13)
+    )
+    footer = "".join(
+        f'<li><a href="{SITE_ORIGIN}/{campus}">Campus {campus.replace("-", " ").title()}</a></li>'
+        for campus in ("barbacena", "juiz-de-fora", "muriae", "rio-pomba", "santos-dumont", "sao-joao-del-rei", "manhuacu")
+    )
+    scripts = "".join(f'<script src="{SITE_ORIGIN}/++resource++portal/js/bundle-{n}.js"></script>' for n in range(12))
+    inline = "<script>" + "var portal_config = {" + ",".join(f'"k{n}": "{rng.random():.12f}"' for n in range(400)) + "};</script>"
+    return f"""<!DOCTYPE html>
+<html lang="pt-br"><head><meta charset="utf-8"><title>{title} — Instituto Federal do Sudeste de Minas Gerais</title>
+<link rel="stylesheet" href="{SITE_ORIGIN}/++theme++padrao/css/main.css">{scripts}{inline}
+<style>{"".join(f".portlet-{n}{{margin:{n}px;padding:{n % 7}px}}" for n in range(300))}</style></head>
+<body class="template-view portaltype-document site-barbacena">
+<div id="barra-brasil"><ul><li><a href="https://www.gov.br">gov.br</a></li><li><a href="https://www.gov.br/acessoainformacao">Acesso à informação</a></li></ul></div>
+<header id="header"><div id="portal-logo"><a href="{SITE_ORIGIN}/barbacena">IF Sudeste MG — Campus Barbacena</a></div>
+<nav id="portal-globalnav"><ul>{"".join(f'<li><a href="{url}">{name}</a></li>' for name, url in MAIN_PAGES.items())}</ul></nav>
+<form id="portal-searchbox" action="{SEARCH_URL}"><input name="SearchableText"></form></header>
+<div id="viewlet-above-content"><nav id="portal-breadcrumbs"><a href="{SITE_ORIGIN}">Início</a> › <a href="{SITE_ORIGIN}/barbacena">Campus Barbacena</a> › <span>{title}</span></nav></div>
+<div id="portal-column-one"><nav class="portlet portletNavigationTree"><ul>{menu}</ul></nav></div>
+<div id="portal-column-content"><div id="content"><h1 class="documentFirstHeading">{title}</h1>
+<div id="content-core">{content}</div></div></div>
+<footer id="portal-footer"><ul>{footer}</ul><p>Instituto Federal de Educação, Ciência e Tecnologia do Sudeste de Minas Gerais</p></footer>
+</body></html>""".encode("utf-8")
+
+
+def news_page(rng: random.Random) -> bytes:
+    items = []
+    day = date(2025, 3, 28)
+    for number in range(20):
+        topic = rng.choice(TOPICS)
+        slug = f"{topic.replace(' ', '-')}-{number}"
+        items.append(
+            f'<div class="tileItem"><span class="summary-view-icon">{day:%d/%m/%Y}</span>'
+            f'<h2 class="tileHeadline"><a href="{SITE_ORIGIN}/noticias/barbacena/{slug}">Campus Barbacena divulga {topic} {number}</a></h2>'
+            f'<p class="tileBody"><span class="description">{_sentence(rng, 30)}</span></p></div>'
+        )
+        day -= timedelta(days=rng.randint(1, 4))
+    return page("Notícias — Campus Barbacena", '<div class="tileItems">' + "".join(items) + "</div>", rng)
+
+
+def home_page(rng: random.Random) -> bytes:
+    banners = "".join(
+        f'<div class="banner"><a href="{SITE_ORIGIN}/barbacena/{topic.replace(" ", "-")}"><img src="/banner-{n}.png" alt="{topic}">'
+        f'<span>{topic.title()}</span></a><p>{_sentence(rng)}</p></div>'
+        for n, topic in enumerate(TOPICS)
+    )
+    return page("Campus Barbacena", banners, rng)
+
+
+def docentes_page(rng: random.Random) -> bytes:
+    rows = []
+    for number in range(90):
+        name = _person(rng)
+        login = ".".join(name.lower().split()[:2]).translate(str.maketrans("áâãéêíóôõúç", "aaaeeiooouc"))
+        rows.append(
+            f"<tr><td>{name}</td><td>{rng.choice(AREAS)}</td>"
+            f'<td><a href="mailto:{login}{number}@ifsudestemg.edu.br">{login}{number}@ifsudestemg.edu.br</a></td>'
+            f'<td><a href="http://lattes.cnpq.br/{rng.randrange(10**15, 10**16)}">Currículo Lattes</a></td></tr>'
+        )
+    table = ('<table class="listing"><thead><tr><th>Nome</th><th>Área</th><th>E-mail</th><th>Lattes</th></tr></thead>'
+             f'<tbody>{"".join(rows)}</tbody></table>')
+    return page("Corpo Docente", f"<p>{_sentence(rng, 25)}</p>{table}", rng)
+
+
+def calendar_page(rng: random.Random) -> bytes:
+    links = "".join(
+        f'<li><a href="{CALENDAR_DIR}/calendario-academico-{year}.pdf">Calendário Acadêmico {year}</a></li>'
+        f'<li><a href="{CALENDAR_DIR}/calendario-academico-{year}-pos-graduacao/at_download/file">'
+        f'Calendário da Pós-Graduação {year}</a></li>'
+        for year in (2025, 2024, 2023)
+    )
+    return page("Calendário Acadêmico", f"<p>{_sentence(rng)}</p><ul>{links}</ul>", rng)
+
+
+def search_page(query: str, rng: random.Random, results: int = 25) -> bytes:
+    entries = []
+    for number in range(results):
+        topic = rng.choice(TOPICS)
+        kind = rng.choice(["edital", "noticia", "pagina", "arquivo"])
+        entries.append(
+            f'<dt class="contenttype-{kind}"><a href="{SITE_ORIGIN}/barbacena/{kind}/{topic.replace(" ", "-")}-{number}">'
+            f'{query.capitalize()}: {topic} ({number})</a></dt><dd>{_sentence(rng, 35)}</dd>'
+        )
+    content = (f'<form name="searchform"><input name="SearchableText" value="{query}"></form>'
+               f'<h2>Resultados da busca: <strong id="search-results-number">{results * 4}</strong> itens</h2>'
+               f'<dl class="searchResults">{"".join(entries)}</dl>')
+    return page(f"Busca por {query}", content, rng)
+
+
+def calendar_pdf(year: int, rng: random.Random) -> bytes:
+    """
+        Calendário acadêmico com uma página por mês: tabela de dias letivos e os eventos do mês.
+    """
+    doc = fitz.open()
+    for month in range(1, 13):
+        pdf_page = doc.new_page()
+        lines = [f"INSTITUTO FEDERAL DO SUDESTE DE MINAS GERAIS - CAMPUS BARBACENA",
+                 f"CALENDÁRIO ACADÊMICO {year} - {MONTHS[month - 1].upper()}", ""]
+        day = date(year, month, 1)
+        while day.month == month:
+            lines.append(f"{day:%d/%m} {'Letivo' if day.weekday() < 5 else '-'}")
+            day += timedelta(days=1)
+        lines.append("")
+        for _ in range(rng.randint(4, 8)):
+            first = rng.randint(1, 20)
+            event = rng.choice(CALENDAR_EVENTS)
+            if rng.random() < 0.5:
+                lines.append(f"{first:02d}/{month:02d}/{year} a {first + rng.randint(1, 6):02d}/{month:02d}/{year} - {event}")
+            else:
+                lines.append(f"{first} de {MONTHS[month - 1]} - {event}")
+        y = 40
+        for line in lines:
+            pdf_page.insert_text((40, y), line, fontsize=9)
+            y += 11 if y < 800 else 0
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def build(store: FixtureStore, overwrite: bool = False) -> int:
+    """
+        Grava as páginas e PDFs usados pelos casos de benchmarks/suite.py.
+
+        Returns:
+            int: Quantidade de fixtures gravadas.
+    """
+    rng = random.Random(2025)
+    fixtures = {
+        _target(SITE_ORIGIN + "/"): lambda: home_page(rng),
+        _target(MAIN_PAGES["Página Inicial"]): lambda: home_page(rng),
+        _target(HIGHLIGHTS_URL): lambda: news_page(rng),
+        _target(MAIN_PAGES["Notícias"]): lambda: news_page(rng),
+        _target(MAIN_PAGES["Corpo Docente"]): lambda: docentes_page(rng),
+        _target(MAIN_PAGES["Calendário"]): lambda: calendar_page(rng),
+    }
+    for query, arguments in (("calendário acadêmico", {}), ("monitoria", {}),
+                             ("edital", {"item_types": ["Edital"], "sort_by": "Data (Mais Recente)"}),
+                             ("monitoria", {"item_types": ["Edital"], "date_range": "Sempre"})):
+        fixtures[_target(SEARCH_URL, search_params(query, **arguments))] = lambda query=query: search_page(query, rng)
+    for year in (2025, 2024, 2023):
+        fixtures[_target(f"{CALENDAR_DIR}/calendario-academico-{year}.pdf")] = lambda year=year: calendar_pdf(year, rng)
+        fixtures[_target(f"{CALENDAR_DIR}/calendario-academico-{year}-pos-graduacao/at_download/file")] = \
+            lambda year=year: calendar_pdf(year, rng)
+
+    written = 0
+    for target, render in fixtures.items():
+        if target in store.entries and not overwrite:
+            continue
+        body = render()
+        store.put(target, 200, PDF if body.startswith(b"%PDF") else HTML, body)
+        written += 1
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera as fixtures sintéticas do site para os benchmarks.")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Pasta das páginas gravadas.")
+    parser.add_argument("--overwrite", action="store_true", help="Substitui também as fixtures que já existem.")
+    args = parser.parse_args()
+    print(f"{build(FixtureStore(args.fixtures), args.overwrite)} fixture(s) gravada(s) em {args.fixtures}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import argparse
+import threading
+from urllib.parse import urljoin, urldefrag, urlparse
+from urllib.robotparser import RobotFileParser
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from bs4 import BeautifulSoup
+
+from agent_core import MAIN_PAGES
+from tools.http_client import fetch
+from tools.pdf_tools import pdf_text_from_bytes
+from tools.content_extractor import PARSER, DOCUMENT_LINK
+from tools.search_index import get_index, page_to_document
+from tools.link_graph import CRAWLER_DB
+from tools.docentes import on_page_changed as refresh_docentes
+from answer_cache import get_answer_cache
+
+logger = logging.getLogger(__name__)
+
+# Estado do crawler (fronteira, hashes e grafo de links) persistido em SQLite (CRAWLER_DB)
+MAX_WORKERS = int(os.getenv("CRAWLER_WORKERS", "4"))
+HOST_DELAY = float(os.getenv("CRAWLER_HOST_DELAY", "0.5"))            # Intervalo mínimo entre requisições ao mesmo host
+RECRAWL_AFTER = float(os.getenv("CRAWLER_RECRAWL_HOURS", "24")) * 3600  # Idade a partir da qual uma página é revisitada
+MAX_DEPTH = int(os.getenv("CRAWLER_MAX_DEPTH", "6"))
+
+# Somente a árvore do Campus Barbacena é visitada
+SCOPE = re.compile(
+    r'^https://www\.ifsudestemg\.edu\.br/'
+    r'(barbacena|noticias/barbacena|documentos-institucionais/unidades/barbacena)(/|$)'
+)
+# Visões do Plone que só duplicam conteúdo ou geram URLs infinitas
+SKIP = re.compile(r'@@|/\+\+|/image_|/view$|\?|/sendto_form|/RSS$|/login')
+
+
+def in_scope(url: str) -> bool:
+    return bool(SCOPE.match(url)) and not SKIP.search(url)
+
+
+class CrawlState:
+    """
+        Persistência do crawler: páginas conhecidas (com ETag, Last-Modified e hash do conteúdo),
+        a fronteira de URLs pendentes e o grafo de links entre páginas.
+    """
+    def __init__(self, db_file: str = CRAWLER_DB):
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                status INTEGER,
+                content_type TEXT,
+                title TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                depth INTEGER,
+                last_crawled REAL,
+                last_changed REAL
+            );
+            CREATE TABLE IF NOT EXISTS frontier (
+                url TEXT PRIMARY KEY,
+                depth INTEGER NOT NULL,
+                added_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS links (
+                src TEXT NOT NULL,
+                dst TEXT NOT NULL,
+                anchor TEXT,
+                PRIMARY KEY (src, dst)
+            );
+            CREATE INDEX IF NOT EXISTS idx_links_dst ON links (dst);
+        """)
+        self._conn.commit()
+
+    def enqueue(self, urls, depth: int):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO frontier (url, depth, added_at) VALUES (?, ?, ?)",
+                [(url, depth, time.time()) for url in urls]
+            )
+            self._conn.commit()
+
+    def enqueue_due(self, max_age: float) -> int:
+        """
+            Coloca na fronteira as páginas conhecidas cuja última visita é mais antiga que `max_age`.
+        """
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO frontier (url, depth, added_at) "
+                "SELECT url, COALESCE(depth, 0), ? FROM pages WHERE last_crawled IS NULL OR last_crawled < ?",
+                (time.time(), time.time() - max_age)
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def next_batch(self, size: int) -> list:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT url, depth FROM frontier ORDER BY depth, added_at LIMIT ?", (size,)
+            ).fetchall()
+
+    def done(self, url: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM frontier WHERE url = ?", (url,))
+            self._conn.commit()
+
+    def page(self, url: str):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT etag, last_modified, content_hash, last_crawled FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+
+    def is_fresh(self, url: str, max_age: float) -> bool:
+        row = self.page(url)
+        return bool(row and row[3] and time.time() - row[3] < max_age)
+
+    def save_page(self, url: str, depth: int, status: int, content_type: str = None, title: str = None,
+                  etag: str = None, last_modified: str = None, content_hash: str = None, changed: bool = False):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("""
+                INSERT INTO pages (url, status, content_type, title, etag, last_modified, content_hash, depth, last_crawled, last_changed)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    status = excluded.status,
+                    content_type = COALESCE(excluded.content_type, content_type),
+                    title = COALESCE(excluded.title, title),
+                    etag = COALESCE(excluded.etag, etag),
+                    last_modified = COALESCE(excluded.last_modified, last_modified),
+                    content_hash = COALESCE(excluded.content_hash, content_hash),
+                    depth = MIN(depth, excluded.depth),
+                    last_crawled = excluded.last_crawled,
+                    last_changed = COALESCE(excluded.last_changed, last_changed)
+            """, (url, status, content_type, title, etag, last_modified, content_hash, depth, now, now if changed else None))
+            self._conn.commit()
+
+    def save_links(self, src: str, links: dict):
+        with self._lock:
+            self._conn.execute("DELETE FROM links WHERE src = ?", (src,))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO links (src, dst, anchor) VALUES (?, ?, ?)",
+                [(src, dst, anchor) for dst, anchor in links.items()]
+            )
+            self._conn.commit()
+
+    def anchor_for(self, url: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT anchor FROM links WHERE dst = ? AND anchor IS NOT NULL AND anchor != '' LIMIT 1", (url,)
+            ).fetchone()
+            return row[0] if row else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pages": self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0],
+                "frontier": self._conn.execute("SELECT COUNT(*) FROM frontier").fetchone()[0],
+                "links": self._conn.execute("SELECT COUNT(*) FROM links").fetchone()[0],
+            }
+
+
+class HostThrottle:
+    """
+        Garante um intervalo mínimo entre requisições ao mesmo host (politeness).
+    """
+    def __init__(self, delay: float = HOST_DELAY):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._next = {}
+
+    def wait(self, url: str):
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.delay
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class Crawler:
+    """
+        Crawler incremental da árvore /barbacena. Cada página é pedida com If-None-Match /
+        If-Modified-Since e só é reprocessada (links + índice de busca) quando o hash do conteúdo muda.
+    """
+    def __init__(self, state: CrawlState = None, max_workers: int = MAX_WORKERS, host_delay: float = HOST_DELAY,
+                 max_depth: int = MAX_DEPTH, recrawl_after: float = RECRAWL_AFTER, index=None):
+        self.state = state or CrawlState()
+        self.max_workers = max_workers
+        self.max_depth = max_depth
+        self.recrawl_after = recrawl_after
+        self.throttle = HostThrottle(host_delay)
+        self.index = index or get_index()
+        self.listeners = []  # Funções chamadas com a URL de cada página cujo conteúdo mudou
+        self._robots = {}
+        self._robots_lock = threading.Lock()
+
+    def _allowed(self, url: str) -> bool:
+        parsed = urlparse(url)
+        with self._robots_lock:
+            if parsed.netloc not in self._robots:
+                robots = RobotFileParser()
+                try:
+                    response = fetch(f"{parsed.scheme}://{parsed.netloc}/robots.txt", timeout=10)
+                    robots.parse(response.text.splitlines() if response.ok else [])
+                except Exception:
+                    robots.parse([])
+                self._robots[parsed.netloc] = robots
+            return self._robots[parsed.netloc].can_fetch("*", url)
+
+    def _process(self, url: str, depth: int) -> str:
+        """
+            Visita uma URL e retorna o resultado: 'not_modified', 'unchanged', 'changed', 'new',
+            'skipped' ou 'error'.
+        """
+        if not self._allowed(url):
+            return "skipped"
+
+        known = self.state.page(url)
+        headers = {}
+        if known:
+            if known[0]:
+                headers["If-None-Match"] = known[0]
+            if known[1]:
+                headers["If-Modified-Since"] = known[1]
+
+        self.throttle.wait(url)
+        response = fetch(url, headers=headers, timeout=30)
+
+        if response.status_code == 304:
+            self.state.save_page(url, depth, 304)
+            return "not_modified"
+        if not response.ok:
+            self.state.save_page(url, depth, response.status_code)
+            return "error"
+
+        content_type = response.headers.get("Content-Type", "")
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+
+        if known and known[2] == content_hash:
+            self.state.save_page(url, depth, response.status_code, etag=etag, last_modified=last_modified)
+            return "unchanged"
+
+        title = None
+        if "pdf" in content_type or DOCUMENT_LINK.search(url):
+            text = pdf_text_from_bytes(response.content)
+            title = self.state.anchor_for(url) or url.rsplit('/', 1)[-1]
+            self.index.add(url, title, text, item_type='File')
+        elif "html" in content_type:
+            document = page_to_document(response.text, url)
+            title = document["title"]
+            self.index.add(url, **document)
+            self._follow_links(url, response.text, depth)
+
+        self.state.save_page(url, depth, response.status_code, content_type=content_type, title=title,
+                             etag=etag, last_modified=last_modified, content_hash=content_hash, changed=True)
+
+        for listener in self.listeners:
+            listener(url)
+        return "changed" if known else "new"
+
+    def _follow_links(self, url: str, html: str, depth: int):
+        soup = BeautifulSoup(html, PARSER)
+
+        links = {}
+        for a in soup.find_all('a', href=True):
+            dst = urldefrag(urljoin(url, a['href']))[0].rstrip('/')
+            if dst != url and in_scope(dst):
+                anchor = a.get_text(" ", strip=True)
+                if anchor or dst not in links:
+                    links[dst] = anchor or links.get(dst)
+
+        self.state.save_links(url, links)
+
+        # Só enfileira links ainda não visitados recentemente
+        if depth < self.max_depth:
+            pending = [dst for dst in links if not self.state.is_fresh(dst, self.recrawl_after)]
+            self.state.enqueue(pending, depth + 1)
+
+    def run(self, max_pages: int = None, seeds=None) -> dict:
+        """
+            Executa uma passada do crawler. Se a fronteira estiver vazia, ela é preenchida
+            com as sementes e com as páginas conhecidas que já passaram do prazo de revisita.
+
+            Args:
+                max_pages (int): Limite de páginas visitadas nesta passada (None = sem limite).
+                seeds (list): URLs iniciais (padrão: atalhos do agente em MAIN_PAGES).
+
+            Returns:
+                dict: Contagem de páginas por resultado.
+        """
+        if not self.state.next_batch(1):
+            seeds = [url for url in (seeds or MAIN_PAGES.values()) if not self.state.is_fresh(url, self.recrawl_after)]
+            self.state.enqueue(seeds, 0)
+            self.state.enqueue_due(self.recrawl_after)
+
+        summary = {"new": 0, "changed": 0, "unchanged": 0, "not_modified": 0, "skipped": 0, "error": 0}
+        visited = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while max_pages is None or visited < max_pages:
+                size = self.max_workers if max_pages is None else min(self.max_workers, max_pages - visited)
+                batch = self.state.next_batch(size)
+                if not batch:
+                    break
+
+                futures = {executor.submit(self._process, url, depth): url for url, depth in batch}
+                for future in as_completed(futures):
+                    url = futures[future]
+                    try:
+                        summary[future.result()] += 1
+                    except Exception as e:
+                        logger.warning("Falha ao visitar %s: %s", url, e)
+                        summary["error"] += 1
+                    # A URL só sai da fronteira depois de processada, então uma passada
+                    # interrompida continua de onde parou
+                    self.state.done(url)
+                    visited += 1
+
+        return summary
+
+
+def create_crawler(**options) -> Crawler:
+    """
+        Cria o crawler com os listeners das páginas alteradas, usado pelo backend e pela linha
+        de comando (os argumentos são os do Crawler).
+    """
+    crawler = Crawler(**options)
+    crawler.listeners.append(refresh_docentes)  # Relê o corpo docente quando a página muda
+    crawler.listeners.append(get_answer_cache().invalidate_url)  # Descarta respostas baseadas na página
+    return crawler
+
+
+def start_background_crawler(interval_minutes: float, max_pages: int = None) -> threading.Thread:
+    """
+        Executa o crawler periodicamente em uma thread daemon dentro do backend.
+    """
+    def loop():
+        crawler = create_crawler()
+        while True:
+            try:
+                summary = crawler.run(max_pages=max_pages)
+                logger.info("Crawler: %s", summary)
+            except Exception as e:
+                logger.exception("Erro no crawler: %s", e)
+            time.sleep(interval_minutes * 60)
+
+    thread = threading.Thread(target=loop, name="crawler", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Crawler incremental do site do Campus Barbacena.")
+    parser.add_argument("--max-pages", type=int, default=None, help="Limite de páginas nesta passada.")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Requisições simultâneas.")
+    parser.add_argument("--delay", type=float, default=HOST_DELAY, help="Intervalo mínimo entre requisições ao mesmo host (s).")
+    parser.add_argument("--full", action="store_true", help="Revisita todas as páginas conhecidas, ignorando o prazo de revisita.")
+    args = parser.parse_args()
+
+    crawler = create_crawler(max_workers=args.workers, host_delay=args.delay, recrawl_after=0 if args.full else RECRAWL_AFTER)
+    started = time.time()
+    summary = crawler.run(max_pages=args.max_pages)
+    print(f"Resultado: {summary}")
+    print(f"Estado: {crawler.state.stats()} ({time.time() - started:.1f}s)")
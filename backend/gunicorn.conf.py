@@ -0,0 +1,46 @@
+# Configuração do gunicorn para produção: gunicorn -c gunicorn.conf.py wsgi:app
+#
+# Cada worker é um processo com seus próprios agentes, pool de navegadores e conexões;
+# as threads de cada worker atendem as requisições (turnos de chat passam a maior parte do
+# tempo esperando o LLM e o site, então threads rendem bem). MAX_IN_FLIGHT_CHATS deve ficar
+# abaixo de WEB_THREADS para que sobrem threads para responder 503, sessões e arquivos estáticos.
+# Com ASYNC_AGENT=1 (padrão) os turnos rodam no event loop do worker (async_runtime.py) e as
+# threads só esperam a resposta: os padrões sobem para 32 turnos (MAX_IN_FLIGHT_CHATS, em
+# main.py) e 40 threads por worker. Sem ele, 4 turnos e 8 threads.
+import os
+from async_runtime import ASYNC_AGENT
+
+bind = os.getenv("WEB_BIND", "0.0.0.0:5050")
+workers = int(os.getenv("WEB_WORKERS", "2"))
+threads = int(os.getenv("WEB_THREADS", "40" if ASYNC_AGENT else "8"))
+worker_class = "gthread"
+
+# O gthread aceita conexões além das threads e as enfileira internamente, sem que o Flask
+# as veja; limitando ao número de threads, o excedente vai para outros workers (ou recebe 503)
+worker_connections = int(os.getenv("WEB_WORKER_CONNECTIONS", str(threads)))
+
+# Um turno com Selenium + PDF pode passar de um minuto; streams SSE ficam abertos o turno todo
+timeout = int(os.getenv("WEB_TIMEOUT", "180"))
+graceful_timeout = 30
+keepalive = 5
+
+# Recicla workers periodicamente para conter vazamentos de memória (0 = desativado)
+max_requests = int(os.getenv("WEB_MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+# Sem preload: navegadores, conexões SQLite e sockets não podem ser herdados pelo fork
+preload_app = False
+
+accesslog = os.getenv("WEB_ACCESS_LOG", "-")  # "-" = stdout
+
+# Logs do backend (crawler, manutenção, filas em segundo plano) vão para o log de erros do
+# gunicorn (stderr), no mesmo formato e com o nível de cada mensagem
+loglevel = os.getenv("WEB_LOG_LEVEL", "info")
+logconfig_dict = {
+    "root": {"level": loglevel.upper(), "handlers": ["error_console"]},
+    # Os loggers do gunicorn já têm os próprios handlers; sem propagar, não saem em dobro
+    "loggers": {
+        "gunicorn.error": {"level": loglevel.upper(), "handlers": ["error_console"], "propagate": False},
+        "gunicorn.access": {"level": "INFO", "handlers": ["console"], "propagate": False},
+    },
+}
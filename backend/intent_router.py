@@ -0,0 +1,263 @@
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Callable
+
+from metrics import INTENT_ROUTES, INTENT_SAVED, LLM_DURATION
+from tracing import span
+from tools.text_utils import fold_accents, tokenize, stem
+from tools.docentes import get_directory
+
+# Roteador de intenções: reconhece localmente pedidos que correspondem a uma única ferramenta
+# ("últimas notícias", "cardápio de amanhã") e evita a ida ao modelo só para escolher a ferramenta.
+#   - direct: a saída da ferramenta já é a resposta (o modelo não é chamado)
+#   - assist: a ferramenta é executada antes e o modelo recebe o resultado para redigir a resposta
+#   - off: desligado
+INTENT_ROUTER = os.getenv("INTENT_ROUTER", "direct")
+MIN_CONFIDENCE = float(os.getenv("INTENT_ROUTER_MIN_CONFIDENCE", "0.75"))
+ROUND_TRIP_SECONDS = float(os.getenv("INTENT_ROUTER_ROUND_TRIP_SECONDS", "1.5"))  # Estimativa até haver chamadas medidas
+
+# Palavras que não mudam o pedido ("quero saber", "do campus", "por favor")
+GENERIC = {
+    'quero', 'queria', 'gostaria', 'saber', 'ver', 'mostrar', 'mostre', 'mostra', 'informar', 'informe', 'diga',
+    'dizer', 'listar', 'liste', 'lista', 'poderia', 'pode', 'consegue', 'existe', 'existem', 'algum', 'alguma',
+    'atualmente', 'agora', 'atual', 'todos', 'todas', 'informacao', 'informacoes', 'favor', 'obrigado', 'ola',
+    'oi', 'bom', 'boa', 'dia', 'campus', 'barbacena', 'instituto', 'federal', 'ifsudeste', 'ifsudestemg', 'if',
+}
+
+WEEKDAYS = {'segunda': 0, 'terca': 1, 'quarta': 2, 'quinta': 3, 'sexta': 4, 'sabado': 5, 'domingo': 6}
+_DATE = re.compile(r'\b\d{1,2}/\d{1,2}(?:/\d{2,4})?\b')
+_WEEKDAY = re.compile(r'\b(' + '|'.join(WEEKDAYS) + r')(?:[\s-]feira)?\b')
+
+# Assuntos do calendário acadêmico e o termo usado para filtrar os eventos
+CALENDAR_TOPICS = {
+    'ferias': 'férias', 'feriado': 'feriado', 'feriados': 'feriado', 'recesso': 'recesso',
+    'matricula': 'matrícula', 'matriculas': 'matrícula', 'rematricula': 'rematrícula', 'aulas': 'aulas',
+    'semestre': 'semestre', 'provas': 'prova', 'exames': 'exame', 'formatura': 'formatura',
+}
+
+
+@dataclass
+class Route:
+    """
+        Decisão do roteador: ferramenta, argumentos e a confiança (fração da pergunta explicada pela regra).
+    """
+    intent: str
+    tool: str
+    args: dict
+    confidence: float
+    direct: bool
+    title: str
+
+
+@dataclass
+class Intent:
+    """
+        Regra de uma intenção: o gatilho (regex sobre o texto sem acentos) e o vocabulário
+        que a pergunta pode usar. `slots` extrai os argumentos da ferramenta e as palavras
+        que eles explicam; se retornar None, a regra não se aplica.
+    """
+    name: str
+    tool: str
+    trigger: re.Pattern
+    vocabulary: set
+    title: str
+    direct: bool = False
+    slots: Callable = None
+    stems: set = field(default_factory=set, init=False)
+
+    def __post_init__(self):
+        self.stems = {stem(word) for word in self.vocabulary}
+
+
+def _day(folded: str, today: date):
+    """
+        Dia citado na pergunta ('hoje', 'amanhã', '20/10', 'sexta-feira'), no formato aceito
+        pelas ferramentas, e as palavras que o indicam.
+    """
+    if re.search(r'\bamanha\b', folded):
+        return "amanhã", ["amanha"]
+    if re.search(r'\bhoje\b', folded):
+        return "hoje", ["hoje"]
+    match = _DATE.search(folded)
+    if match:
+        return match.group(0), [match.group(0)]
+    match = _WEEKDAY.search(folded)
+    if match:
+        ahead = (WEEKDAYS[match.group(1)] - today.weekday()) % 7
+        return (today + timedelta(days=ahead)).strftime('%d/%m/%Y'), [match.group(1), 'feira', 'proxima', 'nesta', 'essa']
+    return None, []
+
+
+def _cardapio_slots(prompt: str, folded: str, today: date, pages: dict):
+    day, words = _day(folded, today)
+    return ({"day": day} if day else {}), words
+
+
+def _calendar_slots(prompt: str, folded: str, today: date, pages: dict):
+    args, words = {}, []
+    for word in tokenize(prompt):
+        if word in CALENDAR_TOPICS:
+            args.setdefault("query", CALENDAR_TOPICS[word])
+            words.append(word)
+
+    day, day_words = _day(folded, today)
+    if day:
+        args["start"] = args["end"] = day
+        words += day_words
+    elif re.search(r'\b(nesta|desta|esta|essa|dessa|proxima)\s+semana\b', folded):
+        start = today if 'proxima' not in folded else today + timedelta(days=7 - today.weekday())
+        args["start"], args["end"] = start.strftime('%d/%m/%Y'), (start + timedelta(days=6)).strftime('%d/%m/%Y')
+        words += ['semana', 'nesta', 'desta', 'esta', 'essa', 'dessa', 'proxima']
+    return args, words
+
+
+_DOCENTE_NAME = re.compile(
+    r'\b(?:[Pp]rofessor[a]?|[Pp]rof\.?|[Dd]ocente)\s+((?:[A-ZÀ-Ý][\wà-ÿ]+)(?:\s+(?:d[aeo]s?\s+)?[A-ZÀ-Ý][\wà-ÿ]+)*)'
+)
+_DOCENTE_AREA = re.compile(r'\b(?:professor(?:a|es|as)?|docentes?)\s+(?:da\s+area\s+)?(?:de|da|do|em)\s+([a-z ]+)')
+
+
+def _docentes_slots(prompt: str, folded: str, today: date, pages: dict):
+    args, words = {}, []
+    match = _DOCENTE_NAME.search(prompt)
+    if match:
+        args["name"] = match.group(1)
+        words += tokenize(match.group(1))
+
+    match = _DOCENTE_AREA.search(folded)
+    if match and "name" not in args:
+        # Só áreas/departamentos que existem no diretório: 'professores do campus hoje' não é
+        # uma área e segue para o modelo
+        area = [word for word in tokenize(match.group(1)) if word not in GENERIC]
+        if 1 <= len(area) <= 3 and get_directory().search(area=" ".join(area), limit=1):
+            args["area"] = " ".join(area)
+            words += area
+    return (args, words) if args else None
+
+
+def _fale_conosco_slots(prompt: str, folded: str, today: date, pages: dict):
+    url = pages.get("Fale Conosco")
+    return ({"url": url}, []) if url else None
+
+
+INTENTS = [
+    Intent(
+        name="noticias", tool="get_site_highlights", title="Notícias do Campus",
+        trigger=re.compile(r'\b(noticias?|novidades?|destaques?)\b'),
+        vocabulary={'noticia', 'noticias', 'novidade', 'novidades', 'destaque', 'destaques', 'ultima', 'ultimas',
+                    'recente', 'recentes', 'principal', 'principais', 'acontecendo', 'site', 'publicada', 'publicadas'},
+    ),
+    Intent(
+        name="cardapio", tool="get_cardapio", title="Cardápio do Refeitório", direct=True, slots=_cardapio_slots,
+        trigger=re.compile(r'\b(cardapio|almoco|jantar|refeitorio|restaurante|bandejao|cafe da manha)\b'),
+        vocabulary={'cardapio', 'almoco', 'almocar', 'jantar', 'cafe', 'manha', 'lanche', 'refeitorio', 'restaurante',
+                    'bandejao', 'comida', 'comer', 'refeicao', 'refeicoes', 'servido', 'servida', 'prato', 'pratos',
+                    'estudantil'},
+    ),
+    Intent(
+        name="calendario", tool="calendar_events", title="Calendário Acadêmico", slots=_calendar_slots,
+        trigger=re.compile(r'\b(calendario|ferias|feriados?|recesso|rematricula|(inicio|comeco|volta|fim|termino) das aulas'
+                            r'|(comecam|comeca|voltam|volta|terminam|termina) as aulas)\b'),
+        vocabulary={'calendario', 'academico', 'quando', 'comeca', 'comecam', 'comeco', 'inicio', 'termina', 'terminam',
+                    'fim', 'termino', 'volta', 'voltam', 'proximo', 'proximos', 'evento', 'eventos', 'data', 'datas',
+                    'periodo', 'letivo', 'previsto', 'previstas', 'vai', 'vao'},
+    ),
+    Intent(
+        name="docentes", tool="find_docentes", title="Corpo Docente", slots=_docentes_slots,
+        trigger=re.compile(r'\b(professor(a|es|as)?|prof|docentes?)\b'),
+        vocabulary={'professor', 'professora', 'professores', 'professoras', 'prof', 'docente', 'docentes', 'email',
+                    'mail', 'contato', 'lattes', 'curriculo', 'area', 'departamento', 'leciona', 'lecionam', 'aula',
+                    'aulas', 'quem', 'sao'},
+    ),
+    Intent(
+        name="fale_conosco", tool="open_link", title="Contato do Campus", slots=_fale_conosco_slots,
+        trigger=re.compile(r'\b(fale conosco|telefone|endereco|contato|e-?mail)\b'),
+        vocabulary={'fale', 'conosco', 'telefone', 'telefones', 'endereco', 'contato', 'contatos', 'email', 'mail',
+                    'falar', 'ligar', 'numero', 'secretaria', 'atendimento'},
+    ),
+]
+
+
+class IntentRouter:
+    """
+        Escolhe, sem chamar o modelo, a ferramenta de perguntas que correspondem a uma
+        única intenção. Cada regra que dispara recebe uma confiança igual à fração das
+        palavras da pergunta que ela explica (vocabulário da intenção, argumentos extraídos
+        e palavras genéricas); perguntas com assuntos a mais ficam com o agente completo.
+    """
+    def __init__(self, pages: dict = None, intents: list = None, min_confidence: float = MIN_CONFIDENCE):
+        self.pages = pages or {}
+        self.intents = intents or INTENTS
+        self.min_confidence = min_confidence
+        self._generic = {stem(word) for word in GENERIC}
+
+    def classify(self, prompt: str, today: date = None):
+        """
+            Melhor intenção para a pergunta, mesmo com confiança baixa.
+
+            Returns:
+                Route | None: None se nenhuma regra disparar.
+        """
+        today = today or date.today()
+        folded = fold_accents(prompt)
+        words = [stem(word) for word in tokenize(prompt)]
+        if not words:
+            return None
+
+        best = None
+        for intent in self.intents:
+            if not intent.trigger.search(folded):
+                continue
+            args, slot_words = {}, []
+            if intent.slots:
+                extracted = intent.slots(prompt, folded, today, self.pages)
+                if extracted is None:
+                    continue
+                args, slot_words = extracted
+
+            known = intent.stems | self._generic | {stem(word) for word in tokenize(" ".join(slot_words))}
+            confidence = sum(1 for word in words if word in known) / len(words)
+            if best is None or confidence > best.confidence:
+                best = Route(intent.name, intent.tool, args, round(confidence, 2), intent.direct, intent.title)
+        return best
+
+    def route(self, prompt: str, today: date = None):
+        """
+            Intenção da pergunta se a confiança for suficiente.
+
+            Returns:
+                Route | None: None quando a pergunta deve seguir para o agente completo.
+        """
+        if INTENT_ROUTER == "off":
+            return None
+        with span("intent_router") as current:
+            route = self.classify(prompt, today)
+            if current and route:
+                current.set(intent=route.intent, confidence=route.confidence)
+        if route is None or route.confidence < self.min_confidence:
+            record_route(route, "fallback")
+            return None
+        route.direct = route.direct and INTENT_ROUTER == "direct"
+        return route
+
+
+def record_route(route, outcome: str):
+    """
+        Conta a decisão do roteador nas métricas. Cada resposta direta evita duas chamadas ao
+        modelo (escolher a ferramenta e redigir a resposta) e cada assistida evita uma; o tempo
+        economizado é estimado pela duração média das chamadas do agente.
+    """
+    intent = route.intent if route else "none"
+    INTENT_ROUTES.inc(intent=intent, outcome=outcome)
+    saved_calls = {"direct": 2, "assist": 1}.get(outcome, 0)
+    if saved_calls:
+        INTENT_SAVED.inc(saved_calls * LLM_DURATION.mean(default=ROUND_TRIP_SECONDS, role="agent"), intent=intent)
+
+
+def is_useful(result) -> bool:
+    """
+        Indica se a saída da ferramenta pode ser entregue como resposta (não é erro nem 'nada encontrado').
+    """
+    return isinstance(result, str) and bool(result) and not result.startswith(("Erro", "Nenhum", "Data inválida"))
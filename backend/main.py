@@ -1,19 +1,154 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Blueprint, Flask, Response, current_app, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
-from agent_core import ChatAgent
-from agno.db.base import SessionType
+from agent_core import ChatAgent, AGENT_DB
+from async_runtime import ASYNC_AGENT, run_async, iterate_async
+from crawler import start_background_crawler
+from session_store import create_session_db, start_session_maintenance
+from session_history import list_sessions, get_conversation, page_size, InvalidCursor, SESSIONS_PAGE_SIZE, MESSAGES_PAGE_SIZE
+from tools.browser_pool import get_pool, POOL_WARM
+from metrics import render as render_metrics, CHAT_REQUESTS, CHAT_DURATION, CHATS_IN_FLIGHT
+from tracing import get_store as get_trace_store, format_flame
+from startup import phase
+import hmac
+import logging
+import threading
+import time
 import uuid
+import os
+import json
 
-app = Flask(__name__, static_folder='../frontend', static_url_path='')
-CORS(app)
+# Turnos de chat simultâneos por processo; acima disso o servidor responde 503 na hora
+# em vez de enfileirar (ver WEB_THREADS em gunicorn.conf.py). Com ASYNC_AGENT os turnos
+# esperam no event loop e a thread da requisição só aguarda, então o limite é bem maior
+MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT_CHATS", "32" if ASYNC_AGENT else "4"))
+RETRY_AFTER = int(os.getenv("BUSY_RETRY_AFTER", "5"))  # Segundos sugeridos ao cliente no 503
 
-chat_agent = ChatAgent()
+# Crawler periódico do site (desativado por padrão; ver CRAWLER_INTERVAL_MINUTES no .env)
+CRAWLER_INTERVAL = float(os.getenv("CRAWLER_INTERVAL_MINUTES", "0"))
+JOBS_LOCK_FILE = "tmp/background_jobs.lock"
 
-@app.route('/', methods=['GET'])
+# Os rastros têm as perguntas e os session_ids de todos os usuários: /traces/* só responde
+# com este token (cabeçalho "Authorization: Bearer <token>"); vazio = rotas desligadas
+# (use o CLI: python tracing.py)
+TRACES_ADMIN_TOKEN = os.getenv("TRACES_ADMIN_TOKEN", "")
+
+bp = Blueprint('ifinder', __name__)
+
+
+class ThreadLocalAgents:
+    """
+        Mantém um ChatAgent por thread do servidor. O agno guarda estado da execução
+        na instância do Agent, então cada thread usa a sua; todas gravam no mesmo banco de sessões.
+    """
+    def __init__(self, factory=ChatAgent, db_file: str = AGENT_DB):
+        self._factory = factory
+        self._local = threading.local()
+        self.db = create_session_db(db_file)
+
+    def get(self):
+        agent = getattr(self._local, 'agent', None)
+        if agent is None:
+            with phase("agent_init"):
+                agent = self._local.agent = self._factory(db=self.db)
+        return agent
+
+
+def _agent():
+    return current_app.extensions['chat_agents'].get()
+
+
+def _run_turn(agent, prompt: str, user_id: str, session_id: str) -> str:
+    # Com ASYNC_AGENT o turno roda no event loop compartilhado (async_runtime.py) e a thread
+    # da requisição só espera a resposta
+    if ASYNC_AGENT and hasattr(agent, 'aprocess_message'):
+        return run_async(agent.aprocess_message(prompt, user_id, session_id))
+    return agent.process_message(prompt, user_id, session_id)
+
+
+def _stream_turn(agent, prompt: str, user_id: str, session_id: str):
+    if ASYNC_AGENT and hasattr(agent, 'aprocess_message_stream'):
+        return iterate_async(agent.aprocess_message_stream(prompt, user_id, session_id))
+    return agent.process_message_stream(prompt, user_id, session_id)
+
+
+def _traces_forbidden():
+    # 404 com as rotas desligadas, para não anunciar que elas existem
+    if not TRACES_ADMIN_TOKEN:
+        return jsonify({"error": "Não encontrado."}), 404
+    header = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(header.encode(), f"Bearer {TRACES_ADMIN_TOKEN}".encode()):
+        return jsonify({"error": "Não autorizado."}), 401
+    return None
+
+
+def _busy(endpoint: str):
+    CHAT_REQUESTS.inc(endpoint=endpoint, outcome="rejected")
+    response = jsonify({"error": "Servidor ocupado. Tente novamente em alguns segundos."})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(RETRY_AFTER)
+    return response
+
+
+def _claim_background_jobs() -> bool:
+    """
+        Garante que só um processo por máquina rode as tarefas de fundo (crawler),
+        mesmo com vários workers do gunicorn. O lock é liberado quando o processo termina.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return True  # Windows: apenas o servidor de desenvolvimento, com um único processo
+
+    os.makedirs(os.path.dirname(JOBS_LOCK_FILE), exist_ok=True)
+    handle = open(JOBS_LOCK_FILE, 'w')
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return False
+    _claim_background_jobs.handle = handle  # Mantém o arquivo (e o lock) aberto
+    return True
+
+
+def create_app(agent_factory=ChatAgent, max_in_flight: int = MAX_IN_FLIGHT, start_jobs: bool = True) -> Flask:
+    """
+        Cria a aplicação Flask. Chamada uma vez por processo (cada worker do gunicorn tem
+        seus próprios agentes, pool de navegadores e conexões HTTP).
+
+        Args:
+            agent_factory: Classe/função que recebe `db=` e devolve um objeto com a interface do ChatAgent.
+            max_in_flight (int): Limite de turnos de chat simultâneos neste processo.
+            start_jobs (bool): Se True, inicia o crawler periódico e o aquecimento do pool de navegadores.
+
+        Returns:
+            Flask: A aplicação configurada.
+    """
+    with phase("create_app"):
+        app = Flask(__name__, static_folder='../frontend', static_url_path='')
+        CORS(app)
+
+        app.extensions['chat_agents'] = ThreadLocalAgents(agent_factory)
+        app.extensions['chat_slots'] = threading.BoundedSemaphore(max_in_flight)
+        app.register_blueprint(bp)
+
+    if start_jobs:
+        # Inicia navegadores do pool em segundo plano para que o primeiro
+        # open_link_in_selenium não pague o custo de abrir o navegador
+        if POOL_WARM > 0:
+            threading.Thread(target=get_pool().warm, daemon=True).start()
+
+        if _claim_background_jobs():
+            if CRAWLER_INTERVAL > 0:
+                start_background_crawler(CRAWLER_INTERVAL)
+            start_session_maintenance(app.extensions['chat_agents'].db)
+
+    return app
+
+@bp.route('/', methods=['GET'])
 def home():
     return send_file('../frontend/index.html')
 
-@app.route('/chat', methods=['POST'])
+@bp.route('/chat', methods=['POST'])
 def handle_chat():
     
     data = request.get_json()
@@ -27,8 +162,16 @@ def handle_chat():
     if not session_id or not user_id:
         return jsonify({"error": "ID de usuário e/ou sessão não fornecido."}), 400
     
+    slots = current_app.extensions['chat_slots']
+    if not slots.acquire(blocking=False):
+        return _busy("chat")
+
+    CHATS_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    outcome = "error"
     try:
-        agent_response = chat_agent.process_message(user_prompt, user_id, session_id)
+        agent_response = _run_turn(_agent(), user_prompt, user_id, session_id)
+        outcome = "ok"
 
         return jsonify({
             "response": agent_response
@@ -37,14 +180,125 @@ def handle_chat():
     except Exception as e:
         return jsonify({"error": f"Erro interno do Agente: {str(e)}"}), 500
 
-@app.route('/auth/generate', methods=['GET'])
+    finally:
+        slots.release()
+        CHATS_IN_FLIGHT.dec()
+        CHAT_DURATION.observe(time.perf_counter() - started, endpoint="chat")
+        CHAT_REQUESTS.inc(endpoint="chat", outcome=outcome)
+
+@bp.route('/chat/stream', methods=['POST'])
+def handle_chat_stream():
+    """ Versão em streaming do /chat (Server-Sent Events).
+
+        Envia um evento a cada ferramenta iniciada/finalizada, os trechos da resposta
+        conforme são gerados e um evento final com as fontes e os tempos.
+    """
+    data = request.get_json()
+    user_prompt = data.get('prompt')
+    session_id = data.get("session_id")
+    user_id = data.get("user_id")
+
+    if not user_prompt:
+        return jsonify({"error": "Mensagem não fornecida."}), 400
+    
+    if not session_id or not user_id:
+        return jsonify({"error": "ID de usuário e/ou sessão não fornecido."}), 400
+
+    slots = current_app.extensions['chat_slots']
+    if not slots.acquire(blocking=False):
+        return _busy("chat_stream")
+
+    try:
+        chat_agent = _agent()
+    except Exception as e:
+        # Sem isso o slot nunca seria devolvido e o processo passaria a responder só 503
+        slots.release()
+        CHAT_REQUESTS.inc(endpoint="chat_stream", outcome="error")
+        return jsonify({"error": f"Erro interno do Agente: {str(e)}"}), 500
+
+    CHATS_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    outcome = "ok"
+
+    def sse(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+    def generate():
+        nonlocal outcome
+        try:
+            for event, payload in _stream_turn(chat_agent, user_prompt, user_id, session_id):
+                if event == "error":
+                    outcome = "error"
+                yield sse(event, payload)
+        except Exception as e:
+            outcome = "error"
+            yield sse("error", {"error": f"Erro interno do Agente: {str(e)}"})
+
+    def finish():
+        slots.release()
+        CHATS_IN_FLIGHT.dec()
+        CHAT_DURATION.observe(time.perf_counter() - started, endpoint="chat_stream")
+        CHAT_REQUESTS.inc(endpoint="chat_stream", outcome=outcome)
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # O slot só é devolvido quando o stream termina (ou o cliente desconecta)
+    response.call_on_close(finish)
+    return response
+
+@bp.route('/metrics', methods=['GET'])
+def metrics():
+    """ Métricas do processo (ferramentas, LLM, HTTP, cache e chat) no formato do Prometheus.
+    """
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+@bp.route('/traces/slowest', methods=['GET'])
+def slowest_traces():
+    """ Lista os turnos de chat mais lentos gravados nos rastros.
+
+        Parâmetros opcionais: `limit` (padrão 20) e `hours` (apenas as últimas N horas).
+        Exige TRACES_ADMIN_TOKEN.
+    """
+    forbidden = _traces_forbidden()
+    if forbidden:
+        return forbidden
+
+    try:
+        limit = page_size(request.args.get("limit"), 20)
+        hours = float(request.args["hours"]) if request.args.get("hours") else None
+    except ValueError:
+        return jsonify({"error": "Parâmetro `hours` inválido."}), 400
+
+    return jsonify({"traces": get_trace_store().slowest(limit, hours)}), 200
+
+@bp.route('/traces/session/<session_id>', methods=['GET'])
+def session_traces(session_id):
+    """ Detalha os turnos de uma sessão como árvores de spans (LLM, ferramentas, HTTP, PDF, navegador).
+
+        Com `format=text` devolve o detalhamento em texto, com barras proporcionais à duração.
+        Exige TRACES_ADMIN_TOKEN.
+    """
+    forbidden = _traces_forbidden()
+    if forbidden:
+        return forbidden
+
+    traces = get_trace_store().session(session_id)
+    if request.args.get("format") == "text":
+        blocks = [f"{trace['prompt'] or ''}\n" + "\n".join(format_flame(trace["spans"])) for trace in traces]
+        return Response("\n\n".join(blocks) + "\n", mimetype='text/plain; charset=utf-8')
+    return jsonify({"session_id": session_id, "traces": traces}), 200
+
+@bp.route('/auth/generate', methods=['GET'])
 def generate_user_id():
     """ Gera um UUID novo para um usuário.
     """
     user_id = str(uuid.uuid4())
     return jsonify({ "user_id": user_id }), 201
 
-@app.route('/sessions/generate', methods=['POST'])
+@bp.route('/sessions/generate', methods=['POST'])
 def generate_session_id():
     """ Gera um novo UUID de sessão para um usuário.
     """
@@ -57,9 +311,13 @@ def generate_session_id():
     session_id = str(uuid.uuid4())
     return jsonify({ "session_id": session_id }), 201
 
-@app.route('/sessions/getall', methods=['POST'])
-def get_all_conversations():
-    """ Obtem todas as conversas entre o agente e um usuário.
+@bp.route('/sessions/list', methods=['POST'])
+@bp.route('/sessions/getall', methods=['POST'])
+def list_conversations():
+    """ Lista as conversas de um usuário (ID da sessão, resumo e datas), paginadas.
+
+        Recebe opcionalmente `limit` e `cursor` (o `next_cursor` da página anterior).
+        As mensagens de cada conversa são obtidas em /sessions/get.
     """
     data = request.get_json()
     user_id = data.get("user_id")
@@ -67,26 +325,27 @@ def get_all_conversations():
     if not user_id:
         return jsonify({"error": "ID de usuário não fornecido."}), 400
 
-    chats = []
-
-    sessions = chat_agent.db.get_sessions(
-        user_id=user_id,
-        session_type=SessionType.AGENT
-    )
+    cursor = data.get("cursor")
+    if cursor is not None and not isinstance(cursor, str):
+        return jsonify({"error": "Cursor inválido."}), 400
 
-    for session in sessions:
-        messages = chat_agent.agno_agent.get_chat_history(session_id=session.session_id)
-        messages_list = [ {"role": m.role, "content": m.content} for m in messages ]
-        chats.append({
-            "summary": session.summary.summary if session.summary else None,
-            "messages": messages_list,
-        })
+    try:
+        page = list_sessions(
+            current_app.extensions['chat_agents'].db, user_id,
+            limit=page_size(data.get("limit"), SESSIONS_PAGE_SIZE),
+            cursor=cursor,
+        )
+    except InvalidCursor:
+        return jsonify({"error": "Cursor inválido."}), 400
 
-    return jsonify({ "chats": chats }), 200
+    return jsonify(page), 200
 
-@app.route('/sessions/get', methods=['POST'])
+@bp.route('/sessions/get', methods=['POST'])
 def get_session_conversation():
-    """ Obtem a conversa entre o agente e o usuário em uma sessão específica
+    """ Obtem a conversa entre o agente e o usuário em uma sessão específica, paginada
+        das mensagens mais recentes para as mais antigas.
+
+        Recebe opcionalmente `limit` e `before` (o `next_cursor` da página anterior).
     
         OBS: A Sessão tem ID único, ou seja, se diferentes usuários tem o mesmo ID
         de sessão, essa sessão é a mesma para os dois.
@@ -98,12 +357,18 @@ def get_session_conversation():
     if not session_id or not user_id:
         return jsonify({"error": "ID de usuário e/ou sessão não fornecido."}), 400
 
-    messages = chat_agent.agno_agent.get_chat_history(session_id=session_id)
-    messages_list = [ {"role": m.role, "content": m.content} for m in messages ]
-    
-    summary = chat_agent.agno_agent.get_session_summary(session_id=session_id)
+    before = data.get("before")
+    if before is not None and not isinstance(before, int):
+        return jsonify({"error": "Cursor inválido."}), 400
 
-    return jsonify({ "summary": summary.summary if summary else None,  "messages": messages_list }), 200
+    conversation = get_conversation(
+        current_app.extensions['chat_agents'].db, session_id,
+        limit=page_size(data.get("limit"), MESSAGES_PAGE_SIZE),
+        before=before,
+    )
+    return jsonify(conversation), 200
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5050)
\ No newline at end of file
+    # Servidor de desenvolvimento; em produção use: gunicorn -c gunicorn.conf.py wsgi:app
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    create_app().run(debug=True, host='0.0.0.0', port=5050)
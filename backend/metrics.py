@@ -0,0 +1,223 @@
+import json
+import time
+import inspect
+import threading
+from bisect import bisect_left
+from tracing import span
+
+# Métricas do backend no formato texto do Prometheus, servidas em /metrics.
+# Implementação mínima (contadores, gauges e histogramas com um lock por métrica)
+# para poder ficar ligada em produção sem dependências extras.
+#
+# Com vários workers do gunicorn cada processo tem seus próprios valores; o Prometheus
+# deve coletar cada worker (ou o scrape cai em um worker qualquer a cada vez).
+
+# Faixas (em segundos) usadas pelos histogramas de duração
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_registry = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(name, "") for name in self.labels)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(self._render_items(items))
+        return lines
+
+    def _render_items(self, items) -> list:
+        return [f"{self.name}{_format_labels(self.labels, key)} {value}" for key, value in items]
+
+
+class Counter(_Metric):
+    """
+        Valor que só aumenta (ex: quantidade de chamadas, bytes baixados).
+    """
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """
+        Valor que sobe e desce (ex: requisições em andamento).
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        super().__init__(name, help, labels)
+        if not self.labels:
+            self._values[()] = 0
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """
+        Distribuição de valores em faixas acumuladas, com soma e contagem.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def mean(self, default: float = 0.0, **labels) -> float:
+        """
+            Média dos valores observados com esses rótulos (ou `default`, se não houver nenhum).
+        """
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+        return entry[1] / entry[2] if entry else default
+
+    def _render_items(self, items) -> list:
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+def render() -> str:
+    """
+        Gera o texto de todas as métricas registradas (formato de exposição do Prometheus).
+    """
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- Métricas do IFinder ---
+
+TOOL_CALLS = Counter("ifinder_tool_calls_total", "Chamadas de ferramentas do agente.", ("tool", "outcome"))
+TOOL_DURATION = Histogram("ifinder_tool_duration_seconds", "Duração das chamadas de ferramentas.", ("tool",))
+
+LLM_CALLS = Counter("ifinder_llm_calls_total", "Chamadas ao modelo de linguagem.", ("role", "outcome"))
+LLM_DURATION = Histogram("ifinder_llm_duration_seconds", "Duração das chamadas ao modelo.", ("role",))
+LLM_TOKENS = Counter("ifinder_llm_tokens_total", "Tokens enviados (prompt) e gerados (completion).", ("role", "kind"))
+
+HTTP_REQUESTS = Counter("ifinder_http_requests_total", "Requisições HTTP ao site.", ("host", "status"))
+HTTP_DURATION = Histogram("ifinder_http_request_duration_seconds", "Duração das requisições HTTP ao site.", ("host",))
+HTTP_BYTES = Counter("ifinder_http_received_bytes_total", "Bytes recebidos do site (corpo, como veio na rede).", ("host",))
+HTTP_RATE_WAIT = Counter("ifinder_http_rate_limit_wait_seconds_total", "Tempo de espera imposto pelo limite de requisições por host.", ("host",))
+HTTP_CONNECTIONS = Counter("ifinder_http_connections_total", "Conexões usadas pelas requisições HTTP: abertas para a requisição (new) ou reaproveitadas do pool keep-alive (reused).", ("client", "kind"))
+HTTP_CIRCUIT_OPEN = Gauge("ifinder_http_circuit_open", "Circuito do host aberto (1, falhando rápido) ou fechado (0).", ("host",))
+COALESCED_REQUESTS = Counter("ifinder_coalesced_requests_total", "Chamadas que aproveitaram uma requisição idêntica já em andamento.", ("scope",))
+OPEN_LINKS = Counter("ifinder_open_links_total", "URLs pedidas à ferramenta open_links (ok, error ou timeout).", ("outcome",))
+HTTP_CACHE = Counter("ifinder_http_cache_total", "Consultas ao cache HTTP em disco.", ("result",))
+HTTP_CACHE_BYTES = Gauge("ifinder_http_cache_bytes", "Tamanho das respostas guardadas no cache HTTP em disco.")
+PDF_CACHE = Counter("ifinder_pdf_cache_total", "Consultas ao cache de PDFs.", ("result",))
+ANSWER_CACHE = Counter("ifinder_answer_cache_total", "Consultas ao cache de respostas (hit, miss ou bypass).", ("result",))
+INTENT_ROUTES = Counter("ifinder_intent_router_total", "Perguntas vistas pelo roteador de intenções (direct, assist ou fallback).", ("intent", "outcome"))
+INTENT_SAVED = Counter("ifinder_intent_router_saved_seconds_total", "Tempo estimado economizado pelo roteador (chamadas ao modelo evitadas).", ("intent",))
+HISTORY_TOKENS = Counter("ifinder_history_tool_tokens_total", "Tokens estimados dos resultados de ferramentas guardados no histórico, antes (original) e depois (compacted) da compactação.", ("stage",))
+
+CHAT_REQUESTS = Counter("ifinder_chat_requests_total", "Turnos de chat recebidos.", ("endpoint", "outcome"))
+CHAT_DURATION = Histogram("ifinder_chat_duration_seconds", "Duração dos turnos de chat.", ("endpoint",))
+CHATS_IN_FLIGHT = Gauge("ifinder_chats_in_flight", "Turnos de chat em andamento.")
+
+STARTUP_SECONDS = Gauge("ifinder_startup_seconds", "Duração das etapas de subida do processo (import, create_app, agent_init).", ("phase",))
+LAZY_IMPORT_SECONDS = Gauge("ifinder_lazy_import_seconds", "Tempo do import adiado de dependências pesadas, pago no primeiro uso.", ("module",))
+
+
+def _is_error(result) -> bool:
+    # As ferramentas devolvem os erros como texto ou como {'error': ...} em vez de lançar exceção
+    if isinstance(result, dict):
+        return 'error' in result
+    return isinstance(result, str) and result.startswith("Erro")
+
+
+def tool_metrics_hook(function_name: str, function_call, arguments: dict):
+    """
+        Hook de ferramenta do agno (tool_hooks): mede a duração e o resultado de cada chamada
+        e abre o span da ferramenta no rastro do turno.
+    """
+    started = time.perf_counter()
+    outcome = "error"
+    with span(f"tool:{function_name}", "tool", args=json.dumps(arguments, ensure_ascii=False, default=str)) as current:
+        try:
+            result = function_call(**arguments)
+            outcome = "error" if _is_error(result) else "ok"
+            if current:
+                current.set(outcome=outcome, result_chars=len(str(result)))
+            return result
+        finally:
+            TOOL_DURATION.observe(time.perf_counter() - started, tool=function_name)
+            TOOL_CALLS.inc(tool=function_name, outcome=outcome)
+
+
+async def atool_metrics_hook(function_name: str, function_call, arguments: dict):
+    """
+        Versão do tool_metrics_hook para o caminho assíncrono do agente (arun), em que
+        `function_call` devolve uma corrotina.
+    """
+    started = time.perf_counter()
+    outcome = "error"
+    with span(f"tool:{function_name}", "tool", args=json.dumps(arguments, ensure_ascii=False, default=str)) as current:
+        try:
+            result = function_call(**arguments)
+            if inspect.isawaitable(result):
+                result = await result
+            outcome = "error" if _is_error(result) else "ok"
+            if current:
+                current.set(outcome=outcome, result_chars=len(str(result)))
+            return result
+        finally:
+            TOOL_DURATION.observe(time.perf_counter() - started, tool=function_name)
+            TOOL_CALLS.inc(tool=function_name, outcome=outcome)
@@ -0,0 +1,215 @@
+import json
+import base64
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from agno.db.sqlite import SqliteDb
+from agno.run.base import HISTORY_SKIP_STATUSES
+
+# Consultas de leitura do histórico direto nas tabelas do agno, sem desserializar as execuções
+# (runs) em objetos Python. O SQLite expande o JSON com json_each.
+#
+# Desde o agno 3 cada execução é uma linha da tabela de execuções (agno_runs); bancos criados
+# pelo agno 2 guardam a lista de execuções na coluna `runs` da tabela de sessões, que a migração
+# do agno mantém como cópia. As leituras juntam as duas, como o próprio agno faz.
+
+SESSIONS_PAGE_SIZE = 20
+MESSAGES_PAGE_SIZE = 30
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """
+        Cursor de paginação malformado (não foi gerado por este módulo).
+    """
+
+
+def _json(column: str) -> str:
+    # O agno grava as colunas JSON como uma string JSON contendo o documento
+    return f"(CASE json_type({column}) WHEN 'text' THEN json_extract({column}, '$') ELSE {column} END)"
+
+
+def _columns(conn, table: str) -> set:
+    # Colunas de uma tabela; vazio se o agno ainda não a criou (nenhuma conversa gravada)
+    return {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+
+
+def page_size(value, default: int) -> int:
+    """
+        Converte o tamanho de página enviado pelo cliente, limitado a MAX_PAGE_SIZE.
+    """
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE)) if value else default
+    except (TypeError, ValueError):
+        return default
+
+
+def _encode_cursor(updated_at: int, session_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([updated_at, session_id]).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        updated_at, session_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(updated_at), str(session_id)
+    except (ValueError, TypeError, AttributeError):
+        raise InvalidCursor(cursor)
+
+
+def list_sessions(db: SqliteDb, user_id: str, limit: int = SESSIONS_PAGE_SIZE, cursor: str = None) -> dict:
+    """
+        Lista as sessões de um usuário, da atualizada mais recentemente para a mais antiga,
+        com paginação por cursor (keyset) em uma única consulta.
+
+        Args:
+            db (SqliteDb): Banco de sessões do agno.
+            user_id (str): ID do usuário.
+            limit (int): Quantidade de sessões por página.
+            cursor (str): Valor de `next_cursor` da página anterior (None = primeira página).
+
+        Returns:
+            dict: {'sessions': [{session_id, summary, created_at, updated_at}], 'next_cursor': str | None}
+    """
+    sql = f"""
+        SELECT session_id, json_extract({_json('summary')}, '$.summary'), created_at, updated_at
+        FROM {db.session_table_name}
+        WHERE user_id = :user_id AND session_type = 'agent'
+    """
+    params = {"user_id": user_id, "limit": limit + 1}
+
+    if cursor:
+        params["cursor_updated"], params["cursor_id"] = _decode_cursor(cursor)
+        sql += """ AND (updated_at < :cursor_updated
+                       OR (updated_at = :cursor_updated AND session_id < :cursor_id))"""
+    sql += " ORDER BY updated_at DESC, session_id DESC LIMIT :limit"
+
+    with db.db_engine.connect() as conn:
+        rows = conn.execute(text(sql), params).fetchall() if _columns(conn, db.session_table_name) else []
+
+    sessions = [
+        {"session_id": session_id, "summary": summary, "created_at": created_at, "updated_at": updated_at}
+        for session_id, summary, created_at, updated_at in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = sessions[-1]
+        next_cursor = _encode_cursor(last["updated_at"], last["session_id"])
+    return {"sessions": sessions, "next_cursor": next_cursor}
+
+
+def get_conversation(db: SqliteDb, session_id: str, limit: int = MESSAGES_PAGE_SIZE, before: int = None) -> dict:
+    """
+        Retorna o resumo e uma página de mensagens (usuário e agente) de uma sessão,
+        das mais recentes para as mais antigas.
+
+        Args:
+            db (SqliteDb): Banco de sessões do agno.
+            session_id (str): ID da sessão.
+            limit (int): Quantidade de mensagens por página.
+            before (int): Valor de `next_cursor` da página anterior (None = mensagens mais recentes).
+
+        Returns:
+            dict: {'summary': str | None, 'messages': [{role, content}] em ordem cronológica,
+                   'next_cursor': int | None}
+    """
+    sessions, runs = db.session_table_name, db.runs_table_name
+    with db.db_engine.connect() as conn:
+        session_columns = _columns(conn, sessions)
+        if not session_columns:
+            return {"summary": None, "messages": [], "next_cursor": None}
+
+        # Execuções da sessão na ordem em que foram gravadas: primeiro as que só existem na
+        # coluna legada (sessões ainda não migradas), depois as da tabela de execuções
+        sources = []
+        has_runs_table = bool(_columns(conn, runs))
+        if "runs" in session_columns:
+            legacy = f"""
+                SELECT 0, CAST(r.key AS INTEGER), NULL, r.value
+                FROM {sessions} s, json_each({_json('s.runs')}) r
+                WHERE s.session_id = :session_id
+            """
+            if has_runs_table:
+                legacy += f"""AND COALESCE(json_extract(r.value, '$.run_id'), '') NOT IN (
+                    SELECT run_id FROM {runs} WHERE session_id = :session_id)"""
+            sources.append(legacy)
+        if has_runs_table:
+            sources.append(f"""
+                SELECT 1, COALESCE(run_index, created_at), run_id, {_json('run_data')}
+                FROM {runs} WHERE session_id = :session_id
+            """)
+
+        # Mesmo critério do get_chat_history do agno: mensagens do usuário e do agente, sem as
+        # repetidas do histórico, as execuções de membros de times e as interrompidas; chamadas
+        # de ferramenta sem texto ficam de fora
+        skipped = ", ".join(f"'{status.value}'" for status in HISTORY_SKIP_STATUSES)
+        sql = f"""
+            WITH runs (source, position, run_id, run) AS ({" UNION ALL ".join(sources)}),
+            messages AS (
+                SELECT json_extract(m.value, '$.role') AS role,
+                       json_extract(m.value, '$.content') AS content,
+                       ROW_NUMBER() OVER (ORDER BY r.source, r.position, r.run_id, m.key) AS position
+                FROM runs r, json_each(r.run, '$.messages') m
+                WHERE json_extract(r.run, '$.parent_run_id') IS NULL
+                  AND COALESCE(json_extract(r.run, '$.status'), '') NOT IN ({skipped})
+                  AND json_extract(m.value, '$.role') IN ('user', 'assistant')
+                  AND NOT COALESCE(json_extract(m.value, '$.from_history'), 0)
+                  AND COALESCE(json_extract(m.value, '$.content'), '') != ''
+            )
+            SELECT role, content, position FROM messages
+            WHERE :before IS NULL OR position < :before
+            ORDER BY position DESC
+            LIMIT :limit
+        """
+        summary_sql = f"""
+            SELECT json_extract({_json('summary')}, '$.summary')
+            FROM {sessions} WHERE session_id = :session_id
+        """
+        params = {"session_id": session_id, "before": before, "limit": limit}
+        rows = conn.execute(text(sql), params).fetchall() if sources else []
+        summary = conn.execute(text(summary_sql), {"session_id": session_id}).scalar()
+
+    rows.reverse()
+    return {
+        "summary": summary,
+        "messages": [{"role": role, "content": content} for role, content, _ in rows],
+        "next_cursor": rows[0][2] if rows and rows[0][2] > 1 else None,
+    }
+
+
+def has_runs(db: SqliteDb, session_id: str) -> bool:
+    """
+        Indica se a sessão já tem algum turno gravado (na tabela de execuções ou na coluna legada).
+    """
+    sessions, runs = db.session_table_name, db.runs_table_name
+    with db.db_engine.connect() as conn:
+        if _columns(conn, runs) and conn.execute(
+                text(f"SELECT 1 FROM {runs} WHERE session_id = :session_id LIMIT 1"), {"session_id": session_id}).first():
+            return True
+        if "runs" not in _columns(conn, sessions):
+            return False
+        return bool(conn.execute(text(f"""
+            SELECT json_array_length({_json('runs')}) FROM {sessions} WHERE session_id = :session_id
+        """), {"session_id": session_id}).scalar())
+
+
+def save_summary(db: SqliteDb, session_id: str, summary: dict) -> bool:
+    """
+        Grava o resumo de uma sessão sem regravar as execuções, para não sobrescrever
+        um turno que esteja terminando ao mesmo tempo. `updated_at` não muda, então a
+        ordem da lista de conversas continua sendo a da última mensagem.
+
+        Args:
+            db (SqliteDb): Banco de sessões do agno.
+            session_id (str): ID da sessão.
+            summary (dict): Resumo no formato do agno ({'summary', 'topics', 'updated_at'}).
+
+        Returns:
+            bool: True se a sessão existia.
+    """
+    sql = f"UPDATE {db.session_table_name} SET summary = :summary WHERE session_id = :session_id"
+    try:
+        with db.db_engine.begin() as conn:
+            result = conn.execute(text(sql), {"summary": json.dumps(summary, ensure_ascii=False, default=str),
+                                              "session_id": session_id})
+    except OperationalError:
+        return False
+    return result.rowcount > 0
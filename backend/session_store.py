@@ -0,0 +1,290 @@
+import os
+import json
+import time
+import logging
+import argparse
+import threading
+from sqlalchemy import event, text
+from agno.db.sqlite import SqliteDb
+
+# Banco de sessões do agno (tmp/agent.db) ajustado para vários turnos simultâneos: WAL (leituras
+# do /sessions/getall não esperam as gravações dos turnos), busy_timeout para as gravações
+# esperarem umas às outras em vez de falharem, índices das consultas do histórico e uma rotina
+# de manutenção que apaga sessões antigas, enxuga as execuções (runs) e roda VACUUM quando vale a pena.
+BUSY_TIMEOUT_MS = int(os.getenv("SESSION_DB_BUSY_TIMEOUT_MS", "5000"))
+SYNCHRONOUS = os.getenv("SESSION_DB_SYNCHRONOUS", "NORMAL").upper()  # Com WAL, NORMAL só arrisca o último commit numa queda de energia
+
+RETENTION_DAYS = float(os.getenv("SESSION_RETENTION_DAYS", "180"))       # Sessões sem mensagens há mais tempo são apagadas (0 = nunca)
+COMPACT_AFTER_DAYS = float(os.getenv("SESSION_COMPACT_AFTER_DAYS", "7"))  # Execuções mais antigas perdem os resultados de ferramentas
+MAINTENANCE_HOURS = float(os.getenv("SESSION_MAINTENANCE_HOURS", "24"))
+VACUUM_FREE_RATIO = float(os.getenv("SESSION_VACUUM_FREE_RATIO", "0.2"))  # VACUUM quando essa fração das páginas está livre
+BATCH_SIZE = 200
+
+logger = logging.getLogger(__name__)
+
+COMPACTED_TOOL_RESULT = "[Resultado da ferramenta removido do histórico antigo]"
+
+INDEXES = [
+    # list_sessions: sessões do usuário por updated_at (paginação por cursor)
+    "CREATE INDEX IF NOT EXISTS idx_ifinder_sessions_user_updated ON {sessions} (user_id, updated_at DESC, session_id DESC)",
+    # Rotina de retenção
+    "CREATE INDEX IF NOT EXISTS idx_ifinder_sessions_updated ON {sessions} (updated_at)",
+    # get_conversation e retenção: execuções de uma sessão
+    "CREATE INDEX IF NOT EXISTS idx_ifinder_runs_session_created ON {runs} (session_id, created_at)",
+]
+
+
+def _configure_connection(dbapi_connection, _record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    if SYNCHRONOUS in ("OFF", "NORMAL", "FULL", "EXTRA"):
+        cursor.execute(f"PRAGMA synchronous={SYNCHRONOUS}")
+    cursor.close()
+
+
+def create_session_db(db_file: str) -> SqliteDb:
+    """
+        Abre o banco de sessões do agno com WAL, busy_timeout e synchronous ajustados
+        (aplicados a cada conexão do pool) e cria os índices das consultas do histórico.
+    """
+    db = SqliteDb(db_file=db_file)
+    event.listen(db.db_engine, "connect", _configure_connection)
+    ensure_indexes(db)
+    return db
+
+
+def ensure_indexes(db: SqliteDb) -> bool:
+    """
+        Cria os índices nas tabelas de sessões e de execuções. O agno só cria as tabelas na
+        primeira gravação, então a rotina de manutenção chama esta função de novo.
+
+        Returns:
+            bool: False se alguma das tabelas ainda não existe.
+    """
+    with db.db_engine.begin() as conn:
+        tables = {"sessions": db.session_table_name, "runs": db.runs_table_name}
+        missing = {name for name, table in tables.items() if not _columns(conn, table)}
+        for index in INDEXES:
+            if not any(f"{{{name}}}" in index for name in missing):
+                conn.execute(text(index.format(**tables)))
+    return not missing
+
+
+def _columns(conn, table: str) -> set:
+    # Colunas de uma tabela; vazio se o agno ainda não a criou
+    return {row[1] for row in conn.execute(text(f"PRAGMA table_info({table})"))}
+
+
+def _compact_runs(runs: list) -> tuple:
+    # Mantém as mensagens do usuário e do agente; tira as cópias do histórico que cada execução
+    # guarda e troca os resultados das ferramentas por um aviso
+    changed = False
+    for run in runs:
+        if not isinstance(run, dict):
+            continue
+        messages = []
+        for message in run.get("messages") or []:
+            if message.get("from_history"):
+                changed = True
+                continue
+            if message.get("role") == "tool" and message.get("content") != COMPACTED_TOOL_RESULT:
+                message["content"] = COMPACTED_TOOL_RESULT
+                changed = True
+            messages.append(message)
+        if "messages" in run:
+            run["messages"] = messages
+        for execution in run.get("tools") or []:
+            if execution.get("result") is not None:
+                execution["result"] = None
+                changed = True
+    return runs, changed
+
+
+def _load_runs(value) -> tuple:
+    # O agno grava as colunas JSON como documento ou como string contendo o documento;
+    # a compactação regrava no mesmo formato
+    depth = 0
+    while isinstance(value, str):
+        value = json.loads(value)
+        depth += 1
+    return value, depth
+
+
+def prune_sessions(db: SqliteDb, retention_days: float = RETENTION_DAYS, compact_after_days: float = COMPACT_AFTER_DAYS,
+                   dry_run: bool = False) -> dict:
+    """
+        Apaga as sessões sem mensagens há mais de `retention_days`, junto com as suas execuções,
+        e enxuga as execuções das sessões paradas há mais de `compact_after_days` (resultados de
+        ferramentas e cópias do histórico, que já não voltam ao modelo). As conversas continuam
+        legíveis em /sessions/get.
+
+        Returns:
+            dict: {deleted, deleted_runs, compacted, bytes_before, bytes_after}
+    """
+    sessions, runs = db.session_table_name, db.runs_table_name
+    now = time.time()
+    stats = {"deleted": 0, "deleted_runs": 0, "compacted": 0, "bytes_before": 0, "bytes_after": 0}
+
+    with db.db_engine.begin() as conn:
+        session_columns = _columns(conn, sessions)
+        if not session_columns:
+            return stats  # Tabela de sessões ainda não criada
+        has_runs_table = bool(_columns(conn, runs))
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS ifinder_compacted_sessions (session_id TEXT PRIMARY KEY, updated_at BIGINT)"
+        ))
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS ifinder_compacted_runs (run_id TEXT PRIMARY KEY, updated_at BIGINT)"
+        ))
+
+        if retention_days > 0:
+            cutoff = {"cutoff": int(now - retention_days * 86400)}
+            expired = f"SELECT session_id FROM {sessions} WHERE updated_at < :cutoff"
+            # Execuções das sessões vencidas e as que ficaram sem sessão (apagadas por versões
+            # anteriores desta rotina, que não tiravam as execuções)
+            expired_runs = f"""
+                FROM {runs} WHERE session_id IN ({expired})
+                   OR session_id NOT IN (SELECT session_id FROM {sessions})
+            """
+            if dry_run:
+                stats["deleted"] = conn.execute(text(f"SELECT COUNT(*) FROM ({expired})"), cutoff).scalar()
+                if has_runs_table:
+                    stats["deleted_runs"] = conn.execute(text(f"SELECT COUNT(*) {expired_runs}"), cutoff).scalar()
+            else:
+                if has_runs_table:
+                    stats["deleted_runs"] = conn.execute(text(f"DELETE {expired_runs}"), cutoff).rowcount
+                    conn.execute(text(f"DELETE FROM ifinder_compacted_runs WHERE run_id NOT IN (SELECT run_id FROM {runs})"))
+                stats["deleted"] = conn.execute(text(f"DELETE FROM {sessions} WHERE updated_at < :cutoff"), cutoff).rowcount
+                conn.execute(text(f"DELETE FROM ifinder_compacted_sessions WHERE session_id NOT IN (SELECT session_id FROM {sessions})"))
+
+    # Execuções das sessões paradas ainda não compactadas (ou alteradas depois da compactação).
+    # Se um turno foi gravado depois da leitura (updated_at mudou), a linha fica como está,
+    # em vez de a gravação do turno ser sobrescrita; ela volta na próxima passada
+    cutoff = int(now - compact_after_days * 86400)
+    if has_runs_table:
+        _compact_rows(db, f"""
+            SELECT r.run_id, r.run_data, r.updated_at FROM {runs} r
+            JOIN {sessions} s ON s.session_id = r.session_id
+            LEFT JOIN ifinder_compacted_runs c ON c.run_id = r.run_id
+            WHERE s.updated_at < :cutoff AND r.run_id > :last_id
+              AND (c.run_id IS NULL OR c.updated_at IS NOT r.updated_at)
+            ORDER BY r.run_id LIMIT :limit
+        """, f"UPDATE {runs} SET run_data = :data WHERE run_id = :key AND updated_at IS :updated_at",
+            "INSERT OR REPLACE INTO ifinder_compacted_runs (run_id, updated_at) VALUES (:key, :updated_at)",
+            cutoff, dry_run, stats)
+    if "runs" in session_columns:
+        # Coluna de execuções dos bancos gravados pelo agno 2 (sessões ainda não migradas).
+        # updated_at não muda: a ordem da lista de conversas continua a da última mensagem
+        _compact_rows(db, f"""
+            SELECT s.session_id, s.runs, s.updated_at FROM {sessions} s
+            LEFT JOIN ifinder_compacted_sessions c ON c.session_id = s.session_id
+            WHERE s.updated_at < :cutoff AND s.session_id > :last_id AND s.runs IS NOT NULL
+              AND (c.updated_at IS NULL OR c.updated_at != s.updated_at)
+            ORDER BY s.session_id LIMIT :limit
+        """, f"UPDATE {sessions} SET runs = :data WHERE session_id = :key AND updated_at = :updated_at",
+            "INSERT OR REPLACE INTO ifinder_compacted_sessions (session_id, updated_at) VALUES (:key, :updated_at)",
+            cutoff, dry_run, stats)
+    return stats
+
+
+def _compact_rows(db: SqliteDb, select_sql: str, update_sql: str, mark_sql: str, cutoff: int, dry_run: bool,
+                  stats: dict):
+    # Percorre em lotes (para não segurar o lock de escrita) as linhas (chave, execuções, updated_at)
+    # de `select_sql`; cada linha guarda uma execução (agno_runs) ou a lista delas (coluna legada)
+    last_id = ""
+    while True:
+        with db.db_engine.connect() as conn:
+            rows = conn.execute(text(select_sql), {"cutoff": cutoff, "last_id": last_id, "limit": BATCH_SIZE}).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+
+        updates, marks = [], []
+        for key, raw, updated_at in rows:
+            marks.append({"key": key, "updated_at": updated_at})
+            value, depth = _load_runs(raw)
+            if not isinstance(value, (list, dict)):
+                continue
+            before = len(raw) if isinstance(raw, str) else len(json.dumps(raw))
+            _, changed = _compact_runs(value if isinstance(value, list) else [value])
+            if changed:
+                encoded = json.dumps(value, ensure_ascii=False, default=str)
+                for _ in range(depth - 1):
+                    encoded = json.dumps(encoded)
+                updates.append({"key": key, "data": encoded, "updated_at": updated_at})
+                stats["compacted"] += 1
+                stats["bytes_before"] += before
+                stats["bytes_after"] += len(encoded)
+
+        if dry_run:
+            continue
+        with db.db_engine.begin() as conn:
+            if updates:
+                conn.execute(text(update_sql), updates)
+            conn.execute(text(mark_sql), marks)
+
+
+def vacuum_if_needed(db: SqliteDb, free_ratio: float = VACUUM_FREE_RATIO, force: bool = False) -> bool:
+    """
+        Devolve ao disco o espaço das sessões apagadas/compactadas quando a fração de páginas
+        livres passa de `free_ratio`. O VACUUM bloqueia as gravações enquanto roda, por isso só
+        acontece quando compensa. O WAL é sempre truncado ao final.
+
+        Returns:
+            bool: True se o VACUUM foi executado.
+    """
+    with db.db_engine.connect() as conn:
+        pages = conn.execute(text("PRAGMA page_count")).scalar() or 0
+        free = conn.execute(text("PRAGMA freelist_count")).scalar() or 0
+    vacuum = pages > 0 and (force or free / pages >= free_ratio)
+
+    # VACUUM não pode rodar dentro de uma transação: usa a conexão em autocommit
+    with db.db_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if vacuum:
+            conn.execute(text("VACUUM"))
+        conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+    return vacuum
+
+
+def maintain(db: SqliteDb) -> dict:
+    """
+        Uma passada completa: índices, retenção/compactação e VACUUM se necessário.
+    """
+    ensure_indexes(db)
+    stats = prune_sessions(db)
+    stats["vacuumed"] = vacuum_if_needed(db)
+    return stats
+
+
+def start_session_maintenance(db: SqliteDb, interval_hours: float = MAINTENANCE_HOURS) -> threading.Thread:
+    """
+        Executa a manutenção do banco de sessões periodicamente em uma thread daemon.
+    """
+    def loop():
+        while True:
+            try:
+                logger.info("Manutenção das sessões: %s", maintain(db))
+            except Exception as e:
+                logger.exception("Erro na manutenção das sessões: %s", e)
+            time.sleep(interval_hours * 3600)
+
+    thread = threading.Thread(target=loop, name="session-maintenance", daemon=True)
+    thread.start()
+    return thread
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Manutenção do banco de sessões (tmp/agent.db).")
+    parser.add_argument("--db", default=os.getenv("AGENT_DB", "tmp/agent.db"))
+    parser.add_argument("--dry-run", action="store_true", help="Só mostra o que seria apagado/compactado.")
+    parser.add_argument("--vacuum", action="store_true", help="Força o VACUUM ao final.")
+    args = parser.parse_args()
+
+    session_db = create_session_db(args.db)
+    size = os.path.getsize(args.db) if os.path.exists(args.db) else 0
+    result = prune_sessions(session_db, dry_run=args.dry_run)
+    if not args.dry_run:
+        result["vacuumed"] = vacuum_if_needed(session_db, force=args.vacuum)
+    print(f"Resultado: {result}")
+    print(f"Tamanho do arquivo: {size / 1e6:.1f} MB -> {os.path.getsize(args.db) / 1e6:.1f} MB")
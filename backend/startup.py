@@ -0,0 +1,146 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import subprocess
+from contextlib import contextmanager
+
+from metrics import STARTUP_SECONDS, LAZY_IMPORT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Tempo de subida de um worker: quanto custa importar o backend, criar a aplicação e o
+# primeiro ChatAgent. Cada etapa vai para /metrics (ifinder_startup_seconds) e
+# `python startup.py` mede uma subida do zero, com os imports mais caros, para manter
+# a subida abaixo de STARTUP_TARGET_SECONDS nos workers criados pelo autoscaling.
+STARTUP_TARGET = float(os.getenv("STARTUP_TARGET_SECONDS", "3"))
+
+# Dependências que só devem ser carregadas no primeiro uso das ferramentas
+HEAVY_MODULES = ("fitz", "pymupdf", "selenium", "webdriver_manager", "markdownify")
+
+_phases = {}
+_lazy_imports = {}
+_lock = threading.Lock()
+
+
+@contextmanager
+def phase(name: str):
+    """
+        Mede uma etapa da subida (ex: `with phase("create_app"): ...`).
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        with _lock:
+            _phases[name] = seconds
+        STARTUP_SECONDS.set(round(seconds, 4), phase=name)
+
+
+def record_lazy_import(module: str, seconds: float):
+    """
+        Registra o tempo de um import adiado (ver tools/lazy_import.py).
+    """
+    with _lock:
+        _lazy_imports[module] = seconds
+    LAZY_IMPORT_SECONDS.set(round(seconds, 4), module=module)
+
+
+def report() -> dict:
+    """
+        Returns:
+            dict: {phases, total, target, lazy_imports, heavy_loaded} com os tempos em segundos.
+    """
+    with _lock:
+        phases = dict(_phases)
+        lazy_imports = dict(_lazy_imports)
+    return {
+        "phases": {name: round(seconds, 3) for name, seconds in phases.items()},
+        "total": round(sum(phases.values()), 3),
+        "target": STARTUP_TARGET,
+        "lazy_imports": {name: round(seconds, 3) for name, seconds in lazy_imports.items()},
+        "heavy_loaded": [name for name in HEAVY_MODULES if name in sys.modules],
+    }
+
+
+def log_report():
+    """
+        Registra no log uma linha com as etapas da subida do processo (aviso se passou do alvo).
+    """
+    data = report()
+    steps = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in data["phases"].items())
+    slow = data["total"] > STARTUP_TARGET
+    warning = f" ACIMA DO ALVO de {STARTUP_TARGET:.1f}s" if slow else ""
+    logger.log(logging.WARNING if slow else logging.INFO,
+               "Subida do worker (pid %s): %s = %.2fs%s", os.getpid(), steps, data["total"], warning)
+
+
+# Executado em um processo novo por `python startup.py`, com -X importtime
+_CHILD = """
+import json, startup
+with startup.phase("import"):
+    import main
+    from agent_core import ChatAgent
+with startup.phase("create_app"):
+    app = main.create_app(start_jobs=False)
+with startup.phase("agent_init"):
+    app.extensions['chat_agents'].get()
+print(json.dumps(startup.report()))
+"""
+
+
+def _top_imports(importtime: str, top: int) -> list:
+    # Linhas "import time: self [us] | cumulative | nome"; soma o tempo próprio de cada
+    # módulo no pacote de primeiro nível (agno, google, sqlalchemy, tools...)
+    totals = {}
+    for line in importtime.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        own, _, name = line[len("import time:"):].split("|")
+        if own.strip().isdigit():
+            package = name.strip().split(".")[0]
+            totals[package] = totals.get(package, 0) + int(own) / 1e6
+    return sorted(((seconds, package) for package, seconds in totals.items()), reverse=True)[:top]
+
+
+def profile(top: int = 15) -> tuple:
+    """
+        Sobe o backend em um processo novo (sem crawler, navegadores nem banco de sessões real).
+
+        Returns:
+            tuple: (relatório do processo filho, [(segundos, módulo)] dos imports mais caros)
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, AGENT_DB=os.path.join(directory, "agent.db"),
+                   TRACES_DB=os.path.join(directory, "traces.db"))
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _CHILD],
+            cwd=os.path.dirname(os.path.abspath(__file__)), env=env, capture_output=True, text=True
+        )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "falha na subida")
+    return json.loads(result.stdout.strip().splitlines()[-1]), _top_imports(result.stderr, top)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mede a subida do backend (imports e inicialização).")
+    parser.add_argument("--target", type=float, default=STARTUP_TARGET, help="Tempo máximo aceitável (s).")
+    parser.add_argument("--top", type=int, default=15, help="Quantidade de imports mais caros exibidos.")
+    args = parser.parse_args()
+
+    data, imports = profile(args.top)
+    print("Etapas:")
+    for name, seconds in data["phases"].items():
+        print(f"  {name:<12} {seconds:>7.3f}s")
+    print(f"  {'total':<12} {data['total']:>7.3f}s (alvo {args.target:.1f}s)")
+    print("Imports mais caros (por pacote):")
+    for seconds, name in imports:
+        print(f"  {seconds:>7.3f}s  {name}")
+    if data["heavy_loaded"]:
+        print(f"Dependências pesadas carregadas na subida: {', '.join(data['heavy_loaded'])}")
+    sys.exit(1 if data["total"] > args.target else 0)
@@ -0,0 +1,101 @@
+import os
+import time
+import logging
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+# Resumos (títulos) das sessões gerados fora do turno, por uma thread de fundo. Cada turno só
+# agenda o resumo; turnos seguidos da mesma sessão adiam o agendamento (debounce), então o
+# modelo de resumo é chamado uma vez depois que a conversa para, e não a cada mensagem.
+SUMMARY_DEBOUNCE = float(os.getenv("SUMMARY_DEBOUNCE_SECONDS", "20"))
+SUMMARY_MAX_DELAY = float(os.getenv("SUMMARY_MAX_DELAY_SECONDS", "120"))  # Espera máxima em conversas longas
+
+
+class SummaryQueue:
+    """
+        Fila de resumos com debounce por sessão, atendida por uma única thread daemon
+        (criada no primeiro agendamento).
+    """
+    def __init__(self, debounce: float = SUMMARY_DEBOUNCE, max_delay: float = SUMMARY_MAX_DELAY):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._pending = {}  # session_id -> (quando gerar, prazo máximo, função que gera o resumo)
+        self._running = 0
+        self._cond = threading.Condition()
+        self._worker = None
+
+    def schedule(self, session_id: str, job: Callable[[], None]):
+        """
+            Agenda (ou adia) o resumo da sessão. Se já houver um pendente, só o último `job` é executado.
+
+            Args:
+                session_id (str): ID da sessão.
+                job (Callable): Gera e grava o resumo.
+        """
+        now = time.monotonic()
+        with self._cond:
+            entry = self._pending.get(session_id)
+            deadline = entry[1] if entry else now + self.max_delay
+            self._pending[session_id] = (min(now + self.debounce, deadline), deadline, job)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="session-summaries", daemon=True)
+                self._worker.start()
+            self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending) + self._running
+
+    def flush(self, timeout: float = None) -> bool:
+        """
+            Antecipa os resumos pendentes e espera todos terminarem (desligamento, benchmarks).
+
+            Returns:
+                bool: False se o tempo limite acabou antes.
+        """
+        with self._cond:
+            for session_id, (_, deadline, job) in self._pending.items():
+                self._pending[session_id] = (0, deadline, job)
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._pending and not self._running, timeout)
+
+    def _next_job(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                due = [session_id for session_id, (when, _, _) in self._pending.items() if when <= now]
+                if due:
+                    self._running += 1
+                    return due[0], self._pending.pop(due[0])[2]
+                wake = min((when for when, _, _ in self._pending.values()), default=None)
+                self._cond.wait(None if wake is None else wake - now)
+
+    def _run(self):
+        while True:
+            session_id, job = self._next_job()
+            try:
+                job()
+            except Exception as e:
+                logger.exception("Erro ao gerar o resumo da sessão %s: %s", session_id, e)
+            finally:
+                with self._cond:
+                    self._running -= 1
+                    self._cond.notify_all()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_summary_queue() -> SummaryQueue:
+    """
+        Retorna a fila de resumos do processo (criada na primeira chamada).
+    """
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = SummaryQueue()
+    return _queue
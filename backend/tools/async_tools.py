@@ -0,0 +1,176 @@
+import os
+import time
+import asyncio
+import functools
+import requests
+from agno.tools import tool
+from agno.tools.function import Function
+
+from tools.http_client import afetch
+from tools.http_cache import acached_fetch
+from tools.pdf_cache import get_pdf_cache
+from tools.content_extractor import extract_content, DEFAULT_MAX_TOKENS, DOCUMENT_LINK
+from tools.web_tools import (
+    BASE_URL, HIGHLIGHTS_URL, SEARCH_URL, OPEN_LINKS_MAX_TOKENS, OPEN_LINKS_WORKERS, OPEN_LINKS_BUDGET,
+    full_url, highlights_from_html, navigation_from_html, simple_search_from_html, search_params, search_from_html,
+    clip_pdf_result, prepare_urls, batch_result,
+    get_site_highlights, get_page_navigation, open_link, open_links, site_search_simple, site_search,
+)
+from tools.pdf_tools import pdf_text, pdf_links_from_html, read_pdf, find_pdf_links
+from tracing import span
+
+# Versões assíncronas das ferramentas que acessam o site, usadas pelo caminho assíncrono do
+# agente (ChatAgent.aprocess_message). A espera pela rede fica no event loop (afetch/httpx),
+# então um processo mantém vários turnos esperando o site ou o Gemini ao mesmo tempo; o
+# parsing (BeautifulSoup, markdownify) e o acesso aos bancos rodam em threads e a extração
+# dos PDFs grandes continua no pool de processos do pdf_cache. Nomes, descrições e saídas
+# são os mesmos das versões síncronas.
+
+
+def version_of(function: Function):
+    """
+        Registra a função decorada como versão assíncrona de uma ferramenta síncrona, com o
+        mesmo nome, descrição e docstring (de onde o agno tira a descrição de cada parâmetro).
+    """
+    def register(coroutine):
+        coroutine.__doc__ = function.entrypoint.__doc__
+        return tool(name=function.name, description=function.description)(coroutine)
+    return register
+
+
+@version_of(get_site_highlights)
+async def aget_site_highlights():
+    try:
+        response = await acached_fetch(HIGHLIGHTS_URL, timeout=15)
+        response.raise_for_status()
+        return await asyncio.to_thread(highlights_from_html, response.text)
+    except Exception as e:
+        return f"Erro ao aceder às notícias em tempo real: {str(e)}"
+
+
+@version_of(get_page_navigation)
+async def aget_page_navigation(url: str) -> str:
+    try:
+        target_url = url if url.startswith('http') else f"{BASE_URL}{url}"
+        response = await acached_fetch(target_url, timeout=10)
+        return await asyncio.to_thread(navigation_from_html, response.text)
+    except Exception as e:
+        return f"Erro ao navegar: {str(e)}"
+
+
+@version_of(open_link)
+async def aopen_link(url: str, max_tokens: int = DEFAULT_MAX_TOKENS, cursor: int = 0) -> dict:
+    try:
+        target_url = full_url(url)
+        response = await acached_fetch(target_url, timeout=15)
+        response.raise_for_status()
+
+        content = await asyncio.to_thread(extract_content, response.text, target_url, max_tokens=max_tokens, cursor=cursor)
+        if not content["text"]:
+            return {"error": f"Erro ao acessar conteúdo da URL {url}."}
+        return content
+
+    except Exception:
+        return {"error": f"Erro ao acessar a URL {url}."}
+
+
+@version_of(site_search_simple)
+async def asite_search_simple(query: str) -> str:
+    try:
+        response = await afetch(SEARCH_URL, params={'SearchableText': query}, timeout=10)
+        response.raise_for_status()
+        return await asyncio.to_thread(simple_search_from_html, response.text)
+    except Exception as e:
+        return f"Erro na busca: {str(e)}"
+
+
+@version_of(site_search)
+async def asite_search(query: str, item_types: list[str] = None, date_range: str = None, sort_by: str = None) -> str:
+    try:
+        response = await afetch(SEARCH_URL, params=search_params(query, item_types, date_range, sort_by), timeout=15)
+        response.raise_for_status()
+        return await asyncio.to_thread(search_from_html, response.text, query)
+    except Exception as e:
+        return f"Erro ao realizar a busca avançada: {str(e)}"
+
+
+@version_of(read_pdf)
+async def aread_pdf(path: str, pages: str = None, query: str = None):
+    try:
+        target_url = path if os.path.exists(path) or path.startswith('http') else f"{BASE_URL}{path}"
+
+        cache = get_pdf_cache()
+        content_hash, page_count = await cache.adocument(target_url)
+        return await asyncio.to_thread(pdf_text, cache, content_hash, page_count, pages, query)
+
+    except requests.exceptions.RequestException as e:
+        return f"Erro de rede ao tentar acessar o PDF. Verifique se o link está funcionando: {path}. Erro: {e}"
+    except Exception as e:
+        return f"Erro ao processar o arquivo PDF: {e}"
+
+
+@version_of(find_pdf_links)
+async def afind_pdf_links(url: str) -> list:
+    try:
+        target_url = url if url.startswith('http') else f"{BASE_URL}{url}"
+        response = await acached_fetch(target_url, timeout=10)
+        return await asyncio.to_thread(pdf_links_from_html, response.text)
+    except Exception:
+        return []
+
+
+@version_of(open_links)
+async def aopen_links(urls: list[str], max_tokens: int = OPEN_LINKS_MAX_TOKENS, query: str = None) -> dict:
+    # As URLs são baixadas como tarefas do event loop, no máximo OPEN_LINKS_WORKERS ao mesmo tempo
+    started = time.perf_counter()
+    urls, skipped = prepare_urls(urls)
+    if not urls:
+        return {"error": "Nenhuma URL informada."}
+
+    slots = asyncio.Semaphore(OPEN_LINKS_WORKERS)
+
+    async def open_one(url: str) -> dict:
+        async with slots:
+            target_url = full_url(url)
+            with span("open_links:item", "internal", url=target_url):
+                if not DOCUMENT_LINK.search(target_url.split('?')[0]):
+                    return {"url": url, "type": "page", **await aopen_link.entrypoint(url=target_url, max_tokens=max_tokens)}
+                text = await (aread_pdf.entrypoint(path=target_url, query=query) if query else aread_pdf.entrypoint(path=target_url))
+                return clip_pdf_result(url, text, max_tokens)
+
+    tasks = {asyncio.ensure_future(open_one(url)): url for url in urls}
+    # As tarefas que não terminarem dentro do prazo continuam e deixam a página no cache
+    done, _ = await asyncio.wait(tasks, timeout=OPEN_LINKS_BUDGET)
+    for task in tasks:
+        task.add_done_callback(lambda finished: finished.cancelled() or finished.exception())
+
+    finished = {tasks[task]: task.exception() or task.result() for task in done}
+    return batch_result(urls, finished, skipped, started)
+
+
+ASYNC_VERSIONS = {function.name: function for function in (
+    aget_site_highlights, aget_page_navigation, aopen_link, aopen_links, asite_search_simple, asite_search,
+    aread_pdf, afind_pdf_links,
+)}
+
+
+def in_thread(function: Function) -> Function:
+    """
+        Versão assíncrona de uma ferramenta síncrona (Selenium, índices locais, calendário):
+        a chamada roda em uma thread, sem travar o event loop dos outros turnos.
+    """
+    entrypoint = function.entrypoint
+
+    @functools.wraps(entrypoint)
+    async def run(**kwargs):
+        return await asyncio.to_thread(entrypoint, **kwargs)
+
+    return tool(name=function.name, description=function.description)(run)
+
+
+def async_tools(tools: list) -> list:
+    """
+        Troca cada ferramenta pela versão assíncrona correspondente (ou pela mesma ferramenta
+        executada em thread), mantendo a ordem e os nomes.
+    """
+    return [ASYNC_VERSIONS.get(function.name) or in_thread(function) for function in tools]
@@ -0,0 +1,309 @@
+import os
+import time
+import json
+import atexit
+import importlib
+import threading
+from contextlib import contextmanager
+
+from tracing import span
+
+# Configurações do pool de navegadores (podem ser ajustadas pelo .env)
+POOL_SIZE = int(os.getenv("SELENIUM_POOL_SIZE", "2"))                  # Máximo de navegadores simultâneos
+POOL_WARM = int(os.getenv("SELENIUM_POOL_WARM", "0"))                  # Navegadores iniciados antecipadamente
+MAX_PAGES_PER_DRIVER = int(os.getenv("SELENIUM_MAX_PAGES", "50"))      # Recicla o navegador após N páginas
+MAX_HEAP_MB = int(os.getenv("SELENIUM_MAX_HEAP_MB", "300"))            # Recicla o navegador acima deste uso de memória JS
+QUEUE_TIMEOUT = float(os.getenv("SELENIUM_QUEUE_TIMEOUT", "30"))       # Espera máxima por um navegador livre
+PAGE_LOAD_TIMEOUT = float(os.getenv("SELENIUM_PAGE_LOAD_TIMEOUT", "30"))
+WAIT_TIMEOUT = 10      # Espera máxima pela condição de carregamento da página
+NETWORK_IDLE_MS = 500  # Tempo sem novas requisições para considerar a rede ociosa
+
+# Binários dos drivers. Com CHROMEDRIVER_PATH / GECKODRIVER_PATH o driver é usado direto (hosts
+# sem internet); sem eles, o webdriver_manager resolve o driver uma vez e o caminho fica guardado
+# em DRIVER_CACHE, reaproveitado pelos outros workers e pelas próximas subidas.
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH")
+GECKODRIVER_PATH = os.getenv("GECKODRIVER_PATH")
+DRIVER_CACHE = os.getenv("SELENIUM_DRIVER_CACHE", "tmp/webdrivers.json")
+
+
+class BrowserPoolExhausted(Exception):
+    """
+        Lançada quando nenhum navegador fica livre dentro do tempo de espera.
+    """
+
+
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+
+_driver_paths = {}
+_driver_lock = threading.Lock()
+
+
+def _read_driver_cache() -> dict:
+    try:
+        with open(DRIVER_CACHE, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _driver_path(name: str, configured: str, manager: str) -> str:
+    """
+        Caminho do binário do driver: o configurado no .env, o guardado em DRIVER_CACHE
+        ou, só se nenhum existir, o resolvido pelo webdriver_manager (que acessa a rede).
+
+        Args:
+            name (str): 'chrome' ou 'firefox'.
+            configured (str): Caminho vindo de CHROMEDRIVER_PATH / GECKODRIVER_PATH.
+            manager (str): Classe do webdriver_manager ('modulo:Classe').
+    """
+    if configured:
+        return configured
+    with _driver_lock:
+        if name not in _driver_paths:
+            cached = _read_driver_cache().get(name)
+            if cached and os.path.exists(cached):
+                _driver_paths[name] = cached
+            else:
+                module, _, cls = manager.partition(':')
+                _driver_paths[name] = getattr(importlib.import_module(module), cls)().install()
+                directory = os.path.dirname(DRIVER_CACHE)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(DRIVER_CACHE, "w", encoding="utf-8") as file:
+                    json.dump({**_read_driver_cache(), name: _driver_paths[name]}, file)
+        return _driver_paths[name]
+
+
+def _start_driver():
+    """
+        Inicia um navegador headless (Chrome, com Firefox como alternativa).
+    """
+    # O selenium só é importado quando o primeiro navegador é aberto
+    from selenium import webdriver
+
+    try:
+        options = webdriver.ChromeOptions()
+        options.add_argument('--headless=new')
+        options.add_argument('--disable-dev-shm-usage')
+
+        driver = webdriver.Chrome(
+            service=webdriver.ChromeService(
+                _driver_path("chrome", CHROMEDRIVER_PATH, "webdriver_manager.chrome:ChromeDriverManager")
+            ),
+            options=options
+        )
+    except Exception:
+        options = webdriver.FirefoxOptions()
+        options.add_argument("--headless")
+
+        driver = webdriver.Firefox(
+            service=webdriver.FirefoxService(
+                _driver_path("firefox", GECKODRIVER_PATH, "webdriver_manager.firefox:GeckoDriverManager")
+            ),
+            options=options
+        )
+
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    return driver
+
+
+def _quit(pooled: _PooledDriver):
+    try:
+        pooled.driver.quit()
+    except Exception:
+        pass
+
+
+def _heap_mb(driver):
+    # performance.memory só existe no Chrome; no Firefox a verificação é ignorada
+    try:
+        used = driver.execute_script("return window.performance.memory ? window.performance.memory.usedJSHeapSize : null")
+        return used / (1024 * 1024) if used else None
+    except Exception:
+        return None
+
+
+class BrowserPool:
+    """
+        Pool limitado de navegadores headless reaproveitados entre chamadas.
+        Os navegadores são emprestados com checkout() e devolvidos automaticamente;
+        em caso de erro o navegador é finalizado em vez de voltar ao pool.
+    """
+    def __init__(self, size: int = POOL_SIZE, max_pages: int = MAX_PAGES_PER_DRIVER, max_heap_mb: int = MAX_HEAP_MB):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_heap_mb = max_heap_mb
+
+        self._cond = threading.Condition()
+        self._idle = []
+        self._created = 0
+        self._closed = False
+
+    def _acquire(self, timeout: float) -> _PooledDriver:
+        deadline = time.monotonic() + timeout
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise BrowserPoolExhausted("O pool de navegadores foi encerrado.")
+                if self._idle:
+                    return self._idle.pop()
+                if self._created < self.size:
+                    self._created += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise BrowserPoolExhausted(f"Nenhum navegador livre após {timeout:.0f}s de espera.")
+                self._cond.wait(remaining)
+
+        # A inicialização do navegador é lenta, então é feita fora do lock
+        try:
+            return _PooledDriver(_start_driver())
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, pooled: _PooledDriver, healthy: bool):
+        pooled.pages += 1
+
+        recycle = not healthy or self._closed or pooled.pages >= self.max_pages
+        if not recycle:
+            heap = _heap_mb(pooled.driver)
+            recycle = heap is not None and heap > self.max_heap_mb
+
+        if recycle:
+            _quit(pooled)
+
+        with self._cond:
+            if recycle:
+                self._created -= 1
+            else:
+                self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def checkout(self, timeout: float = QUEUE_TIMEOUT):
+        """
+            Empresta um navegador do pool durante o bloco `with`.
+
+            Args:
+                timeout (float): Tempo máximo de espera por um navegador livre.
+
+            Raises:
+                BrowserPoolExhausted: Se o pool continuar cheio após o tempo de espera.
+        """
+        pooled = self._acquire(timeout)
+        healthy = False
+        try:
+            yield pooled.driver
+            healthy = True
+        finally:
+            self._release(pooled, healthy)
+
+    def warm(self, count: int = POOL_WARM):
+        """
+            Inicia antecipadamente até `count` navegadores e os deixa ociosos no pool.
+        """
+        started = []
+        try:
+            for _ in range(min(count, self.size)):
+                started.append(self._acquire(timeout=0))
+        except BrowserPoolExhausted:
+            pass
+        for pooled in started:
+            with self._cond:
+                self._idle.append(pooled)
+                self._cond.notify()
+
+    def close(self):
+        """
+            Finaliza todos os navegadores ociosos; os emprestados são finalizados ao retornar.
+        """
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            _quit(pooled)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> BrowserPool:
+    """
+        Retorna o pool de navegadores compartilhado (criado na primeira chamada).
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BrowserPool()
+                atexit.register(_pool.close)
+    return _pool
+
+
+def _wait_network_idle(driver, timeout: float):
+    # Considera a página pronta quando o documento terminou de carregar e nenhum
+    # novo recurso (XHR, imagens, scripts) foi requisitado por NETWORK_IDLE_MS.
+    deadline = time.monotonic() + timeout
+    last_count, stable_since = -1, time.monotonic()
+
+    while time.monotonic() < deadline:
+        state, count = driver.execute_script(
+            "return [document.readyState, performance.getEntriesByType('resource').length]"
+        )
+        now = time.monotonic()
+        if count != last_count or state != "complete":
+            last_count, stable_since = count, now
+        elif (now - stable_since) * 1000 >= NETWORK_IDLE_MS:
+            return
+        time.sleep(0.1)
+
+
+def render_page(url: str, wait_for_selector: str = None, wait_timeout: float = WAIT_TIMEOUT) -> str:
+    """
+        Carrega a URL em um navegador do pool e retorna o HTML final do DOM.
+
+        Args:
+            url (str): URL absoluta da página.
+            wait_for_selector (str): Seletor CSS que deve existir antes de capturar o HTML.
+                                     Se omitido, espera a rede ficar ociosa.
+            wait_timeout (float): Tempo máximo de espera pela condição.
+
+        Returns:
+            str: HTML da página após o carregamento.
+    """
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    with span("browser.render", "browser", url=url) as current, get_pool().checkout() as driver:
+        driver.get(url)
+
+        # Se a condição não for atendida a tempo, devolve o que já foi carregado
+        try:
+            if wait_for_selector:
+                WebDriverWait(driver, wait_timeout).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, wait_for_selector))
+                )
+            else:
+                _wait_network_idle(driver, wait_timeout)
+        except TimeoutException:
+            if current:
+                current.set(wait_timeout=True)
+
+        html = driver.page_source
+        if current:
+            current.set(html_chars=len(html))
+        return html
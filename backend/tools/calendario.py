@@ -0,0 +1,517 @@
+import os
+import re
+import sys
+import time
+import logging
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+
+from tools.http_client import fetch
+from tools.http_cache import cached_fetch
+from tools.pdf_cache import get_pdf_cache
+from tools.content_extractor import PARSER, DOCUMENT_LINK
+from tools.text_utils import fold_accents
+from tools.lazy_import import lazy_import
+
+fitz = lazy_import("fitz")
+
+logger = logging.getLogger(__name__)
+
+# Datas do calendário acadêmico e cardápios do refeitório extraídos dos PDFs do site.
+# Cada PDF só é reprocessado quando o conteúdo muda (hash do cache de PDFs).
+CALENDARIO_DB = os.getenv("CALENDARIO_DB", "tmp/calendario.db")
+CALENDAR_PAGE = "https://www.ifsudestemg.edu.br/documentos-institucionais/unidades/barbacena/diretorias-sistemicas/ensino/calendario-academico"
+# Páginas onde os cardápios costumam ser publicados (separadas por vírgula no .env)
+MENU_PAGES = os.getenv("CARDAPIO_PAGES", ",".join([
+    "https://www.ifsudestemg.edu.br/barbacena/institucional/ensino/apoio-ao-discente/assistencia-estudantil",
+    "https://www.ifsudestemg.edu.br/noticias/barbacena",
+])).split(",")
+REFRESH_AFTER = float(os.getenv("CALENDARIO_REFRESH_HOURS", "6")) * 3600
+MAX_SOURCES = 6  # PDFs mais recentes processados por tipo em cada atualização
+
+MONTHS = {'janeiro': 1, 'fevereiro': 2, 'marco': 3, 'abril': 4, 'maio': 5, 'junho': 6, 'julho': 7,
+          'agosto': 8, 'setembro': 9, 'outubro': 10, 'novembro': 11, 'dezembro': 12}
+MEALS = ("Café da manhã", "Almoço", "Lanche", "Jantar")
+WEEKDAYS = {'segunda': 0, 'terca': 1, 'quarta': 2, 'quinta': 3, 'sexta': 4, 'sabado': 5, 'domingo': 6}
+
+_MONTH_NAMES = "|".join(MONTHS)
+_DAY = r'(\d{1,2})'
+_NUMERIC = r'(\d{1,2})/(\d{1,2})(?:/(\d{2,4}))?'
+# "03/02 a 07/02/2025", "03 a 07/02", "03/02/2025", "3 de março de 2025", "3 a 7 de março"
+_RANGE_NUMERIC = re.compile(rf'{_NUMERIC}\s*(?:a|ate|-|–)\s*{_NUMERIC}')
+_RANGE_DAYS = re.compile(rf'\b{_DAY}\s*(?:a|e|-|–)\s*{_NUMERIC}')
+_SINGLE_NUMERIC = re.compile(rf'(?<![\d/]){_NUMERIC}(?![\d/])')
+_RANGE_TEXT = re.compile(rf'\b{_DAY}(?:\s+de\s+({_MONTH_NAMES}))?\s*(?:a|ate|-|–)\s*{_DAY}\s+de\s+({_MONTH_NAMES})(?:\s+de\s+(\d{{4}}))?')
+_SINGLE_TEXT = re.compile(rf'\b{_DAY}(?:o|º)?\s+de\s+({_MONTH_NAMES})(?:\s+de\s+(\d{{4}}))?')
+_YEAR = re.compile(r'\b(20\d{2})\b')
+_LETTERS = re.compile(r'[^\W\d_]{3,}', re.UNICODE)
+_EDGE = re.compile(r'^[\s\-–—:|,.;·•]+|[\s\-–—:|,.;·•]+$')
+
+
+def _year(value, default: int) -> int:
+    if not value:
+        return default
+    value = int(value)
+    return value + 2000 if value < 100 else value
+
+
+def _date(year: int, month: int, day: int):
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def document_year(text: str, default: int = None) -> int:
+    """
+        Ano de referência de um documento: o ano (20xx) mais citado no texto.
+    """
+    years = _YEAR.findall(text)
+    if not years:
+        return default or date.today().year
+    return int(max(set(years), key=years.count))
+
+
+def find_dates(line: str, year: int) -> tuple:
+    """
+        Procura uma data ou intervalo de datas em uma linha de texto.
+
+        Returns:
+            tuple: (início, fim, linha sem a expressão de data) ou (None, None, linha).
+    """
+    folded = fold_accents(line)  # Mesmo tamanho do original para as letras usadas nas expressões
+
+    match = _RANGE_NUMERIC.search(folded)
+    if match:
+        d1, m1, y1, d2, m2, y2 = match.groups()
+        end_year = _year(y2, year)
+        start, end = _date(_year(y1, end_year), int(m1), int(d1)), _date(end_year, int(m2), int(d2))
+    elif (match := _RANGE_TEXT.search(folded)):
+        d1, month1, d2, month2, y = match.groups()
+        end_year = _year(y, year)
+        start = _date(end_year, MONTHS[month1 or month2], int(d1))
+        end = _date(end_year, MONTHS[month2], int(d2))
+    elif (match := _RANGE_DAYS.search(folded)):
+        d1, d2, m, y = match.groups()
+        start, end = _date(_year(y, year), int(m), int(d1)), _date(_year(y, year), int(m), int(d2))
+    elif (match := _SINGLE_TEXT.search(folded)):
+        d, month, y = match.groups()
+        start = end = _date(_year(y, year), MONTHS[month], int(d))
+    elif (match := _SINGLE_NUMERIC.search(folded)):
+        d, m, y = match.groups()
+        start = end = _date(_year(y, year), int(m), int(d))
+    else:
+        return None, None, line
+
+    if not start or not end:
+        return None, None, line
+    if end < start:  # Intervalo que atravessa o ano (ex: 20/12 a 05/01)
+        start = _date(start.year - 1, start.month, start.day) or start
+    rest = (line[:match.start()] + " " + line[match.end():]).strip()
+    return start, end, _EDGE.sub("", " ".join(rest.split()))
+
+
+def _page_lines(page) -> list:
+    """
+        Linhas de uma página do PDF: as linhas de cada tabela (células unidas por ' | ')
+        seguidas das linhas de texto fora das tabelas.
+    """
+    lines, areas = [], []
+    try:
+        tables = page.find_tables().tables
+    except Exception:
+        tables = []
+    for table in tables:
+        areas.append(fitz.Rect(table.bbox))
+        for row in table.extract():
+            cells = [" ".join((cell or "").split()) for cell in row]
+            if any(cells):
+                lines.append(" | ".join(cell for cell in cells if cell))
+
+    for block in page.get_text("blocks"):
+        if any(fitz.Rect(block[:4]).intersects(area) for area in areas):
+            continue
+        lines.extend(line.strip() for line in block[4].splitlines() if line.strip())
+    return lines
+
+
+def extract_events(doc) -> list:
+    """
+        Extrai os eventos do calendário acadêmico: cada linha (de texto ou de tabela) com uma
+        data ou intervalo e uma descrição vira um evento.
+
+        Returns:
+            list: Tuplas (início, fim, descrição, número da página).
+    """
+    year = document_year("".join(page.get_text() for page in doc))
+    events, seen = [], set()
+    for number, page in enumerate(doc, start=1):
+        for line in _page_lines(page):
+            start, end, description = find_dates(line, year)
+            if not start or len(_LETTERS.findall(description)) < 1:
+                continue
+            key = (start, end, fold_accents(description))
+            if key not in seen:
+                seen.add(key)
+                events.append((start, end, description, number))
+    return events
+
+
+def _weekday(text: str):
+    folded = fold_accents(text)
+    for name, number in WEEKDAYS.items():
+        if re.search(rf'\b{name}', folded):
+            return number
+    return None
+
+
+def extract_menus(doc) -> list:
+    """
+        Extrai os cardápios semanais. Nas tabelas, as colunas são os dias (cabeçalho com o dia
+        da semana e/ou a data) e as linhas são os itens (a primeira célula é o nome do item,
+        ex: 'Prato principal'). O título da tabela (ex: 'Almoço') vira a refeição.
+
+        Returns:
+            list: Tuplas (dia, refeição, itens).
+    """
+    text = "".join(page.get_text() for page in doc)
+    year = document_year(text)
+    week_start, _, _ = find_dates(text, year)  # "Cardápio de 03/02 a 07/02": segunda-feira da semana
+
+    menus = []
+    for page in doc:
+        try:
+            tables = page.find_tables().tables
+        except Exception:
+            tables = []
+        for table in tables:
+            rows = [[" ".join((cell or "").split()) for cell in row] for row in table.extract()]
+            if len(rows) < 2:
+                continue
+
+            # Cabeçalho: a primeira linha com dias da semana ou datas
+            header_index = next((i for i, row in enumerate(rows)
+                                 if sum(1 for cell in row if _weekday(cell) is not None or find_dates(cell, year)[0]) >= 2), None)
+            if header_index is None:
+                continue
+            # Semana da tabela: a data mais próxima acima dela (PDFs com várias semanas) ou a do documento
+            above = page.get_text("text", clip=fitz.Rect(0, max(table.bbox[1] - 80, 0), page.rect.width, table.bbox[1]))
+            table_week = find_dates(above, year)[0] or week_start
+
+            days = {}
+            for column, cell in enumerate(rows[header_index]):
+                day, _, _ = find_dates(cell, year)
+                weekday = _weekday(cell)
+                if not day and weekday is not None and table_week:
+                    day = table_week + timedelta(days=weekday - table_week.weekday())
+                if day:
+                    days[column] = day
+
+            meal = next((name for name in MEALS if fold_accents(name) in fold_accents(above)), None)
+
+            items = {}
+            for row in rows[header_index + 1:]:
+                label = row[0] if row and row[0] and 0 not in days else None
+                for column, day in days.items():
+                    if column < len(row) and row[column]:
+                        items.setdefault(day, []).append(f"{label}: {row[column]}" if label else row[column])
+            for day, lines in items.items():
+                menus.append((day, meal, "\n".join(lines)))
+
+    if menus:
+        return menus
+
+    # Sem tabelas: linhas como "Segunda-feira (03/02): arroz, feijão, ..."
+    for page in doc:
+        for line in _page_lines(page):
+            day, _, rest = find_dates(line, year)
+            weekday = _weekday(line)
+            if not day and weekday is not None and week_start:
+                day = week_start + timedelta(days=weekday - week_start.weekday())
+            rest = re.sub(r'(?i)^(segunda|terça|terca|quarta|quinta|sexta|sábado|sabado|domingo)(-feira)?\s*[:\-–()]*', '', rest).strip(" :-–()")
+            if day and weekday is not None and len(_LETTERS.findall(rest)) >= 2:
+                menus.append((day, None, rest))
+    return menus
+
+
+class CalendarStore:
+    """
+        Eventos do calendário e cardápios em SQLite, indexados por data. Cada PDF de origem
+        é registrado com o hash do conteúdo e só é reprocessado quando ele muda.
+    """
+    def __init__(self, db_file: str = CALENDARIO_DB, refresh_after: float = REFRESH_AFTER):
+        self.refresh_after = refresh_after
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sources (
+                url TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                title TEXT,
+                content_hash TEXT NOT NULL,
+                ingested_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY,
+                source_url TEXT NOT NULL,
+                start_date TEXT NOT NULL,
+                end_date TEXT NOT NULL,
+                description TEXT NOT NULL,
+                page_no INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_events_dates ON events (start_date, end_date);
+            CREATE TABLE IF NOT EXISTS menus (
+                id INTEGER PRIMARY KEY,
+                source_url TEXT NOT NULL,
+                day TEXT NOT NULL,
+                meal TEXT,
+                items TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_menus_day ON menus (day);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self._conn.commit()
+
+    def ingest(self, url: str, kind: str, title: str = None) -> bool:
+        """
+            Processa um PDF de calendário ('calendar') ou de cardápio ('menu') se ele for novo
+            ou tiver mudado desde a última vez.
+
+            Returns:
+                bool: True se o PDF foi (re)processado.
+        """
+        content_hash, _ = get_pdf_cache().document(url)
+        with self._lock:
+            row = self._conn.execute("SELECT content_hash FROM sources WHERE url = ?", (url,)).fetchone()
+        if row and row[0] == content_hash:
+            return False
+
+        # As tabelas precisam do PDF (o cache guarda só o texto); só acontece quando o arquivo muda
+        if os.path.exists(url):
+            doc = fitz.open(url, filetype="pdf")
+        else:
+            response = fetch(url, timeout=30)
+            response.raise_for_status()
+            doc = fitz.open(stream=response.content, filetype="pdf")
+        with doc:
+            rows = extract_events(doc) if kind == "calendar" else extract_menus(doc)
+
+        with self._lock:
+            self._conn.execute("DELETE FROM events WHERE source_url = ?", (url,))
+            self._conn.execute("DELETE FROM menus WHERE source_url = ?", (url,))
+            if kind == "calendar":
+                self._conn.executemany(
+                    "INSERT INTO events (source_url, start_date, end_date, description, page_no) VALUES (?, ?, ?, ?, ?)",
+                    [(url, start.isoformat(), end.isoformat(), description, page) for start, end, description, page in rows]
+                )
+            else:
+                self._conn.executemany(
+                    "INSERT INTO menus (source_url, day, meal, items) VALUES (?, ?, ?, ?)",
+                    [(url, day.isoformat(), meal, items) for day, meal, items in rows]
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources (url, kind, title, content_hash, ingested_at) VALUES (?, ?, ?, ?, ?)",
+                (url, kind, title, content_hash, time.time())
+            )
+            self._conn.commit()
+        return True
+
+    def refresh(self) -> dict:
+        """
+            Procura os PDFs de calendário e de cardápio no site e processa os novos ou alterados.
+
+            Returns:
+                dict: Quantidade de PDFs encontrados e reprocessados por tipo.
+        """
+        summary, errors = {}, []
+        for kind, pages, pattern in (("calendar", [CALENDAR_PAGE], "calendario"), ("menu", MENU_PAGES, "cardapio")):
+            try:
+                found = discover_pdfs(pages, pattern)
+            except ConnectionError as e:
+                errors.append(str(e))
+                continue
+            changed = 0
+            for url, title in found[:MAX_SOURCES]:
+                try:
+                    changed += self.ingest(url, kind, title)
+                except Exception as e:
+                    logger.warning("Falha ao processar %s: %s", url, e)
+            summary[kind] = {"found": len(found), "changed": changed}
+
+        # Com o site fora do ar a verificação não conta: a próxima chamada tenta de novo
+        # em vez de deixar o calendário vazio por REFRESH_AFTER
+        if not summary:
+            raise ConnectionError("; ".join(errors))
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('refreshed_at', ?)", (str(time.time()),))
+            self._conn.commit()
+        return summary
+
+    def ensure_fresh(self):
+        """
+            Atualiza a partir do site se a última verificação passou de REFRESH_AFTER.
+            Só uma thread atualiza por vez; as demais usam os dados atuais.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'refreshed_at'").fetchone()
+        if row and time.time() - float(row[0]) < self.refresh_after:
+            return
+        if not self._refresh_lock.acquire(blocking=row is None):
+            return
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning("Falha ao atualizar calendário/cardápios: %s", e)
+        finally:
+            self._refresh_lock.release()
+
+    def events(self, start: date, end: date, query: str = None, limit: int = 30) -> list:
+        """
+            Eventos que acontecem (ao menos em parte) entre `start` e `end`, em ordem de data.
+            `query` filtra pela descrição, sem diferenciar acentos.
+        """
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT start_date, end_date, description, source_url, page_no FROM events
+                WHERE start_date <= ? AND end_date >= ?
+                ORDER BY start_date, end_date
+            """, (end.isoformat(), start.isoformat())).fetchall()
+
+        words = [word[:5] for word in _LETTERS.findall(fold_accents(query or ""))]
+        results = []
+        for start_date, end_date, description, url, page in rows:
+            if words and not all(word in fold_accents(description) for word in words):
+                continue
+            results.append({"start": start_date, "end": end_date, "description": description, "url": url, "page": page})
+        return results[:limit]
+
+    def menus(self, day: date) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT meal, items, source_url FROM menus WHERE day = ? ORDER BY id", (day.isoformat(),)
+            ).fetchall()
+        return [{"meal": meal, "items": items, "url": url} for meal, items, url in rows]
+
+    def menu_range(self) -> tuple:
+        with self._lock:
+            return self._conn.execute("SELECT MIN(day), MAX(day) FROM menus").fetchone()
+
+
+def discover_pdfs(pages: list, pattern: str) -> list:
+    """
+        Procura links de PDF cujo texto ou endereço contenha `pattern` nas páginas informadas
+        e nas subpastas delas que também contenham `pattern` (um nível), do ano mais recente
+        para o mais antigo.
+
+        Returns:
+            list: Tuplas (url, título).
+
+        Raises:
+            ConnectionError: Se nenhuma das páginas pôde ser acessada.
+    """
+    found, folders, reached = {}, [], 0
+    for page_url in pages:
+        try:
+            response = cached_fetch(page_url.strip(), timeout=15)
+            response.raise_for_status()
+        except Exception as e:
+            logger.warning("Falha ao acessar %s: %s", page_url, e)
+            continue
+        reached += 1
+        for url, title, is_pdf in _links(response.text, page_url, pattern):
+            if is_pdf:
+                found.setdefault(url, title)
+            elif len(folders) < 5:
+                folders.append(url)
+
+    for folder in folders:
+        try:
+            response = cached_fetch(folder, timeout=15)
+            response.raise_for_status()
+        except Exception:
+            continue
+        for url, title, is_pdf in _links(response.text, folder, pattern):
+            if is_pdf:
+                found.setdefault(url, title)
+
+    if not reached:
+        raise ConnectionError(f"Nenhuma página acessível para '{pattern}': {', '.join(pages)}")
+
+    def recency(item):
+        years = _YEAR.findall(f"{item[0]} {item[1]}")
+        return max(map(int, years)) if years else 0
+
+    return sorted(found.items(), key=recency, reverse=True)
+
+
+def _links(html: str, base_url: str, pattern: str):
+    soup = BeautifulSoup(html, PARSER)
+    for a in soup.find_all('a', href=True):
+        url = urljoin(base_url, a['href']).split('#')[0]
+        title = a.get_text(" ", strip=True)
+        if pattern not in fold_accents(f"{title} {url}"):
+            continue
+        is_pdf = bool(DOCUMENT_LINK.search(url)) or url.lower().endswith('.pdf')
+        if is_pdf or url.startswith(base_url.rstrip('/') + '/'):
+            yield url, title, is_pdf
+
+
+def parse_user_date(text: str, today: date = None):
+    """
+        Converte a data informada pelo agente ('hoje', 'amanhã', '03/02', '03/02/2025', '2025-02-03').
+    """
+    today = today or date.today()
+    if not text:
+        return None
+    folded = fold_accents(text.strip())
+    if folded in ('hoje', 'today'):
+        return today
+    if folded in ('amanha', 'tomorrow'):
+        return today + timedelta(days=1)
+    if folded == 'ontem':
+        return today - timedelta(days=1)
+    try:
+        return datetime.strptime(folded, '%Y-%m-%d').date()
+    except ValueError:
+        pass
+    start, _, _ = find_dates(text, today.year)
+    return start
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> CalendarStore:
+    """
+        Retorna o banco de calendário/cardápios compartilhado (criado na primeira chamada).
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CalendarStore()
+    return _store
+
+
+if __name__ == '__main__':
+    # Uso: python -m tools.calendario                      (procura e processa os PDFs do site)
+    #      python -m tools.calendario <url do pdf> calendar|menu
+    store = get_store()
+    if len(sys.argv) > 2:
+        print("Processado." if store.ingest(sys.argv[1], sys.argv[2]) else "Sem alterações.")
+    else:
+        print(store.refresh())
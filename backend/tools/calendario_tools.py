@@ -0,0 +1,90 @@
+from datetime import date, timedelta
+from agno.tools import tool
+from tools.calendario import get_store, parse_user_date, CALENDAR_PAGE
+
+def _br(iso: str) -> str:
+    year, month, day = iso.split('-')
+    return f"{day}/{month}/{year}"
+
+@tool(name='calendar_events',
+      description='CALENDÁRIO ACADÊMICO: Retorna os eventos do calendário acadêmico (início/fim de semestre, férias, feriados, provas, matrículas, recessos) entre duas datas, já extraídos dos PDFs do calendário. Use SEMPRE para perguntas sobre datas acadêmicas (ex: "quando começam as férias"), ANTES de navegar e ler os PDFs. Datas no formato dd/mm/aaaa, "hoje" ou "amanhã"; `query` filtra pelo assunto (ex: "férias").')
+def calendar_events(start: str = None, end: str = None, query: str = None, url: str = None) -> str:
+    """
+        Lista os eventos do calendário acadêmico que acontecem entre `start` e `end`.
+
+        Args:
+            start (str): Data inicial (padrão: hoje).
+            end (str): Data final (padrão: 60 dias após a inicial; 1 ano quando há `query`).
+            query (str): Assunto dos eventos (ex: 'férias', 'matrícula') (opcional).
+            url (str): PDF de calendário específico a processar antes da consulta (opcional).
+
+        Returns:
+            str: Os eventos em ordem de data, com a fonte, ou uma mensagem indicando que nada foi encontrado.
+    """
+    try:
+        first = parse_user_date(start) if start else date.today()
+        if not first:
+            return f"Data inválida: '{start}'. Use o formato dd/mm/aaaa."
+        last = parse_user_date(end) if end else first + timedelta(days=365 if query else 60)
+        if not last:
+            return f"Data inválida: '{end}'. Use o formato dd/mm/aaaa."
+
+        store = get_store()
+        if url:
+            store.ingest(url, "calendar")
+        store.ensure_fresh()
+
+        events = store.events(first, last, query=query)
+        period = f"{first.strftime('%d/%m/%Y')} e {last.strftime('%d/%m/%Y')}"
+        if not events:
+            return (f"Nenhum evento do calendário acadêmico entre {period}"
+                    + (f" sobre '{query}'" if query else "") + f". Os calendários estão em {CALENDAR_PAGE}.")
+
+        results = [f"Eventos do calendário acadêmico entre {period}:"]
+        for event in events:
+            when = _br(event["start"]) if event["start"] == event["end"] else f"{_br(event['start'])} a {_br(event['end'])}"
+            results.append(f"- {when}: {event['description']}")
+        sources = dict.fromkeys(f"{event['url']} (página {event['page']})" for event in events)
+        results.append("\nFonte: " + "; ".join(sources))
+        return "\n".join(results)
+
+    except Exception as e:
+        return f"Erro ao consultar o calendário acadêmico: {str(e)}"
+
+@tool(name='get_cardapio',
+      description='CARDÁPIO DO REFEITÓRIO: Retorna o cardápio de um dia (refeições e pratos), já extraído dos PDFs de cardápio publicados no site. Use SEMPRE que perguntarem o que tem para comer/almoçar ou o cardápio de um dia, ANTES de procurar o PDF. Data no formato dd/mm/aaaa, "hoje" (padrão) ou "amanhã". Se encontrar um PDF de cardápio por outro caminho, passe-o em `url`.')
+def get_cardapio(day: str = None, url: str = None) -> str:
+    """
+        Retorna o cardápio do refeitório para um dia.
+
+        Args:
+            day (str): Data desejada (padrão: hoje).
+            url (str): PDF de cardápio específico a processar antes da consulta (opcional).
+
+        Returns:
+            str: As refeições do dia, com a fonte, ou uma mensagem indicando o período disponível.
+    """
+    try:
+        target = parse_user_date(day) if day else date.today()
+        if not target:
+            return f"Data inválida: '{day}'. Use o formato dd/mm/aaaa."
+
+        store = get_store()
+        if url:
+            store.ingest(url, "menu")
+        store.ensure_fresh()
+
+        menus = store.menus(target)
+        if not menus:
+            first, last = store.menu_range()
+            available = f" Há cardápios de {_br(first)} a {_br(last)}." if first else ""
+            return f"Nenhum cardápio encontrado para {target.strftime('%d/%m/%Y')}.{available}"
+
+        results = [f"Cardápio de {target.strftime('%d/%m/%Y')}:"]
+        for menu in menus:
+            results.append(f"\n{menu['meal'] or 'Refeição'}:\n{menu['items']}")
+        results.append("\nFonte: " + "; ".join(dict.fromkeys(menu["url"] for menu in menus)))
+        return "\n".join(results)
+
+    except Exception as e:
+        return f"Erro ao consultar o cardápio: {str(e)}"
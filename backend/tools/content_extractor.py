@@ -0,0 +1,163 @@
+import re
+from urllib.parse import urljoin, urldefrag
+from bs4 import BeautifulSoup
+from tracing import span
+from tools.lazy_import import lazy_import
+
+markdownify = lazy_import("markdownify")
+
+# Parser do BeautifulSoup usado pelas ferramentas (lxml é bem mais rápido que html.parser)
+PARSER = 'lxml'
+
+DEFAULT_MAX_TOKENS = 2000
+DEFAULT_MAX_LINKS = 40
+CHARS_PER_TOKEN = 4  # Aproximação usada para estimar tokens sem depender de um tokenizador
+
+# Regiões de conteúdo principal, em ordem de preferência (layout Plone/Portal Padrão primeiro)
+MAIN_SELECTORS = ['#content', '#content-core', 'main', 'article', '[role=main]', '#main-content']
+
+# Elementos de navegação e "casca" do portal que nunca interessam ao agente
+CHROME_TAGS = ['script', 'style', 'noscript', 'iframe', 'svg', 'header', 'footer', 'nav', 'aside']
+CHROME_SELECTORS = [
+    '#portal-header', '#portal-footer', '#portal-footer-signature', '#portal-column-one', '#portal-column-two',
+    '#portal-breadcrumbs', '#portal-siteactions', '#portal-searchbox', '#viewlet-social-like', '#barra-brasil',
+    '.portletWrapper', '.documentActions', '.hiddenStructure', '.menu', '.navbar', '.breadcrumb', '.skip-link',
+]
+
+DOCUMENT_LINK = re.compile(r'\.pdf$|at_download/file', re.IGNORECASE)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+        Estima a quantidade de tokens de um texto (aproximadamente 4 caracteres por token).
+    """
+    return len(text) // CHARS_PER_TOKEN
+
+
+def _strip_chrome(soup: BeautifulSoup):
+    for tag in soup(CHROME_TAGS):
+        tag.decompose()
+    for selector in CHROME_SELECTORS:
+        for tag in soup.select(selector):
+            tag.decompose()
+
+
+def _main_region(soup: BeautifulSoup):
+    for selector in MAIN_SELECTORS:
+        region = soup.select_one(selector)
+        if region and region.get_text(strip=True):
+            return region
+    return soup.body or soup
+
+
+def _ranked_links(region, base_url: str, max_links: int) -> list:
+    """
+        Remove links duplicados e ordena priorizando documentos e links internos do site,
+        mantendo a ordem em que aparecem no conteúdo como critério de desempate.
+    """
+    seen = {}
+    for position, a in enumerate(region.find_all('a', href=True)):
+        href = a['href'].strip()
+        if not href or href.startswith(('#', 'javascript:')):
+            continue
+
+        url = urldefrag(urljoin(base_url, href))[0]
+        text = a.get_text(" ", strip=True)
+
+        if url in seen:
+            # Mantém o texto mais descritivo entre as ocorrências do mesmo link
+            if text and len(text) > len(seen[url]["text"] or ""):
+                seen[url]["text"] = text
+            continue
+
+        score = 0
+        if DOCUMENT_LINK.search(url):
+            score += 2
+        if 'ifsudestemg.edu.br' in url or url.startswith('mailto:'):
+            score += 1
+        if not text:
+            score -= 2
+
+        seen[url] = {"text": text or None, "url": url, "_score": score, "_position": position}
+
+    ranked = sorted(seen.values(), key=lambda link: (-link["_score"], link["_position"]))
+    return [{"text": link["text"], "url": link["url"]} for link in ranked[:max_links]]
+
+
+def _to_markdown(region) -> str:
+    # Os links são devolvidos à parte, então no texto fica apenas o texto âncora
+    markdown = markdownify.markdownify(str(region), heading_style="ATX", strip=['a', 'img'])
+    markdown = re.sub(r'[ \t]+\n', '\n', markdown)
+    markdown = re.sub(r'\n{3,}', '\n\n', markdown)
+    return markdown.strip()
+
+
+def _cut(text: str, start: int, max_chars: int):
+    """
+        Corta o texto a partir de `start` em um limite de parágrafo ou linha que caiba em `max_chars`.
+        Retorna o trecho e a posição de continuação (ou None se o texto acabou).
+    """
+    end = start + max_chars
+    if end >= len(text):
+        return text[start:], None
+
+    for separator in ('\n\n', '\n', ' '):
+        boundary = text.rfind(separator, start + max_chars // 2, end)
+        if boundary != -1:
+            return text[start:boundary], boundary + len(separator)
+    return text[start:end], end
+
+
+def extract_content(html: str, base_url: str, max_tokens: int = DEFAULT_MAX_TOKENS,
+                    cursor: int = 0, max_links: int = DEFAULT_MAX_LINKS) -> dict:
+    """
+        Isola o conteúdo principal de uma página HTML, remove menus, cabeçalho e rodapé,
+        e converte o resultado para Markdown compacto dentro de um orçamento de tokens.
+
+        Args:
+            html (str): HTML da página.
+            base_url (str): URL da página, usada para tornar os links absolutos.
+            max_tokens (int): Orçamento aproximado de tokens para o texto retornado.
+            cursor (int): Posição de continuação devolvida em uma chamada anterior (0 = início).
+            max_links (int): Quantidade máxima de links retornados.
+
+        Returns:
+            dict:
+            {
+                "text": "<trecho em Markdown>",
+                "links": [ { "text": "...", "url": "..." }, ... ],  (somente no primeiro trecho)
+                "next_cursor": <int ou None>,
+                "tokens": <tokens estimados do retorno>,
+                "tokens_saved": <tokens economizados em relação à página completa>
+            }
+    """
+    with span("extract", "internal", html_chars=len(html)) as current:
+        result = _extract(html, base_url, max_tokens, cursor, max_links)
+        if current:
+            current.set(tokens=result["tokens"], tokens_saved=result["tokens_saved"])
+        return result
+
+
+def _extract(html: str, base_url: str, max_tokens: int, cursor: int, max_links: int) -> dict:
+    soup = BeautifulSoup(html, PARSER)
+
+    # Tamanho da página "crua" (todo o texto + todos os links), usado como referência de economia
+    all_links = sum(len(a.get_text(strip=True)) + len(a['href']) for a in soup.find_all('a', href=True))
+    baseline_tokens = estimate_tokens(soup.get_text(" ", strip=True)) + all_links // CHARS_PER_TOKEN
+
+    _strip_chrome(soup)
+    region = _main_region(soup)
+
+    markdown = _to_markdown(region)
+    text, next_cursor = _cut(markdown, max(cursor, 0), max(max_tokens, 1) * CHARS_PER_TOKEN)
+    links = _ranked_links(region, base_url, max_links) if not cursor else []
+
+    tokens = estimate_tokens(text) + sum(len(link["text"] or "") + len(link["url"]) for link in links) // CHARS_PER_TOKEN
+
+    return {
+        "text": text,
+        "links": links,
+        "next_cursor": next_cursor,
+        "tokens": tokens,
+        "tokens_saved": max(baseline_tokens - tokens, 0),
+    }
@@ -0,0 +1,379 @@
+import os
+import re
+import sys
+import time
+import logging
+import sqlite3
+import threading
+from difflib import SequenceMatcher
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+
+from tools.http_client import fetch
+from tools.content_extractor import PARSER
+from tools.text_utils import fold_accents
+
+# Diretório do corpo docente: a página é lida uma vez, vira registros estruturados
+# (nome, área, e-mail, Lattes, departamento) e é relida quando fica mais velha que REFRESH_HOURS
+DOCENTES_DB = os.getenv("DOCENTES_DB", "tmp/docentes.db")
+DOCENTES_URL = "https://www.ifsudestemg.edu.br/barbacena/institucional/corpo-docente"
+REFRESH_AFTER = float(os.getenv("DOCENTES_REFRESH_HOURS", "24")) * 3600
+RETRY_AFTER = 15 * 60   # Espera antes de tentar de novo depois de uma atualização que falhou
+MIN_SCORE = 0.75        # Similaridade mínima (0 a 1) entre o nome buscado e o do docente
+
+logger = logging.getLogger(__name__)
+
+_EMAIL = re.compile(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+_NAME_WORDS = re.compile(r'[^\W\d_]+', re.UNICODE)
+_SEPARATORS = re.compile(r'\s*[|;–—]\s*|\s+-\s+|\n+')
+
+# Cabeçalhos de tabela reconhecidos para cada campo (comparados sem acentos)
+COLUMNS = {
+    "name": ("nome", "docente", "professor"),
+    "area": ("area", "formacao", "disciplina", "titulacao", "atuacao"),
+    "email": ("e-mail", "email", "contato"),
+    "lattes": ("lattes", "curriculo"),
+    "department": ("departamento", "nucleo", "coordenacao", "setor", "lotacao"),
+}
+# Palavras de nomes que não ajudam a diferenciar pessoas
+NAME_STOPWORDS = {'da', 'das', 'de', 'do', 'dos', 'e', 'prof', 'profa', 'professor', 'professora', 'dr', 'dra', 'me', 'ma'}
+CHROME_SELECTORS = 'script, style, nav, header, footer, #portal-header, #portal-footer, #portal-column-one, #portal-column-two'
+
+
+def _text(tag) -> str:
+    return " ".join(tag.get_text(" ", strip=True).split()) if tag else ""
+
+
+def _column(header: str):
+    folded = fold_accents(header)
+    for field, names in COLUMNS.items():
+        if any(name in folded for name in names):
+            return field
+    return None
+
+
+def _links(tag, base_url: str) -> dict:
+    found = {"email": None, "lattes": None, "page": None}
+    for a in tag.find_all('a', href=True):
+        href = a['href'].strip()
+        if href.lower().startswith('mailto:'):
+            found["email"] = found["email"] or href[7:].split('?')[0]
+        elif 'lattes.cnpq.br' in href:
+            found["lattes"] = found["lattes"] or href
+        elif not found["page"] and _text(a) and not href.startswith('#'):
+            found["page"] = urljoin(base_url, href)
+    if not found["email"]:
+        match = _EMAIL.search(tag.get_text(" "))
+        found["email"] = match.group(0) if match else None
+    return found
+
+
+def _record(name: str, area: str = None, email: str = None, lattes: str = None,
+            department: str = None, page: str = None):
+    name = " ".join((name or "").split()).strip(" :-,")
+    if len(_NAME_WORDS.findall(name)) < 2 or _EMAIL.search(name):
+        return None
+    return {"name": name, "area": area or None, "email": email, "lattes": lattes,
+            "department": department or None, "page": page}
+
+
+def _table_records(table, base_url: str, department: str) -> list:
+    rows = table.find_all('tr')
+    if not rows:
+        return []
+
+    header_cells = rows[0].find_all(['th', 'td'])
+    columns = [_column(_text(cell)) for cell in header_cells]
+    if "name" not in columns:
+        columns = ["name"] + [None] * (len(header_cells) - 1)  # Sem cabeçalho: o nome vem na primeira coluna
+    else:
+        rows = rows[1:]
+
+    records = []
+    for row in rows:
+        cells = row.find_all(['td', 'th'])
+        values = {}
+        for field, cell in zip(columns, cells):
+            if field and field not in values:
+                values[field] = _text(cell)
+        links = _links(row, base_url)
+        record = _record(
+            values.get("name"), area=values.get("area"),
+            email=links["email"] or (values.get("email") if _EMAIL.fullmatch(values.get("email") or "") else None),
+            lattes=links["lattes"], department=values.get("department") or department,
+        )
+        if record:
+            records.append(record)
+    return records
+
+
+def _block_record(block, base_url: str, department: str):
+    links = _links(block, base_url)
+    text = _text(block)
+
+    strong = block.find(['strong', 'b', 'h3', 'h4'])
+    name = _text(strong) if strong else None
+    if not name:
+        link = block.find('a', href=True)
+        name = _text(link) if link and not link['href'].lower().startswith('mailto:') else None
+    if not name:
+        name = _SEPARATORS.split(text)[0]
+
+    # O restante do texto, sem o nome, o e-mail e rótulos, descreve a área de atuação
+    rest = text.replace(name, "", 1)
+    if links["email"]:
+        rest = rest.replace(links["email"], "")
+    rest = re.sub(r'(?i)\b(e-?mail|lattes|curr[ií]culo(\s+lattes)?|área|formação)\s*:?', ' ', rest)
+    area = " ".join(part for part in _SEPARATORS.split(rest) if part.strip(" :-,.")).strip(" :-,.")
+
+    return _record(name, area=area, email=links["email"], lattes=links["lattes"],
+                   department=department, page=None if links["lattes"] or links["email"] else links["page"])
+
+
+def parse_docentes(html: str, base_url: str = DOCENTES_URL) -> list:
+    """
+        Extrai os docentes da página do corpo docente. Aceita os layouts usados no portal:
+        tabelas (com ou sem cabeçalho) ou blocos/listas com o nome em destaque, e-mail e link do Lattes.
+        O departamento é o último título (h2-h4) antes de cada docente.
+
+        Returns:
+            list: Dicionários com name, area, email, lattes, department e page.
+    """
+    soup = BeautifulSoup(html, PARSER)
+    for tag in soup.select(CHROME_SELECTORS):
+        tag.decompose()
+    region = soup.select_one('#content-core') or soup.select_one('#content') or soup.find('main') or soup.body or soup
+
+    records, seen = [], set()
+    department = None
+    for tag in region.find_all(['h2', 'h3', 'h4', 'table', 'li', 'p', 'div']):
+        if tag.name in ('h2', 'h3', 'h4'):
+            if not tag.find_parent(['table', 'li', 'p']):
+                department = _text(tag) or department
+            continue
+
+        if tag.name == 'table':
+            found = _table_records(tag, base_url, department)
+        elif tag.find_parent('table') or tag.find(['li', 'p', 'table', 'div']):
+            continue  # Só blocos "folha"; tabelas e blocos externos são tratados pelos internos
+        else:
+            text = tag.get_text(" ")
+            if 'lattes.cnpq.br' not in str(tag) and not _EMAIL.search(text) and not (tag.name == 'li' and tag.find('a')):
+                continue
+            found = [record for record in [_block_record(tag, base_url, department)] if record]
+
+        for record in found:
+            key = fold_accents(record["name"])
+            if key not in seen:
+                seen.add(key)
+                records.append(record)
+    return records
+
+
+def _name_words(text: str) -> list:
+    return [word for word in _NAME_WORDS.findall(fold_accents(text)) if word not in NAME_STOPWORDS]
+
+
+def _name_score(query_words: list, name: str) -> float:
+    """
+        Similaridade entre o nome buscado e o nome do docente: cada palavra buscada é comparada
+        com a palavra mais parecida do nome (tolerando erros de digitação e prefixos).
+    """
+    words = _name_words(name)
+    if not words or not query_words:
+        return 0.0
+    scores = []
+    for query in query_words:
+        best = 0.0
+        for word in words:
+            if word == query or (len(query) >= 3 and word.startswith(query)):
+                best = 1.0
+                break
+            best = max(best, SequenceMatcher(None, query, word).ratio())
+        scores.append(best)
+    return min(scores) * 0.7 + (sum(scores) / len(scores)) * 0.3
+
+
+class DocentesDirectory:
+    """
+        Registros do corpo docente em SQLite, atualizados a partir da página do portal
+        quando ficam mais velhos que REFRESH_AFTER. As buscas são feitas em memória.
+    """
+    def __init__(self, db_file: str = DOCENTES_DB, url: str = DOCENTES_URL, refresh_after: float = REFRESH_AFTER):
+        self.url = url
+        self.refresh_after = refresh_after
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._records = None
+        self._last_attempt = 0
+
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS docentes (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                area TEXT,
+                email TEXT,
+                lattes TEXT,
+                department TEXT,
+                page TEXT
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self._conn.commit()
+
+    def updated_at(self) -> float:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'updated_at'").fetchone()
+        return float(row[0]) if row else 0
+
+    def replace(self, records: list):
+        """
+            Substitui todos os registros (uma atualização completa da página).
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM docentes")
+            self._conn.executemany(
+                "INSERT INTO docentes (name, area, email, lattes, department, page) VALUES (?, ?, ?, ?, ?, ?)",
+                [(r["name"], r["area"], r["email"], r["lattes"], r["department"], r["page"]) for r in records]
+            )
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('updated_at', ?)", (str(time.time()),))
+            self._conn.commit()
+            self._records = None
+
+    def refresh(self, use_browser: bool = True) -> int:
+        """
+            Baixa e processa a página do corpo docente. Se o HTML estático não tiver nenhum
+            docente (conteúdo carregado via JavaScript), renderiza a página no navegador uma vez.
+
+            Returns:
+                int: Quantidade de docentes gravados.
+        """
+        response = fetch(self.url, timeout=15)
+        response.raise_for_status()
+        records = parse_docentes(response.text, self.url)
+
+        if not records and use_browser:
+            from tools.browser_pool import render_page
+            records = parse_docentes(render_page(self.url), self.url)
+
+        if not records:
+            raise ValueError(f"Nenhum docente encontrado em {self.url}")
+        self.replace(records)
+        return len(records)
+
+    def ensure_fresh(self):
+        """
+            Atualiza os registros se estiverem vencidos. Uma thread por vez atualiza; em caso
+            de falha, os registros anteriores continuam sendo usados.
+        """
+        if not self._needs_refresh():
+            return
+        if not self._refresh_lock.acquire(blocking=not self.count()):
+            return  # Outra thread já está atualizando; usa os registros atuais
+        try:
+            # Quem esperou pelo lock não repete uma tentativa que acabou de falhar
+            if self._needs_refresh():
+                self._last_attempt = time.time()
+                self.refresh()
+        except Exception as e:
+            logger.warning("Falha ao atualizar o corpo docente: %s", e)
+        finally:
+            self._refresh_lock.release()
+
+    def _needs_refresh(self) -> bool:
+        # Depois de uma falha espera RETRY_AFTER mesmo com o diretório vazio: com o site fora do
+        # ar, cada busca voltaria a esperar o download e o navegador
+        now = time.time()
+        return now - self.updated_at() >= self.refresh_after and now - self._last_attempt >= RETRY_AFTER
+
+    def _all(self) -> list:
+        with self._lock:
+            if self._records is None:
+                cursor = self._conn.execute("SELECT name, area, email, lattes, department, page FROM docentes ORDER BY name")
+                columns = [c[0] for c in cursor.description]
+                self._records = [dict(zip(columns, row)) for row in cursor.fetchall()]
+            return self._records
+
+    def count(self) -> int:
+        return len(self._all())
+
+    def search(self, name: str = None, area: str = None, limit: int = 10) -> list:
+        """
+            Busca docentes por nome (sem acentos e tolerando erros de digitação) e/ou
+            por área/departamento.
+
+            Args:
+                name (str): Nome ou parte do nome (ex: 'Herlon', 'joao silva').
+                area (str): Palavras da área de atuação ou do departamento (ex: 'informática').
+                limit (int): Quantidade máxima de registros.
+
+            Returns:
+                list: Registros encontrados, do mais parecido para o menos parecido.
+        """
+        query_words = _name_words(name or "")
+        area_words = [word for word in _NAME_WORDS.findall(fold_accents(area or "")) if len(word) > 2]
+        if not query_words and not area_words:
+            return []
+
+        scored = []
+        for record in self._all():
+            score = 1.0
+            if query_words:
+                score = _name_score(query_words, record["name"])
+                if score < MIN_SCORE:
+                    continue
+            if area_words:
+                haystack = fold_accents(f"{record['area'] or ''} {record['department'] or ''}")
+                if not all(word[:5] in haystack for word in area_words):  # Prefixo tolera plural e gênero
+                    continue
+            scored.append((score, record))
+
+        scored.sort(key=lambda item: (-item[0], item[1]["name"]))
+        return [record for _, record in scored[:limit]]
+
+
+_directory = None
+_directory_lock = threading.Lock()
+
+
+def get_directory() -> DocentesDirectory:
+    """
+        Retorna o diretório do corpo docente compartilhado (criado na primeira chamada).
+    """
+    global _directory
+    if _directory is None:
+        with _directory_lock:
+            if _directory is None:
+                _directory = DocentesDirectory()
+    return _directory
+
+
+def on_page_changed(url: str):
+    """
+        Listener do crawler: relê o corpo docente quando a página muda no site.
+    """
+    if url.rstrip('/') == DOCENTES_URL:
+        try:
+            get_directory().refresh()
+        except Exception as e:
+            logger.warning("Falha ao atualizar o corpo docente: %s", e)
+
+
+if __name__ == '__main__':
+    # Uso: python -m tools.docentes             (atualiza a partir do site)
+    #      python -m tools.docentes <nome>      (busca no diretório já gravado)
+    directory = get_directory()
+    if len(sys.argv) > 1:
+        for record in directory.search(" ".join(sys.argv[1:])):
+            print(record)
+    else:
+        print(f"{directory.refresh()} docentes gravados em {DOCENTES_DB}")
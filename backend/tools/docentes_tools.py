@@ -0,0 +1,41 @@
+from agno.tools import tool
+from tools.docentes import get_directory, DOCENTES_URL
+
+@tool(name='find_docentes',
+      description='PROFESSORES: Busca no diretório do corpo docente do Campus Barbacena e retorna só os registros encontrados (nome, área, departamento, e-mail e Lattes). Ignora acentos e tolera erros de digitação no nome. Use SEMPRE que a pergunta for sobre um professor ou docente (contato, área, currículo) ou sobre os professores de uma área. Passe `name` e/ou `area` (ex: area="informática").')
+def find_docentes(name: str = None, area: str = None) -> str:
+    """
+        Busca docentes pelo nome e/ou pela área de atuação/departamento no diretório local,
+        atualizado periodicamente a partir da página do corpo docente.
+
+        Args:
+            name (str): Nome ou parte do nome do docente (ex: 'Herlon').
+            area (str): Área de atuação ou departamento (ex: 'informática', 'matemática').
+
+        Returns:
+            str: Os docentes encontrados, um por bloco, ou uma mensagem indicando que nenhum foi encontrado.
+    """
+    try:
+        directory = get_directory()
+        directory.ensure_fresh()
+        if not directory.count():
+            return f"O diretório do corpo docente não está disponível. Use open_link em {DOCENTES_URL}."
+
+        records = directory.search(name=name, area=area)
+        if not records:
+            return (f"Nenhum docente encontrado para nome='{name or ''}' área='{area or ''}'. "
+                    f"A lista completa está em {DOCENTES_URL}.")
+
+        results = [f"Docentes encontrados ({len(records)}):"]
+        for record in records:
+            entry = f"\n- Nome: {record['name']}"
+            for label, key in (("Área", "area"), ("Departamento", "department"), ("E-mail", "email"),
+                               ("Lattes", "lattes"), ("Página", "page")):
+                if record[key]:
+                    entry += f"\n  {label}: {record[key]}"
+            results.append(entry)
+        results.append(f"\nFonte: {DOCENTES_URL}")
+        return "\n".join(results)
+
+    except Exception as e:
+        return f"Erro ao buscar no corpo docente: {str(e)}"
@@ -0,0 +1,274 @@
+import os
+import re
+import time
+import asyncio
+import sqlite3
+import threading
+import requests
+from requests.structures import CaseInsensitiveDict
+from tools.http_client import fetch, afetch, copy_response
+from tools.singleflight import SingleFlight, AsyncSingleFlight
+from metrics import HTTP_CACHE, HTTP_CACHE_BYTES
+from tracing import span
+
+# Cache em disco das páginas do site (corpo, ETag e Last-Modified)
+CACHE_DB = os.getenv("HTTP_CACHE_DB", "tmp/http_cache.db")
+CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_MB", "200")) * 1024 * 1024
+DEFAULT_TTL = int(os.getenv("HTTP_CACHE_DEFAULT_TTL", "3600"))
+
+# Tempo de validade (em segundos) por padrão de URL. A primeira regra que casar é usada.
+TTL_RULES = [
+    (re.compile(r"/noticias"), 10 * 60),                 # Listagem de notícias muda com frequência
+    (re.compile(r"@@busca"), 5 * 60),
+    (re.compile(r"/corpo-docente"), 24 * 3600),          # Páginas institucionais quase não mudam
+    (re.compile(r"/fale-conosco"), 24 * 3600),
+    (re.compile(r"/mapadosite"), 24 * 3600),
+    (re.compile(r"/calendario-academico"), 6 * 3600),
+    (re.compile(r"/institucional/"), 12 * 3600),
+]
+
+
+def ttl_for(url: str) -> int:
+    """
+        Retorna o TTL configurado para a URL informada.
+    """
+    for pattern, ttl in TTL_RULES:
+        if pattern.search(url):
+            return ttl
+    return DEFAULT_TTL
+
+
+class HttpCache:
+    """
+        Cache persistente de respostas HTTP com revalidação condicional
+        (If-None-Match / If-Modified-Since) e descarte LRU por tamanho.
+    """
+    def __init__(self, db_file: str = CACHE_DB, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                content_type TEXT,
+                encoding TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+        self._conn.commit()
+        HTTP_CACHE_BYTES.set(self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0])
+
+        self._inflight = SingleFlight("http_cache")
+        self._ainflight = AsyncSingleFlight("http_cache")
+
+    @staticmethod
+    def _count(result: str):
+        HTTP_CACHE.inc(result=result)
+
+    def _lookup(self, url: str):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT body, content_type, encoding, etag, last_modified, fetched_at FROM responses WHERE url = ?",
+                (url,)
+            ).fetchone()
+
+    def _touch(self, url: str, refreshed: bool = False):
+        now = time.time()
+        with self._lock:
+            if refreshed:
+                self._conn.execute("UPDATE responses SET last_access = ?, fetched_at = ? WHERE url = ?", (now, now, url))
+            else:
+                self._conn.execute("UPDATE responses SET last_access = ? WHERE url = ?", (now, url))
+            self._conn.commit()
+
+    def _store(self, url: str, response: requests.Response):
+        body = response.content
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, body, response.headers.get("Content-Type"), response.encoding,
+                 response.headers.get("ETag"), response.headers.get("Last-Modified"), now, now, len(body))
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # Remove as entradas menos usadas recentemente até respeitar o limite de tamanho
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_bytes:
+            for url, size in self._conn.execute("SELECT url, size FROM responses ORDER BY last_access ASC").fetchall():
+                self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                total -= size
+                if total <= self.max_bytes:
+                    break
+        HTTP_CACHE_BYTES.set(total)
+
+    @staticmethod
+    def _build_response(url: str, row) -> requests.Response:
+        body, content_type, encoding, etag, last_modified, _ = row
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = body
+        response.encoding = encoding
+        response.headers = CaseInsensitiveDict({
+            k: v for k, v in (("Content-Type", content_type), ("ETag", etag), ("Last-Modified", last_modified)) if v
+        })
+        return response
+
+    def get(self, url: str, timeout: float = 15) -> requests.Response:
+        """
+            Retorna a resposta da URL, servindo do disco quando a entrada ainda é válida
+            e revalidando com o servidor quando está expirada. Se o servidor não responder
+            (timeout, erro 5xx ou circuito aberto), a cópia expirada é servida no lugar.
+            Chamadas simultâneas para a mesma URL compartilham a mesma consulta.
+
+            Args:
+                url (str): URL absoluta da página.
+                timeout (float): Tempo máximo de espera caso seja necessário acessar a rede.
+
+            Returns:
+                requests.Response: Resposta (vinda do cache ou do servidor).
+        """
+        with span("http_cache", "http", url=url) as current:
+            response, result = self._inflight.do(
+                url, lambda: self._get(url, timeout), copy=lambda shared: (copy_response(shared[0]), "coalesced")
+            )
+            if current:
+                current.set(result=result)
+            return response
+
+    async def aget(self, url: str, timeout: float = 15) -> requests.Response:
+        """
+            Versão assíncrona de `get`: a rede passa pelo afetch e o acesso ao disco
+            roda em threads, sem travar o event loop.
+        """
+        with span("http_cache", "http", url=url) as current:
+            response, result = await self._ainflight.do(
+                url, lambda: self._aget(url, timeout), copy=lambda shared: (copy_response(shared[0]), "coalesced")
+            )
+            if current:
+                current.set(result=result)
+            return response
+
+    def _get(self, url: str, timeout: float) -> tuple:
+        row, hit = self._fresh(url)
+        if hit:
+            return hit, "hit"
+        try:
+            response = fetch(url, headers=self._conditional_headers(row), timeout=timeout)
+        except requests.RequestException:
+            if not row:
+                raise
+            return self._serve_stale(url, row), "stale"
+        return self._handle_response(url, row, response)
+
+    async def _aget(self, url: str, timeout: float) -> tuple:
+        # As consultas e gravações no SQLite rodam em threads; só a espera pela rede fica no loop
+        row, hit = await asyncio.to_thread(self._fresh, url)
+        if hit:
+            return hit, "hit"
+        try:
+            response = await afetch(url, headers=self._conditional_headers(row), timeout=timeout)
+        except requests.RequestException:
+            if not row:
+                raise
+            return await asyncio.to_thread(self._serve_stale, url, row), "stale"
+        return await asyncio.to_thread(self._handle_response, url, row, response)
+
+    def _fresh(self, url: str) -> tuple:
+        # (linha do cache, resposta se a entrada ainda estiver dentro do TTL)
+        row = self._lookup(url)
+        if row and time.time() - row[5] < ttl_for(url):
+            self._count("hits")
+            self._touch(url)
+            return row, self._build_response(url, row)
+        return row, None
+
+    @staticmethod
+    def _conditional_headers(row) -> dict:
+        # Entrada expirada: pede ao servidor apenas se o conteúdo mudou
+        headers = {}
+        if row:
+            if row[3]:
+                headers["If-None-Match"] = row[3]
+            if row[4]:
+                headers["If-Modified-Since"] = row[4]
+        return headers
+
+    def _handle_response(self, url: str, row, response: requests.Response) -> tuple:
+        if response.status_code >= 500 and row:
+            return self._serve_stale(url, row), "stale"
+
+        if response.status_code == 304 and row:
+            self._count("revalidations")
+            self._touch(url, refreshed=True)
+            return self._build_response(url, row), "revalidated"
+
+        self._count("misses")
+        cache_control = response.headers.get("Cache-Control", "")
+        if response.status_code == 200 and "no-store" not in cache_control:
+            self._store(url, response)
+
+        return response, "miss"
+
+    def _serve_stale(self, url: str, row) -> requests.Response:
+        # O site está fora do ar ou lento: melhor a última versão conhecida do que um erro
+        self._count("stale")
+        self._touch(url)
+        response = self._build_response(url, row)
+        response.headers["Warning"] = '110 - "Response is Stale"'
+        return response
+
+    def clear(self):
+        """
+            Remove todas as entradas (usado pelos benchmarks para medir o caminho sem cache).
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+        HTTP_CACHE_BYTES.set(0)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> HttpCache:
+    """
+        Retorna a instância compartilhada do cache (criada na primeira chamada).
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = HttpCache()
+    return _cache
+
+
+def cached_fetch(url: str, timeout: float = 15) -> requests.Response:
+    """
+        GET através do cache em disco compartilhado. Ver HttpCache.get.
+    """
+    return get_cache().get(url, timeout=timeout)
+
+
+async def acached_fetch(url: str, timeout: float = 15) -> requests.Response:
+    """
+        Versão assíncrona do cached_fetch. Ver HttpCache.aget.
+    """
+    return await get_cache().aget(url, timeout=timeout)
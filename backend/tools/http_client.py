@@ -0,0 +1,452 @@
+import os
+import time
+import asyncio
+import weakref
+import threading
+import httpx
+import requests
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from requests.structures import CaseInsensitiveDict
+from metrics import HTTP_REQUESTS, HTTP_DURATION, HTTP_BYTES, HTTP_RATE_WAIT, HTTP_CIRCUIT_OPEN, HTTP_CONNECTIONS
+from tracing import span
+from tools.singleflight import SingleFlight, AsyncSingleFlight
+
+# Cabeçalhos padrão enviados em todas as requisições ao site do Instituto
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
+}
+
+# Configurações do pool de conexões (podem ser ajustadas pelo .env)
+POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))  # Quantidade de hosts mantidos em cache
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))          # Conexões keep-alive por host
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))
+
+# Limite de requisições por host (token bucket): RATE_PER_SECOND em média, com rajadas de até BURST
+RATE_PER_SECOND = float(os.getenv("HTTP_RATE_PER_SECOND", "5"))
+BURST = int(os.getenv("HTTP_BURST", "10"))
+
+# Circuit breaker por host: depois de BREAKER_FAILURES falhas seguidas (timeout, erro de conexão
+# ou 5xx), as requisições ao host falham na hora durante BREAKER_COOLDOWN segundos, em vez de
+# cada ferramenta esperar o timeout inteiro; depois disso uma requisição de teste é liberada.
+BREAKER_FAILURES = int(os.getenv("HTTP_BREAKER_FAILURES", "3"))
+BREAKER_COOLDOWN = float(os.getenv("HTTP_BREAKER_COOLDOWN", "30"))
+
+# O urllib3 só decodifica brotli se algum dos pacotes estiver instalado,
+# então só anunciamos "br" ao servidor quando for possível descompactar.
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = "gzip, deflate, br"
+    except ImportError:
+        ACCEPT_ENCODING = "gzip, deflate"
+
+
+def _count_connection(conn):
+    # Conexão tirada do pool: já conectada (keep-alive) ou sem socket (abre uma nova ao enviar)
+    HTTP_CONNECTIONS.inc(client="requests", kind="reused" if getattr(conn, "sock", None) else "new")
+    return conn
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _get_conn(self, timeout=None):
+        return _count_connection(super()._get_conn(timeout))
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _get_conn(self, timeout=None):
+        return _count_connection(super()._get_conn(timeout))
+
+
+class _PooledAdapter(HTTPAdapter):
+    """
+        Adapter do requests que usa pools de conexão instrumentados,
+        permitindo contar conexões novas e reaproveitadas.
+    """
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool,
+        }
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """
+        O host está com o circuito aberto (falhou seguidamente); a requisição nem foi feita.
+    """
+
+
+class _TokenBucket:
+    """
+        Token bucket de um host. `acquire` espera até haver uma ficha disponível;
+        `reserve` só reserva a ficha e devolve a espera (para o `asyncio.sleep` do afetch).
+    """
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+            Returns:
+                float: Tempo que falta esperar pela ficha reservada, em segundos.
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1  # Reserva a ficha; se ficar negativo, espera o tempo de repô-la
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+    def acquire(self) -> float:
+        """
+            Returns:
+                float: Tempo esperado, em segundos.
+        """
+        wait = self.reserve()
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class _CircuitBreaker:
+    """
+        Estado do circuito de um host: fechado, aberto (falha rápido) ou meio-aberto
+        (uma única requisição de teste decide se o circuito fecha ou volta a abrir).
+    """
+    def __init__(self, host: str, failures: int, cooldown: float):
+        self.host = host
+        self.threshold = failures
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return
+            remaining = self.opened_at + self.cooldown - time.monotonic()
+            if remaining > 0 or self.probing:
+                raise CircuitOpenError(
+                    f"{self.host} indisponível (falhas seguidas); nova tentativa em {max(remaining, 0):.0f}s"
+                )
+            self.probing = True
+
+    def record(self, success: bool):
+        with self._lock:
+            self.probing = False
+            if success:
+                self.failures = 0
+                self.opened_at = None
+            else:
+                self.failures += 1
+                if self.failures >= self.threshold or self.opened_at is not None:
+                    self.opened_at = time.monotonic()
+            HTTP_CIRCUIT_OPEN.set(0 if self.opened_at is None else 1, host=self.host)
+
+
+_hosts = {}
+_hosts_lock = threading.Lock()
+
+
+def _host_guards(host: str) -> tuple:
+    with _hosts_lock:
+        if host not in _hosts:
+            _hosts[host] = (_TokenBucket(RATE_PER_SECOND, BURST), _CircuitBreaker(host, BREAKER_FAILURES, BREAKER_COOLDOWN))
+        return _hosts[host]
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=MAX_RETRIES,
+        connect=MAX_RETRIES,
+        read=MAX_RETRIES,
+        status=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,  # Devolve a última resposta 5xx para o raise_for_status das ferramentas
+    )
+    adapter = _PooledAdapter(
+        pool_connections=POOL_CONNECTIONS,
+        pool_maxsize=POOL_MAXSIZE,
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+        Retorna a sessão HTTP compartilhada (criada na primeira chamada).
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+_inflight = SingleFlight("http")
+
+
+def copy_response(response: requests.Response) -> requests.Response:
+    """
+        Cópia de uma resposta já baixada, para entregar a cada chamada que aproveitou a mesma requisição.
+    """
+    copy = requests.Response()
+    copy.status_code = response.status_code
+    copy.url = response.url
+    copy.reason = response.reason
+    copy._content = response.content
+    copy.encoding = response.encoding
+    copy.headers = CaseInsensitiveDict(response.headers)
+    copy.request = response.request
+    return copy
+
+
+def fetch(url: str, params=None, headers: dict = None, timeout: float = 15, stream: bool = False) -> requests.Response:
+    """
+        Realiza um GET usando o pool de conexões keep-alive compartilhado.
+        Erros de conexão, timeouts e respostas 5xx são repetidos com backoff exponencial.
+        GETs idênticos simultâneos (sem stream) compartilham uma só requisição, cada host
+        tem um limite de requisições por segundo e, depois de falhas seguidas, o host fica
+        um tempo falhando na hora com CircuitOpenError.
+
+        Args:
+            url (str): URL absoluta a ser requisitada.
+            params: Parâmetros de query string (dict ou lista de tuplas).
+            headers (dict): Cabeçalhos adicionais para esta requisição.
+            timeout (float): Tempo máximo de espera em segundos.
+            stream (bool): Se True, o corpo não é baixado imediatamente.
+
+        Returns:
+            requests.Response: A resposta HTTP.
+    """
+    if stream:
+        return _fetch(url, params, headers, timeout, stream)
+
+    params_key = tuple(sorted(params.items())) if isinstance(params, dict) else tuple(params or ())
+    key = (url, params_key, tuple(sorted((headers or {}).items())))
+    return _inflight.do(key, lambda: _fetch(url, params, headers, timeout, stream), copy=copy_response)
+
+
+def _fetch(url: str, params, headers: dict, timeout: float, stream: bool) -> requests.Response:
+    host = urlsplit(url).hostname or ""
+    bucket, breaker = _host_guards(host)
+    try:
+        breaker.allow()
+    except CircuitOpenError:
+        HTTP_REQUESTS.inc(host=host, status="circuit_open")
+        raise
+
+    waited = bucket.acquire()
+    if waited:
+        HTTP_RATE_WAIT.inc(waited, host=host)
+
+    started = time.perf_counter()
+    with span(f"GET {host}", "http", url=url) as current:
+        try:
+            response = get_session().get(url, params=params, headers=headers, timeout=timeout, stream=stream)
+        except (requests.ConnectionError, requests.Timeout):
+            breaker.record(success=False)
+            HTTP_REQUESTS.inc(host=host, status="error")
+            raise
+        except requests.RequestException:
+            breaker.record(success=True)  # Erro da requisição (URL inválida etc.), não do host
+            HTTP_REQUESTS.inc(host=host, status="error")
+            raise
+        finally:
+            HTTP_DURATION.observe(time.perf_counter() - started, host=host)
+
+        _record_response(host, breaker, response, current, stream)
+    return response
+
+
+def _record_response(host: str, breaker: "_CircuitBreaker", response: requests.Response, current, stream: bool = False):
+    breaker.record(success=response.status_code < 500)
+    HTTP_REQUESTS.inc(host=host, status=response.status_code)
+    # Content-Length é o tamanho na rede; sem ele (chunked), conta o corpo já descompactado
+    size = response.headers.get('Content-Length')
+    if size and size.isdigit():
+        size = int(size)
+    elif not stream:
+        size = len(response.content)
+    else:
+        size = None
+    if size is not None:
+        HTTP_BYTES.inc(size, host=host)
+    if current:
+        current.set(status=response.status_code, bytes=size)
+
+    # Sem charset no Content-Type o requests assume ISO-8859-1 para text/*;
+    # as páginas do portal são UTF-8
+    if response.encoding == 'ISO-8859-1' and 'charset' not in response.headers.get('Content-Type', '').lower():
+        response.encoding = 'utf-8'
+
+
+# Versão assíncrona do fetch, para as ferramentas de tools/async_tools.py: um httpx.AsyncClient
+# por event loop, com o mesmo limite por host, circuit breaker, repetições e métricas do fetch.
+# A resposta é convertida para requests.Response, então o cache e os parsers são os mesmos.
+RETRY_STATUSES = (500, 502, 503, 504)
+
+_async_clients = weakref.WeakKeyDictionary()
+_ainflight = AsyncSingleFlight("http")
+
+
+def _async_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = httpx.AsyncClient(
+            headers={**HEADERS, "Accept-Encoding": ACCEPT_ENCODING},
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=POOL_CONNECTIONS * POOL_MAXSIZE, max_keepalive_connections=POOL_MAXSIZE),
+        )
+    return client
+
+
+def _to_requests_response(response: httpx.Response, stream: bool = False) -> requests.Response:
+    converted = requests.Response()
+    converted.status_code = response.status_code
+    converted.url = str(response.url)
+    converted.reason = response.reason_phrase
+    if stream:
+        converted.raw = response  # Corpo ainda não lido: aiter_content/aclose
+    else:
+        converted._content = response.content
+    converted.headers = CaseInsensitiveDict(response.headers)
+    converted.encoding = requests.utils.get_encoding_from_headers(converted.headers)
+    return converted
+
+
+async def afetch(url: str, params=None, headers: dict = None, timeout: float = 15, stream: bool = False) -> requests.Response:
+    """
+        Versão assíncrona do `fetch`: enquanto espera o site, o event loop atende os outros
+        turnos. Mesmas regras de repetição, limite por host, circuit breaker e junção de GETs
+        idênticos simultâneos (sem stream); os erros são as exceções do requests.
+
+        Args:
+            stream (bool): Se True, o corpo não é baixado: leia as partes com `aiter_content`
+                e libere a conexão com `aclose`.
+
+        Returns:
+            requests.Response: A resposta HTTP, com o corpo já baixado (sem stream).
+    """
+    if stream:
+        return await _afetch(url, params, headers, timeout, stream)
+
+    params_key = tuple(sorted(params.items())) if isinstance(params, dict) else tuple(params or ())
+    key = (url, params_key, tuple(sorted((headers or {}).items())))
+    return await _ainflight.do(key, lambda: _afetch(url, params, headers, timeout, stream), copy=copy_response)
+
+
+async def aiter_content(response: requests.Response, chunk_size: int):
+    """
+        Lê em partes o corpo de uma resposta do `afetch(..., stream=True)`.
+    """
+    try:
+        async for chunk in response.raw.aiter_bytes(chunk_size):
+            yield chunk
+    except httpx.TimeoutException as e:
+        raise requests.Timeout(f"{response.url}: {e!r}") from e
+    except httpx.TransportError as e:
+        raise requests.ConnectionError(f"{response.url}: {e!r}") from e
+
+
+async def aclose(response: requests.Response):
+    """
+        Libera a conexão de uma resposta do `afetch(..., stream=True)`.
+    """
+    await response.raw.aclose()
+
+
+async def _afetch(url: str, params, headers: dict, timeout: float, stream: bool) -> requests.Response:
+    host = urlsplit(url).hostname or ""
+    bucket, breaker = _host_guards(host)
+    try:
+        breaker.allow()
+    except CircuitOpenError:
+        HTTP_REQUESTS.inc(host=host, status="circuit_open")
+        raise
+
+    waited = bucket.reserve()
+    if waited:
+        HTTP_RATE_WAIT.inc(waited, host=host)
+        await asyncio.sleep(waited)
+
+    started = time.perf_counter()
+    with span(f"GET {host}", "http", url=url) as current:
+        try:
+            response = await _aget_with_retries(url, params, headers, timeout, stream)
+        except (requests.ConnectionError, requests.Timeout):
+            breaker.record(success=False)
+            HTTP_REQUESTS.inc(host=host, status="error")
+            raise
+        except requests.RequestException:
+            breaker.record(success=True)
+            HTTP_REQUESTS.inc(host=host, status="error")
+            raise
+        finally:
+            HTTP_DURATION.observe(time.perf_counter() - started, host=host)
+
+        _record_response(host, breaker, response, current, stream)
+    return response
+
+
+async def _aget_with_retries(url: str, params, headers: dict, timeout: float, stream: bool) -> requests.Response:
+    # Mesmo comportamento do Retry do urllib3 na sessão síncrona: erros de conexão, timeouts e
+    # 5xx são repetidos com backoff exponencial; a última resposta 5xx é devolvida
+    client = _async_client()
+    error = None
+    for attempt in range(MAX_RETRIES + 1):
+        if attempt > 1:
+            await asyncio.sleep(BACKOFF_FACTOR * 2 ** (attempt - 1))
+        connected = []
+
+        async def trace(event: str, _info: dict):
+            # Eventos do httpcore: connect_tcp só acontece quando o pool não tinha conexão livre
+            if event == "connection.connect_tcp.complete":
+                connected.append(event)
+
+        try:
+            request = client.build_request("GET", url, params=params, headers=headers, timeout=timeout,
+                                           extensions={"trace": trace})
+            response = await client.send(request, stream=stream)
+            HTTP_CONNECTIONS.inc(client="httpx", kind="new" if connected else "reused")
+        except (httpx.InvalidURL, httpx.UnsupportedProtocol) as e:
+            raise requests.exceptions.InvalidURL(str(e)) from e
+        except httpx.TimeoutException as e:
+            error = requests.Timeout(f"{url}: {e!r}")
+            continue
+        except httpx.TransportError as e:
+            error = requests.ConnectionError(f"{url}: {e!r}")
+            continue
+        if response.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+            await response.aclose()
+            continue
+        return _to_requests_response(response, stream)
+    raise error
@@ -0,0 +1,35 @@
+import time
+import threading
+import importlib
+
+from startup import record_lazy_import
+
+
+class LazyModule:
+    """
+        Módulo importado só no primeiro acesso a um atributo. Usado para dependências pesadas
+        das ferramentas (PyMuPDF, markdownify), que deixam de pesar na subida dos workers e
+        só são carregadas quando alguma ferramenta precisa delas.
+    """
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._module is None:
+                started = time.perf_counter()
+                self._module = importlib.import_module(self._name)
+                record_lazy_import(self._name, time.perf_counter() - started)
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._module or self._load(), attr)
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+        Ex: `fitz = lazy_import("fitz")` no topo do módulo; o import acontece em `fitz.open(...)`.
+    """
+    return LazyModule(name)
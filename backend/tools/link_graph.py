@@ -0,0 +1,222 @@
+import os
+import re
+import sqlite3
+import argparse
+import threading
+from urllib.parse import urljoin, urlparse, unquote
+from email.utils import parsedate_to_datetime
+
+from tracing import span
+from tools.content_extractor import DOCUMENT_LINK
+from tools.text_utils import tokenize, stem
+
+# Grafo de links da árvore /barbacena gravado pelo crawler (páginas, links com o texto da
+# âncora e Last-Modified). As buscas por documentos ("calendário 2025 em Calendário Acadêmico")
+# são resolvidas em uma consulta ao grafo, sem abrir pasta por pasta.
+CRAWLER_DB = os.getenv("CRAWLER_DB", "tmp/crawler.db")
+SECTION_DEPTH = int(os.getenv("LINK_GRAPH_SECTION_DEPTH", "4"))  # Níveis de subpastas percorridos a partir da seção
+BASE_URL = "https://www.ifsudestemg.edu.br"
+
+_YEAR = re.compile(r'\b(?:19|20)\d{2}\b')
+
+
+def _stems(text: str) -> set:
+    return {stem(word) for word in tokenize(text or "")}
+
+
+def _path_words(url: str) -> str:
+    # Pastas e nome do arquivo ("calendario-2025/calendario_academico.pdf") como texto
+    path = unquote(urlparse(url).path).replace('at_download/file', '')
+    return re.sub(r'[/\-_.]+', ' ', path)
+
+
+def _file_words(url: str) -> str:
+    return _path_words(url.replace('/at_download/file', '').rsplit('/', 1)[-1])
+
+
+def _timestamp(last_modified: str) -> float:
+    try:
+        return parsedate_to_datetime(last_modified).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _like_prefix(url: str) -> str:
+    return url.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '/%'
+
+
+class LinkGraph:
+    """
+        Consultas ao grafo de links do crawler. A conexão é somente leitura: quem grava
+        é o CrawlState (crawler.py).
+    """
+    def __init__(self, db_file: str = CRAWLER_DB, section_depth: int = SECTION_DEPTH):
+        self.db_file = db_file
+        self.section_depth = section_depth
+
+    def _connect(self):
+        if not os.path.exists(self.db_file):
+            return None
+        conn = sqlite3.connect(f"file:{self.db_file}?mode=ro", uri=True)
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'links'").fetchone():
+            conn.close()
+            return None
+        return conn
+
+    def _sections(self, conn, section: str) -> list:
+        """
+            Páginas que correspondem à seção: a própria URL, se for uma, ou as páginas cujo
+            título, âncoras e caminho cobrem melhor as palavras da seção (as mais rasas primeiro).
+        """
+        if section.startswith(('http://', 'https://', '/')):
+            return [urljoin(BASE_URL, section).rstrip('/')]
+
+        terms = _stems(section)
+        if not terms:
+            return []
+
+        anchors = {}
+        for url, anchor in conn.execute(
+            "SELECT dst, anchor FROM links WHERE dst IN (SELECT DISTINCT src FROM links) AND anchor != ''"
+        ):
+            anchors.setdefault(url, set()).add(anchor)
+
+        scored = []
+        for url, title in conn.execute(
+            "SELECT src, (SELECT title FROM pages WHERE url = src) FROM links GROUP BY src"
+        ):
+            text = " ".join([title or "", _path_words(url), *anchors.get(url, ())])
+            score = len(terms & _stems(text)) / len(terms)
+            if score >= 0.5:
+                scored.append((score, -url.count('/'), url))
+
+        if not scored:
+            return []
+        best = max(score for score, _, _ in scored)
+        roots = []
+        for score, _, url in sorted(scored, reverse=True):
+            # Subpastas de uma seção já escolhida são percorridas a partir dela
+            if score == best and not any(url.startswith(root + '/') for root in roots):
+                roots.append(url)
+        return roots[:3]
+
+    def _candidates(self, conn, roots: list) -> list:
+        query = """
+            SELECT l.dst, l.anchor, l.src, s.title, d.title, d.last_modified, d.content_type
+            FROM links l
+            LEFT JOIN pages s ON s.url = l.src
+            LEFT JOIN pages d ON d.url = l.dst
+        """
+        if not roots:
+            return conn.execute(query).fetchall()
+
+        rows = []
+        for root in roots:
+            # Subpastas da seção (links que continuam dentro do caminho dela) e os links de cada uma
+            rows += conn.execute(f"""
+                WITH RECURSIVE tree (url, depth) AS (
+                    SELECT ?, 0
+                    UNION
+                    SELECT l.dst, t.depth + 1 FROM links l JOIN tree t ON l.src = t.url
+                    WHERE t.depth < ? AND l.dst LIKE ? ESCAPE '\\'
+                )
+                {query}
+                WHERE l.src IN (SELECT url FROM tree)
+            """, (root, self.section_depth, _like_prefix(root))).fetchall()
+        return rows
+
+    def find_documents(self, query: str, section: str = None, limit: int = 10):
+        """
+            Documentos (PDFs) do site que correspondem à consulta, opcionalmente dentro de uma seção.
+
+            Args:
+                query (str): Assunto do documento (ex: 'calendário 2025', 'edital monitoria').
+                section (str): Seção onde procurar: nome (ex: 'calendário acadêmico') ou URL.
+                limit (int): Quantidade máxima de documentos.
+
+            Returns:
+                tuple | None: (seções usadas, [{url, title, section, section_url, last_modified, score}]),
+                ou None se o grafo ainda não foi construído pelo crawler.
+        """
+        conn = self._connect()
+        if conn is None:
+            return None
+
+        with span("link_graph", query=query, section=section) as current:
+            try:
+                roots = self._sections(conn, section) if section else []
+                if section and not roots:
+                    return [], []
+                rows = self._candidates(conn, roots)
+            finally:
+                conn.close()
+
+            terms = _stems(query)
+            years = set(_YEAR.findall(query))  # Anos citados precisam aparecer no documento ou na pasta
+            documents = {}
+            for url, anchor, src, src_title, title, last_modified, content_type in rows:
+                if not (DOCUMENT_LINK.search(url) or 'pdf' in (content_type or '')):
+                    continue
+
+                own = " ".join([anchor or "", title or "", _file_words(url)])
+                context = " ".join([src_title or "", _path_words(url)])
+                if not years <= set(_YEAR.findall(f"{own} {context}")):
+                    continue
+
+                own_stems, context_stems = _stems(own), _stems(context)
+                score = (sum(1 if term in own_stems else 0.5 if term in context_stems else 0 for term in terms)
+                         / len(terms)) if terms else 1.0
+                if score < 0.5:
+                    continue
+
+                # O mesmo PDF pode ser linkado por várias páginas; fica o link que melhor o descreve
+                if url not in documents or score > documents[url]["score"]:
+                    documents[url] = {
+                        "url": url,
+                        "title": anchor or title or url.rsplit('/', 1)[-1],
+                        "section": src_title,
+                        "section_url": src,
+                        "last_modified": last_modified,
+                        "score": round(score, 2),
+                    }
+
+            # Mais relevantes primeiro; entre iguais, o ano mais recente citado e a data de modificação
+            def recency(document):
+                cited = [int(year) for year in _YEAR.findall(f"{document['title']} {document['url']}")]
+                return max(cited, default=0), _timestamp(document["last_modified"])
+
+            ranked = sorted(documents.values(), key=lambda d: (d["score"], *recency(d)), reverse=True)[:limit]
+            if current:
+                current.set(sections=len(roots), candidates=len(documents), results=len(ranked))
+            return roots, ranked
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_link_graph() -> LinkGraph:
+    """
+        Retorna o grafo de links compartilhado (criado na primeira chamada).
+    """
+    global _graph
+    if _graph is None:
+        with _graph_lock:
+            if _graph is None:
+                _graph = LinkGraph()
+    return _graph
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Busca documentos no grafo de links do crawler.")
+    parser.add_argument("query")
+    parser.add_argument("--section", default=None)
+    args = parser.parse_args()
+
+    result = get_link_graph().find_documents(args.query, args.section)
+    if result is None:
+        raise SystemExit("Grafo de links vazio: execute o crawler (python crawler.py) primeiro.")
+    roots, documents = result
+    print("Seções:", ", ".join(roots) or "(todo o site)")
+    for document in documents:
+        print(f"{document['score']:.2f}  {document['title']}  {document['url']}  ({document['last_modified'] or '-'})")
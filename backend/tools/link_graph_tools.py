@@ -0,0 +1,40 @@
+from agno.tools import tool
+from tools.link_graph import get_link_graph
+
+@tool(name='find_documents',
+      description='DOCUMENTOS (PDF) EM UMA CHAMADA: Encontra PDFs do site (calendários, editais, cardápios, resoluções, horários) pelo assunto, opcionalmente dentro de uma seção (nome como "calendário acadêmico" ou URL), consultando o mapa de links já percorrido do Campus Barbacena. Use ANTES de navegar por pastas com get_page_navigation/find_pdf_links; depois leia o PDF com read_pdf.')
+def find_documents(query: str, section: str = None) -> str:
+    """
+        Procura documentos no grafo de links do site (páginas, subpastas e PDFs), sem acessar o site.
+
+        Args:
+            query (str): Assunto do documento (ex: 'calendário 2025', 'edital monitoria').
+            section (str): Seção onde procurar, pelo nome (ex: 'calendário acadêmico') ou pela URL.
+
+        Returns:
+            str: Lista de documentos com título, link, pasta onde estão e data de modificação.
+    """
+    try:
+        result = get_link_graph().find_documents(query, section)
+        if result is None:
+            return "O mapa de links do site ainda não foi construído. Use get_page_navigation e find_pdf_links."
+
+        sections, documents = result
+        if section and not sections:
+            return f"Nenhuma seção '{section}' encontrada no mapa do site. Tente sem 'section' ou com a URL da seção."
+        if not documents:
+            return f"Nenhum documento encontrado para '{query}'" + (f" em '{section}'." if section else ".")
+
+        where = f" em {', '.join(sections)}" if sections else ""
+        results = [f"Encontrados {len(documents)} documentos para '{query}'{where}:"]
+        for document in documents:
+            entry = f"\n- Título: {document['title']}\n  Link: {document['url']}"
+            if document['section']:
+                entry += f"\n  Pasta: {document['section']} ({document['section_url']})"
+            if document['last_modified']:
+                entry += f"\n  Modificado em: {document['last_modified']}"
+            results.append(entry)
+        return "\n".join(results)
+
+    except Exception as e:
+        return f"Erro ao procurar documentos: {str(e)}"
@@ -0,0 +1,356 @@
+import os
+import time
+import asyncio
+import atexit
+import sqlite3
+import hashlib
+import tempfile
+import threading
+import requests
+from concurrent.futures import ProcessPoolExecutor
+
+from tools.http_client import fetch, afetch, aiter_content, aclose
+from tools.lazy_import import lazy_import
+from tools.http_cache import ttl_for
+from tools.singleflight import SingleFlight, AsyncSingleFlight
+from tools.text_utils import stem_text, fts_query
+from metrics import PDF_CACHE
+from tracing import span
+
+fitz = lazy_import("fitz")
+
+# Cache em disco do texto extraído dos PDFs, página por página
+PDF_CACHE_DB = os.getenv("PDF_CACHE_DB", "tmp/pdf_cache.db")
+DOWNLOAD_DIR = os.getenv("PDF_DOWNLOAD_DIR", "tmp/pdf_downloads")  # Arquivos temporários dos downloads
+CHUNK_SIZE = 64 * 1024
+
+# Documentos com pelo menos PARALLEL_PAGES páginas são extraídos em paralelo por PDF_WORKERS processos
+PARALLEL_PAGES = int(os.getenv("PDF_PARALLEL_PAGES", "40"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+
+def _extract_range(path: str, start: int, end: int) -> list:
+    # Executado nos processos do pool: cada um abre o arquivo e extrai seu intervalo de páginas
+    with fitz.open(path, filetype="pdf") as doc:
+        return [doc[number].get_text() for number in range(start, end)]
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+                atexit.register(_executor.shutdown, wait=False, cancel_futures=True)
+    return _executor
+
+
+def extract_pages(path: str) -> list:
+    """
+        Extrai o texto de cada página de um PDF em disco.
+
+        Returns:
+            list: Texto de cada página, na ordem do documento.
+    """
+    with span("pdf.extract", "pdf", bytes=os.path.getsize(path)) as current:
+        with fitz.open(path, filetype="pdf") as doc:
+            page_count = doc.page_count
+            parallel = page_count >= PARALLEL_PAGES and PDF_WORKERS > 1
+            if current:
+                current.set(pages=page_count, parallel=parallel)
+            if not parallel:
+                return [page.get_text() for page in doc]
+
+        step = -(-page_count // PDF_WORKERS)
+        ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+        futures = [_get_executor().submit(_extract_range, path, start, end) for start, end in ranges]
+        return [text for future in futures for text in future.result()]
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PdfCache:
+    """
+        Guarda o texto dos PDFs por página. As páginas são indexadas pelo sha256 do arquivo,
+        então o mesmo PDF publicado em URLs diferentes é extraído uma única vez; cada URL
+        aponta para o hash atual e é revalidada com ETag/Last-Modified quando o TTL expira.
+    """
+    def __init__(self, db_file: str = PDF_CACHE_DB):
+        self._lock = threading.Lock()
+        self._inflight = SingleFlight("pdf")
+        self._ainflight = AsyncSingleFlight("pdf")
+
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sources (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                checked_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                page_no INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                UNIQUE (content_hash, page_no)
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+                text, tokenize = 'unicode61 remove_diacritics 2'
+            );
+        """)
+        self._conn.commit()
+
+    def document(self, path: str) -> tuple:
+        """
+            Garante que o PDF (URL ou arquivo local) esteja extraído no cache. Pedidos
+            simultâneos do mesmo PDF compartilham um só download e extração; se o site não
+            responder, a última versão extraída é usada.
+
+            Returns:
+                tuple: (content_hash, quantidade de páginas).
+        """
+        with span("pdf.document", "pdf", path=path) as current:
+            document, result = self._inflight.do(path, lambda: self._document(path))
+            if current:
+                current.set(result=result, pages=document[1])
+            return document
+
+    async def adocument(self, path: str) -> tuple:
+        """
+            Versão assíncrona de `document`: o download passa pelo afetch e a extração
+            (PyMuPDF) e o acesso ao banco rodam em threads/processos, fora do event loop.
+        """
+        with span("pdf.document", "pdf", path=path) as current:
+            document, result = await self._ainflight.do(path, lambda: self._adocument(path))
+            if current:
+                current.set(result=result, pages=document[1])
+            return document
+
+    def _document(self, path: str) -> tuple:
+        if os.path.exists(path):
+            return self._ingest_file(path, _file_sha256(path)), "local"
+
+        row, cached = self._fresh(path)
+        if cached:
+            return cached
+
+        try:
+            response = fetch(path, headers=self._conditional_headers(row), timeout=30, stream=True)
+        except requests.RequestException:
+            if not row:
+                raise
+            return self._stale(row)
+
+        try:
+            known = self._known_version(path, row, response)
+            if known:
+                return known
+            # Baixa em partes direto para o disco, calculando o hash no caminho
+            temp_path, content_hash = self._save_download(response.iter_content(CHUNK_SIZE))
+        finally:
+            response.close()
+        return self._ingest_download(path, temp_path, content_hash, response.headers), "miss"
+
+    async def _adocument(self, path: str) -> tuple:
+        if os.path.exists(path):
+            return await asyncio.to_thread(self._document, path)
+
+        row, cached = await asyncio.to_thread(self._fresh, path)
+        if cached:
+            return cached
+
+        try:
+            response = await afetch(path, headers=self._conditional_headers(row), timeout=30, stream=True)
+        except requests.RequestException:
+            if not row:
+                raise
+            return await asyncio.to_thread(self._stale, row)
+
+        try:
+            known = await asyncio.to_thread(self._known_version, path, row, response)
+            if known:
+                return known
+            temp_path, content_hash = await self._asave_download(aiter_content(response, CHUNK_SIZE))
+        finally:
+            await aclose(response)
+        document = await asyncio.to_thread(self._ingest_download, path, temp_path, content_hash, response.headers)
+        return document, "miss"
+
+    def _fresh(self, path: str) -> tuple:
+        # (linha de sources, resultado se a URL ainda estiver dentro do TTL)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content_hash, etag, last_modified, checked_at FROM sources WHERE url = ?", (path,)
+            ).fetchone()
+
+        if row and time.time() - row[3] < ttl_for(path):
+            PDF_CACHE.inc(result="hits")
+            return row, ((row[0], self.page_count(row[0])), "hit")
+        return row, None
+
+    @staticmethod
+    def _conditional_headers(row) -> dict:
+        headers = {}
+        if row and row[1]:
+            headers['If-None-Match'] = row[1]
+        if row and row[2]:
+            headers['If-Modified-Since'] = row[2]
+        return headers
+
+    def _stale(self, row) -> tuple:
+        PDF_CACHE.inc(result="stale")
+        return (row[0], self.page_count(row[0])), "stale"
+
+    def _known_version(self, path: str, row, response: requests.Response):
+        # Site com erro (versão guardada) ou 304 (não mudou); None se é preciso baixar o arquivo
+        if response.status_code >= 500 and row:
+            return self._stale(row)
+        if response.status_code == 304 and row:
+            PDF_CACHE.inc(result="revalidations")
+            self._save_source(path, row[0], row[1], row[2])
+            return (row[0], self.page_count(row[0])), "revalidated"
+        response.raise_for_status()
+        return None
+
+    @staticmethod
+    def _save_download(chunks) -> tuple:
+        os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=DOWNLOAD_DIR, suffix='.pdf', delete=False) as file:
+            for chunk in chunks:
+                digest.update(chunk)
+                file.write(chunk)
+        return file.name, digest.hexdigest()
+
+    @staticmethod
+    async def _asave_download(chunks) -> tuple:
+        # Mesmo que _save_download, com as partes vindas do aiter_content; gravar 64 KB por vez
+        # no arquivo é rápido o bastante para não travar o event loop
+        os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+        digest = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(dir=DOWNLOAD_DIR, suffix='.pdf', delete=False) as file:
+            async for chunk in chunks:
+                digest.update(chunk)
+                file.write(chunk)
+        return file.name, digest.hexdigest()
+
+    def _ingest_download(self, path: str, temp_path: str, content_hash: str, headers) -> tuple:
+        PDF_CACHE.inc(result="misses")
+        try:
+            result = self._ingest_file(temp_path, content_hash)
+        finally:
+            os.remove(temp_path)
+
+        self._save_source(path, content_hash, headers.get('ETag'), headers.get('Last-Modified'))
+        return result
+
+    def _ingest_file(self, path: str, content_hash: str) -> tuple:
+        page_count = self.page_count(content_hash)
+        if page_count:
+            return content_hash, page_count
+
+        texts = extract_pages(path)
+        stems = [stem_text(text) for text in texts]
+        with self._lock:
+            for number, (text, stemmed) in enumerate(zip(texts, stems), start=1):
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO pages (content_hash, page_no, text) VALUES (?, ?, ?)",
+                    (content_hash, number, text)
+                )
+                if cursor.rowcount:  # Outra thread pode ter extraído o mesmo arquivo ao mesmo tempo
+                    self._conn.execute("INSERT INTO pages_fts (rowid, text) VALUES (?, ?)", (cursor.lastrowid, stemmed))
+            self._conn.commit()
+        return content_hash, len(texts)
+
+    def _save_source(self, url: str, content_hash: str, etag: str, last_modified: str):
+        with self._lock:
+            previous = self._conn.execute("SELECT content_hash FROM sources WHERE url = ?", (url,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources (url, content_hash, etag, last_modified, checked_at) VALUES (?, ?, ?, ?, ?)",
+                (url, content_hash, etag, last_modified, time.time())
+            )
+            # Remove as páginas da versão anterior se nenhuma outra URL aponta para ela
+            if previous and previous[0] != content_hash:
+                orphan = previous[0]
+                in_use = self._conn.execute("SELECT 1 FROM sources WHERE content_hash = ?", (orphan,)).fetchone()
+                if not in_use:
+                    self._conn.execute(
+                        "DELETE FROM pages_fts WHERE rowid IN (SELECT id FROM pages WHERE content_hash = ?)", (orphan,)
+                    )
+                    self._conn.execute("DELETE FROM pages WHERE content_hash = ?", (orphan,))
+            self._conn.commit()
+
+    def clear(self):
+        """
+            Remove todos os documentos extraídos (usado pelos benchmarks para medir o caminho sem cache).
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM sources")
+            self._conn.execute("DELETE FROM pages")
+            self._conn.execute("DELETE FROM pages_fts")
+            self._conn.commit()
+
+    def page_count(self, content_hash: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages WHERE content_hash = ?", (content_hash,)).fetchone()[0]
+
+    def pages(self, content_hash: str, numbers: list = None) -> list:
+        """
+            Retorna [(número da página, texto)] de um documento, todas ou só as pedidas.
+        """
+        sql = "SELECT page_no, text FROM pages WHERE content_hash = ?"
+        params = [content_hash]
+        if numbers:
+            sql += f" AND page_no IN ({', '.join('?' for _ in numbers)})"
+            params.extend(numbers)
+        with self._lock:
+            return self._conn.execute(sql + " ORDER BY page_no", params).fetchall()
+
+    def search(self, content_hash: str, query: str, limit: int = 3) -> list:
+        """
+            Retorna [(número da página, texto)] das páginas do documento mais relevantes
+            para a busca (BM25 sobre o texto sem acentos e reduzido a radicais), em ordem de página.
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT p.page_no, p.text FROM pages_fts f JOIN pages p ON p.id = f.rowid
+                WHERE pages_fts MATCH ? AND p.content_hash = ?
+                ORDER BY bm25(pages_fts) LIMIT ?
+            """, (match, content_hash, limit)).fetchall()
+        return sorted(rows)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_pdf_cache() -> PdfCache:
+    """
+        Retorna o cache de PDFs compartilhado (criado na primeira chamada).
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = PdfCache()
+    return _cache
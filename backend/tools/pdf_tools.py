@@ -1,50 +1,132 @@
 import os
-import fitz  
 import requests
 from agno.tools import tool
 from bs4 import BeautifulSoup
-from markdownify import markdownify as md 
+from tools.http_cache import cached_fetch
+from tools.content_extractor import PARSER, estimate_tokens
+from tools.pdf_cache import get_pdf_cache
+from tools.lazy_import import lazy_import
+
+fitz = lazy_import("fitz")
 
 BASE_URL = 'https://www.ifsudestemg.edu.br'
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
-}
+
+# Limite de texto devolvido ao agente quando nenhuma página ou busca é informada
+PDF_MAX_TOKENS = int(os.getenv("PDF_MAX_TOKENS", "6000"))
+QUERY_PAGES = 3  # Páginas devolvidas para uma busca dentro do PDF
+
+def extract_pdf_text(path: str) -> str:
+    """
+        Extrai o texto de um PDF local ou de uma URL (absoluta ou relativa ao site),
+        usando o cache de páginas em disco.
+        Erros de rede e de leitura são propagados para quem chamou.
+    """
+    full_url = path if os.path.exists(path) or path.startswith('http') else f"{BASE_URL}{path}"
+
+    cache = get_pdf_cache()
+    content_hash, _ = cache.document(full_url)
+    return "".join(text for _, text in cache.pages(content_hash))
+
+def pdf_text_from_bytes(data: bytes) -> str:
+    """
+        Extrai o texto de um PDF já baixado.
+    """
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        return "".join(page.get_text() for page in doc)
+
+def parse_page_range(pages, page_count: int) -> list:
+    """
+        Converte uma seleção de páginas ('3', '2-5', '1,4-6' ou lista de números)
+        na lista de páginas válidas do documento (numeradas a partir de 1).
+    """
+    if isinstance(pages, int):
+        pages = str(pages)
+    if isinstance(pages, (list, tuple)):
+        pages = ",".join(str(p) for p in pages)
+
+    numbers = []
+    for part in str(pages).replace(' ', '').split(','):
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        start, end = int(first), int(last or first)
+        numbers.extend(range(max(start, 1), min(end, page_count) + 1))
+    return sorted(set(numbers))
+
+def _format_pages(pages: list) -> str:
+    return "\n\n".join(f"--- Página {number} ---\n{text.strip()}" for number, text in pages)
+
+def pdf_text(cache, content_hash: str, page_count: int, pages=None, query: str = None) -> str:
+    """
+        Texto devolvido pelo read_pdf para um documento já extraído no cache: as páginas
+        pedidas, as mais relevantes para a busca ou o início do documento até PDF_MAX_TOKENS.
+    """
+    header = f"PDF com {page_count} página(s)."
+
+    if pages:
+        try:
+            numbers = parse_page_range(pages, page_count)
+        except ValueError:
+            return f"Intervalo de páginas inválido: '{pages}'. Use o formato '3', '2-5' ou '1,4-6'."
+        if not numbers:
+            return f"{header} Nenhuma página válida em '{pages}'."
+        return f"{header}\n\n{_format_pages(cache.pages(content_hash, numbers))}"
+
+    if query:
+        found = cache.search(content_hash, query, limit=QUERY_PAGES)
+        if not found:
+            return f"{header} Nenhuma página menciona '{query}'. Tente outros termos ou informe `pages`."
+        numbers = ", ".join(str(number) for number, _ in found)
+        return f"{header} Páginas mais relevantes para '{query}': {numbers}.\n\n{_format_pages(found)}"
+
+    # Documento inteiro, até o limite de tokens
+    selected, used = [], 0
+    for number, text in cache.pages(content_hash):
+        used += estimate_tokens(text)
+        if selected and used > PDF_MAX_TOKENS:
+            return (f"{header} Exibindo páginas 1-{len(selected)}; o restante foi omitido. "
+                    f"Use `query` ou `pages` para ler outras partes.\n\n{_format_pages(selected)}")
+        selected.append((number, text))
+    return f"{header}\n\n{_format_pages(selected)}"
+
+def pdf_links_from_html(html: str) -> list:
+    soup = BeautifulSoup(html, PARSER)
+
+    pdfs = []
+    for a in soup.find_all('a', href=True):
+        href = a['href']
+        if href.lower().endswith('.pdf') or 'at_download/file' in href:
+            pdfs.append({
+                "nome": a.get_text(strip=True) or "Documento PDF",
+                "url": href if href.startswith('http') else f"{BASE_URL}{href}"
+            })
+    return pdfs
 
 @tool(name='read_pdf', 
-      description='FERRAMENTA EXCLUSIVA para PDFs: ÚNICA ferramenta capaz de ler arquivos .pdf. Use OBRIGATORIAMENTE quando o link for um PDF (ex: Cardápios, Calendários, Editais). Não tente usar open_link ou selenium em arquivos PDF.')
-def read_pdf(path):
+      description='FERRAMENTA EXCLUSIVA para PDFs: ÚNICA ferramenta capaz de ler arquivos .pdf. Use OBRIGATORIAMENTE quando o link for um PDF (ex: Cardápios, Calendários, Editais). Não tente usar open_link ou selenium em arquivos PDF. Em PDFs longos, passe `query` (ex: "matrícula") para receber só as páginas que tratam do assunto, ou `pages` (ex: "2-4") para páginas específicas.')
+def read_pdf(path: str, pages: str = None, query: str = None):
     """
-        Abre um arquivo PDF local ou a partir de um URL e extrai seu conteúdo textual,
-        convertendo-o para o formato Markdown para facilitar a análise pelo agente de IA.
+        Abre um arquivo PDF local ou a partir de um URL e extrai seu conteúdo textual, página por página.
+        O texto fica em cache no disco, então releituras do mesmo documento não baixam o arquivo de novo.
 
         Esta ferramenta é crucial quando uma busca (como 'site_search') retorna um link direto para um 
         documento (.pdf) que contém a informação necessária (ex: Editais, Cardápios, Calendários Acadêmicos).
 
         Args:
             path (str): A URL completa (absoluta) do arquivo PDF a ser acessado.
+            pages (str): Páginas desejadas, ex: '3', '2-5' ou '1,4-6' (opcional).
+            query (str): Assunto procurado; devolve apenas as páginas mais relevantes (opcional).
 
         Returns:
-            str: O texto extraído do PDF no formato Markdown. Se a leitura falhar, retorna uma string de erro.
+            str: O texto das páginas selecionadas, marcadas com '--- Página N ---'. Se a leitura falhar, retorna uma string de erro.
     """
-    full_url = path if path.startswith('http') else f"https://www.ifsudestemg.edu.br{path}"
-
     try:
-        if not os.path.exists(path):
-            # Baixa o conteúdo binário do arquivo PDF da internet
-            response = requests.get(full_url, headers=HEADERS, timeout=30)
-            response.raise_for_status()
-
-            doc = fitz.open(stream=response.content, filetype="pdf")
-        else :
-            doc = fitz.open(path, filetype="pdf")
-
-        text = ""
+        full_url = path if os.path.exists(path) or path.startswith('http') else f"{BASE_URL}{path}"
 
-        for page in doc:
-            text += page.get_text()
+        cache = get_pdf_cache()
+        content_hash, page_count = cache.document(full_url)
+        return pdf_text(cache, content_hash, page_count, pages, query)
 
-        markdown = md(text)
-        return markdown
     except requests.exceptions.RequestException as e:
         return f"Erro de rede ao tentar acessar o PDF. Verifique se o link está funcionando: {path}. Erro: {e}"
     except Exception as e:
@@ -55,17 +137,7 @@ def read_pdf(path):
 def find_pdf_links(url: str) -> list:
     try:
         target_url = url if url.startswith('http') else f"{BASE_URL}{url}"
-        response = requests.get(target_url, headers=HEADERS, timeout=10)
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        pdfs = []
-        for a in soup.find_all('a', href=True):
-            href = a['href']
-            if href.lower().endswith('.pdf') or 'at_download/file' in href:
-                pdfs.append({
-                    "nome": a.get_text(strip=True) or "Documento PDF",
-                    "url": href if href.startswith('http') else f"{BASE_URL}{href}"
-                })
-        return pdfs
+        response = cached_fetch(target_url, timeout=10)
+        return pdf_links_from_html(response.text)
     except Exception:
         return []
\ No newline at end of file
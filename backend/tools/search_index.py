@@ -0,0 +1,278 @@
+import os
+import re
+import sys
+import time
+import sqlite3
+import threading
+from urllib.parse import urljoin, urldefrag
+from bs4 import BeautifulSoup
+
+from tools.http_cache import cached_fetch
+from tools.pdf_tools import extract_pdf_text
+from tools.web_tools import PORTAL_TYPES
+from tools.content_extractor import extract_content, PARSER, DOCUMENT_LINK
+from tools.text_utils import fold_accents, tokenize, stem, stem_text, fts_query
+
+# Índice de busca local (SQLite FTS5) das páginas e PDFs do campus
+INDEX_DB = os.getenv("SEARCH_INDEX_DB", "tmp/search_index.db")
+SITEMAP_URL = "https://www.ifsudestemg.edu.br/barbacena/mapadosite"
+
+SNIPPET_CHARS = 150
+_DATE = re.compile(r'(\d{2})/(\d{2})/(\d{4})')
+_ISO_DATE = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+
+
+class SearchIndex:
+    """
+        Índice de texto completo com ranqueamento BM25. O texto é indexado sem acentos
+        e reduzido a radicais, então 'matrícula' encontra 'matrículas' e 'matricular'.
+    """
+    def __init__(self, db_file: str = INDEX_DB):
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY,
+                url TEXT UNIQUE NOT NULL,
+                title TEXT,
+                body TEXT,
+                item_type TEXT,
+                created TEXT,
+                indexed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_documents_created ON documents (created);
+            CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+                title, body, tokenize = 'unicode61 remove_diacritics 2'
+            );
+        """)
+        self._conn.commit()
+
+    def add(self, url: str, title: str, body: str, item_type: str = None, created: str = None):
+        """
+            Insere ou atualiza um documento no índice.
+
+            Args:
+                url (str): URL do documento (chave única).
+                title (str): Título do documento.
+                body (str): Texto do documento.
+                item_type (str): Tipo do conteúdo no Plone (ex: 'collective.nitf.content', 'File').
+                created (str): Data de criação no formato AAAA-MM-DD.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM documents WHERE url = ?", (url,)).fetchone()
+            if row:
+                self._conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (row[0],))
+                self._conn.execute(
+                    "UPDATE documents SET title = ?, body = ?, item_type = ?, created = ?, indexed_at = ? WHERE id = ?",
+                    (title, body, item_type, created, time.time(), row[0])
+                )
+                doc_id = row[0]
+            else:
+                doc_id = self._conn.execute(
+                    "INSERT INTO documents (url, title, body, item_type, created, indexed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, title, body, item_type, created, time.time())
+                ).lastrowid
+
+            self._conn.execute(
+                "INSERT INTO documents_fts (rowid, title, body) VALUES (?, ?, ?)",
+                (doc_id, stem_text(title or ""), stem_text(body or ""))
+            )
+            self._conn.commit()
+
+    def remove(self, url: str):
+        with self._lock:
+            row = self._conn.execute("SELECT id FROM documents WHERE url = ?", (url,)).fetchone()
+            if row:
+                self._conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (row[0],))
+                self._conn.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+                self._conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def search(self, query: str, item_types: list = None, since: str = None, sort: str = 'relevance', limit: int = 10) -> list:
+        """
+            Busca documentos no índice.
+
+            Args:
+                query (str): Texto livre da busca.
+                item_types (list): Tipos Plone aceitos (None = todos).
+                since (str): Data mínima de criação (AAAA-MM-DD).
+                sort (str): 'relevance', 'date' ou 'title'.
+                limit (int): Quantidade máxima de resultados.
+
+            Returns:
+                list: Lista de dicionários com url, title, item_type, created e snippet.
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        words = tokenize(query)
+
+        sql = """
+            SELECT d.url, d.title, d.body, d.item_type, d.created
+            FROM documents_fts f JOIN documents d ON d.id = f.rowid
+            WHERE documents_fts MATCH ?
+        """
+        params = [match]
+
+        if item_types:
+            sql += f" AND d.item_type IN ({', '.join('?' for _ in item_types)})"
+            params.extend(item_types)
+        if since:
+            sql += " AND d.created >= ?"
+            params.append(since)
+
+        if sort == 'date':
+            sql += " ORDER BY d.created IS NULL, d.created DESC"
+        elif sort == 'title':
+            sql += " ORDER BY d.title COLLATE NOCASE"
+        else:
+            sql += " ORDER BY bm25(documents_fts, 5.0, 1.0)"  # Título pesa mais que o corpo
+        sql += " LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        return [
+            {"url": url, "title": title, "item_type": item_type, "created": created, "snippet": _snippet(body or "", words)}
+            for url, title, body, item_type, created in rows
+        ]
+
+
+def _snippet(body: str, words: list) -> str:
+    # Recorta o trecho do texto original em volta da primeira palavra da busca encontrada
+    folded = fold_accents(body)
+    positions = [folded.find(stem(w)) for w in words]
+    positions = [p for p in positions if p != -1]
+    start = max(min(positions) - SNIPPET_CHARS // 3, 0) if positions else 0
+
+    snippet = " ".join(body[start:start + SNIPPET_CHARS].split())
+    return ("..." if start else "") + snippet + ("..." if start + SNIPPET_CHARS < len(body) else "")
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> SearchIndex:
+    """
+        Retorna o índice de busca compartilhado (criado na primeira chamada).
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SearchIndex()
+    return _index
+
+
+def _meta_date(soup: BeautifulSoup):
+    for name in ('DC.date.created', 'dcterms.created', 'article:published_time', 'DC.date.modified'):
+        tag = soup.find('meta', attrs={'name': name}) or soup.find('meta', attrs={'property': name})
+        if tag and tag.get('content'):
+            found = _ISO_DATE.search(tag['content'])
+            if found:
+                return "-".join(found.groups())
+
+    byline = soup.select_one('.documentByLine, .documentPublished')
+    if byline:
+        found = _DATE.search(byline.get_text(" "))
+        if found:
+            day, month, year = found.groups()
+            return f"{year}-{month}-{day}"
+    return None
+
+
+def _portal_type(soup: BeautifulSoup):
+    # O Plone marca o tipo do conteúdo no <body> como 'portaltype-collective-nitf-content'
+    classes = (soup.body.get('class') if soup.body else None) or []
+    for css_class in classes:
+        if css_class.startswith('portaltype-'):
+            value = css_class[len('portaltype-'):]
+            for portal_type in PORTAL_TYPES.values():
+                if portal_type.replace('.', '-').lower() == value:
+                    return portal_type
+            return value
+    return None
+
+
+def page_to_document(html: str, url: str) -> dict:
+    """
+        Converte o HTML de uma página do portal no documento indexável
+        (título, texto principal, tipo de conteúdo e data de criação).
+    """
+    soup = BeautifulSoup(html, PARSER)
+
+    heading = soup.select_one('h1.documentFirstHeading') or soup.find('h1')
+    title = heading.get_text(" ", strip=True) if heading else (soup.title.get_text(strip=True) if soup.title else url)
+
+    return {
+        "title": title,
+        "body": extract_content(html, url, max_tokens=10 ** 6)["text"],
+        "item_type": _portal_type(soup),
+        "created": _meta_date(soup),
+    }
+
+
+def index_url(url: str, index: SearchIndex = None, title: str = None) -> bool:
+    """
+        Baixa uma página ou PDF do site e o adiciona ao índice.
+
+        Returns:
+            bool: True se o documento foi indexado.
+    """
+    index = index or get_index()
+
+    if DOCUMENT_LINK.search(url):
+        text = extract_pdf_text(url)
+        index.add(url, title or url.rsplit('/', 1)[-1], text, item_type='File')
+        return True
+
+    response = cached_fetch(url, timeout=15)
+    response.raise_for_status()
+    if 'html' not in response.headers.get('Content-Type', 'text/html'):
+        return False
+
+    index.add(url, **page_to_document(response.text, url))
+    return True
+
+
+def build_from_sitemap(sitemap_url: str = SITEMAP_URL, limit: int = 500, index: SearchIndex = None) -> int:
+    """
+        Indexa as páginas e PDFs do campus listados no mapa do site.
+
+        Returns:
+            int: Quantidade de documentos indexados.
+    """
+    response = cached_fetch(sitemap_url, timeout=15)
+    response.raise_for_status()
+    soup = BeautifulSoup(response.text, PARSER)
+
+    urls = {}
+    for a in soup.find_all('a', href=True):
+        url = urldefrag(urljoin(sitemap_url, a['href']))[0]
+        if 'ifsudestemg.edu.br' in url and 'barbacena' in url:
+            urls.setdefault(url, a.get_text(" ", strip=True) or None)
+
+    indexed = 0
+    for url, title in list(urls.items())[:limit]:
+        try:
+            indexed += index_url(url, index=index, title=title)
+        except Exception as e:
+            print(f"Falha ao indexar {url}: {e}")
+    return indexed
+
+
+if __name__ == '__main__':
+    # Uso: python -m tools.search_index [URL do mapa do site]
+    total = build_from_sitemap(sys.argv[1] if len(sys.argv) > 1 else SITEMAP_URL)
+    print(f"{total} documentos indexados em {INDEX_DB}")
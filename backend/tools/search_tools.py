@@ -0,0 +1,52 @@
+from agno.tools import tool
+from tools.search_index import get_index
+from tools.web_tools import PORTAL_TYPES, date_range_start
+
+@tool(name='local_search',
+      description='BUSCA LOCAL RÁPIDA: Busca no índice local das páginas e PDFs do Campus Barbacena (responde em milissegundos, ignora acentos e aceita variações como plural/singular). Aceita os mesmos filtros de site_search: tipo de documento (Notícia, Edital, Evento, Arquivo, etc), data e ordenação. Use ANTES de site_search_simple/site_search quando não souber a URL.')
+def local_search(query: str, item_types: list[str] = None, date_range: str = None, sort_by: str = None) -> str:
+    """
+        Realiza busca no índice local (SQLite FTS5 com ranqueamento BM25), sem acessar o site.
+        Args:
+            query (str): Termo de busca.
+            item_types (list[str]): Lista de tipos: ['Página', 'Evento', 'Arquivo', 'Notícia', 'Edital', 'Licitação'].
+            date_range (str): Filtro de data: 'Ontem', 'Última Semana', 'Último Mês', 'Sempre'.
+            sort_by (str): Ordenação: 'Relevância', 'Data (Mais Recente)', 'Alfabética'.
+    """
+    try:
+        index = get_index()
+        if not index.count():
+            return "O índice local ainda não foi construído. Use site_search_simple ou site_search."
+
+        # Converte os nomes amigáveis para os tipos internos do Plone
+        portal_types = None
+        if item_types:
+            portal_types = [v for item in item_types for k, v in PORTAL_TYPES.items() if k.lower() == item.lower()]
+
+        start_date = date_range_start(date_range) if date_range else None
+        since = start_date.strftime('%Y-%m-%d') if start_date else None
+
+        sort = 'relevance'
+        if sort_by:
+            sb_lower = sort_by.lower()
+            if 'data' in sb_lower or 'recente' in sb_lower:
+                sort = 'date'
+            elif 'alfabética' in sb_lower or 'alfabetica' in sb_lower:
+                sort = 'title'
+
+        hits = index.search(query, item_types=portal_types, since=since, sort=sort, limit=10)
+        if not hits:
+            return "Nenhum resultado encontrado no índice local com os filtros selecionados."
+
+        results = [f"Encontrados {len(hits)} itens para '{query}' no índice local:"]
+        for hit in hits:
+            entry = f"\n- Título: {hit['title']}\n  Link: {hit['url']}"
+            if hit['created']:
+                entry += f"\n  Data: {hit['created']}"
+            if hit['snippet']:
+                entry += f"\n  Resumo: {hit['snippet']}"
+            results.append(entry)
+        return "\n".join(results)
+
+    except Exception as e:
+        return f"Erro ao realizar a busca local: {str(e)}"
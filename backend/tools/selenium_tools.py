@@ -1,9 +1,6 @@
 from agno.tools import tool
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from tools.browser_pool import render_page, BrowserPoolExhausted
+from tools.content_extractor import extract_content, DEFAULT_MAX_TOKENS
 
 # Código base do site do Instituto Federal - Campus Barbacena
 BASE_URL = 'https://www.ifsudestemg.edu.br'
@@ -11,7 +8,7 @@ BASE_URL = 'https://www.ifsudestemg.edu.br'
 @tool(
     name='open_link_in_selenium',
     description='SEGUNDA ESCOLHA para páginas dinâmicas: Abre URL usando navegador real (Chrome headless) para carregar conteúdo JavaScript/AJAX. Use quando: 1) open_link falhou ou retornou conteúdo incompleto, 2) Página usa JavaScript pesado (ex: corpo docente, listas longas), 3) Conteúdo aparece vazio ou cortado. IMPORTANTE: Mais lento que open_link, use apenas quando necessário.')
-def open_link_in_selenium(url: str) -> dict:
+def open_link_in_selenium(url: str, wait_for_selector: str = None, max_tokens: int = DEFAULT_MAX_TOKENS, cursor: int = 0) -> dict:
     """
         Abre uma página web utilizando um navegador real controlado pelo Selenium (Google Chrome em modo headless).
         Esta ferramenta deve ser utilizada quando o conteúdo da página é gerado dinamicamente via JavaScript, 
@@ -19,9 +16,13 @@ def open_link_in_selenium(url: str) -> dict:
 
         Args:
             url (str): URL completa da página que deverá ser aberta no navegador.
+            wait_for_selector (str): Seletor CSS opcional que deve aparecer antes de capturar o HTML
+                                     (ex: '#content-core'). Se omitido, espera a rede ficar ociosa.
+            max_tokens (int): Orçamento aproximado de tokens para o texto retornado.
+            cursor (int): Posição de continuação ("next_cursor") devolvida por uma chamada anterior.
 
         Returns:
-            dict: retorna o HTML final do DOM após o carregamento completo da página ou mensagem detalhando o erro ocorrido.
+            dict: conteúdo principal do DOM final em Markdown (mesmo formato de open_link) ou mensagem detalhando o erro ocorrido.
 
         Obs: O navegador é executado em modo headless (sem interface gráfica).
     """
@@ -31,26 +32,15 @@ def open_link_in_selenium(url: str) -> dict:
     else:
         full_url = f"{BASE_URL.rstrip('/')}/{url.lstrip('/')}"
 
-    # Configuração do navegador Chrome, executa-o em modo headless (sem interface gráfica)
-    options = Options()
-    options.add_argument('--headless=new')
-
-    # Baixa e inicializa o ChromeDriver compatível com o Google Chrome instalado na máquina
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
-        options=options
-    )
-
-    # O Selenium espera até que o evento load seja disparado (documento carregou)
-    driver.get(full_url)
-
-    # Retorna o DOM atual do navegador, em HTML.
-    html = driver.page_source
-
-    # Fecha a janela do navegador e finaliza o processo do ChromeDriver, 
-    # liberando todos os recursos de memória utilizados
-    driver.quit()
-
-    # Limita o tamanho do HTML para evitar sobrecarga no LLM
-    html = html[:20000]
-    return {'html': html}
\ No newline at end of file
+    # Usa um navegador já iniciado do pool; o navegador é devolvido (ou finalizado,
+    # em caso de erro) automaticamente ao final
+    try:
+        html = render_page(full_url, wait_for_selector=wait_for_selector)
+    except BrowserPoolExhausted as e:
+        return {'error': f"Todos os navegadores estão ocupados, tente novamente em instantes. {e}"}
+    except Exception as e:
+        return {'error': f"Erro ao abrir a URL {url} no navegador: {e}"}
+
+    # Isola o conteúdo principal e limita o tamanho ao orçamento de tokens,
+    # devolvendo um cursor para continuar a leitura de páginas longas
+    return extract_content(html, full_url, max_tokens=max_tokens, cursor=cursor)
\ No newline at end of file
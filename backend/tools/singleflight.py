@@ -0,0 +1,95 @@
+import asyncio
+import threading
+from typing import Callable, Hashable
+
+from metrics import COALESCED_REQUESTS
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+        Junta chamadas simultâneas com a mesma chave: a primeira executa a função e as
+        outras esperam e recebem o mesmo resultado (ou a mesma exceção). Quando vários
+        turnos pedem a mesma página ou PDF ao mesmo tempo, o site recebe uma só requisição.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, function: Callable, copy: Callable = None):
+        """
+            Executa `function` uma vez por chave entre as chamadas simultâneas.
+
+            Args:
+                key (Hashable): Identifica chamadas equivalentes (ex: a URL).
+                function (Callable): Função sem argumentos que produz o resultado.
+                copy (Callable): Aplicada ao resultado entregue às chamadas que esperaram,
+                    para objetos que não podem ser compartilhados entre threads.
+
+            Returns:
+                O resultado de `function`.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            COALESCED_REQUESTS.inc(scope=self.name)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy(call.result) if copy else call.result
+
+        try:
+            call.result = function()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight:
+    """
+        Mesma ideia do SingleFlight para corrotinas: as chamadas simultâneas com a mesma
+        chave, no mesmo event loop, aguardam a tarefa da primeira em vez de bloquear a thread.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self._tasks = {}
+
+    async def do(self, key: Hashable, function: Callable, copy: Callable = None):
+        """
+            Executa a corrotina criada por `function` uma vez por chave entre as chamadas simultâneas.
+
+            Args:
+                key (Hashable): Identifica chamadas equivalentes (ex: a URL).
+                function (Callable): Função sem argumentos que devolve a corrotina.
+                copy (Callable): Aplicada ao resultado entregue às chamadas que esperaram.
+
+            Returns:
+                O resultado da corrotina.
+        """
+        key = (asyncio.get_running_loop(), key)
+        task = self._tasks.get(key)
+        if task is not None:
+            COALESCED_REQUESTS.inc(scope=self.name)
+            result = await asyncio.shield(task)
+            return copy(result) if copy else result
+
+        task = self._tasks[key] = asyncio.ensure_future(function())
+        # A chave sai ao fim da tarefa, mesmo se quem a iniciou for cancelado antes
+        task.add_done_callback(lambda _: self._tasks.pop(key, None) if self._tasks.get(key) is task else None)
+        return await asyncio.shield(task)
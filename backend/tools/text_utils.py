@@ -0,0 +1,95 @@
+import re
+import unicodedata
+
+# Palavras muito frequentes em português que não ajudam a diferenciar documentos
+STOPWORDS = {
+    'a', 'ao', 'aos', 'as', 'ate', 'com', 'como', 'da', 'das', 'de', 'do', 'dos', 'e', 'ela', 'ele', 'em',
+    'entre', 'era', 'essa', 'esse', 'esta', 'este', 'eu', 'foi', 'ha', 'isso', 'isto', 'ja', 'mais', 'mas',
+    'me', 'meu', 'minha', 'muito', 'na', 'nas', 'nao', 'no', 'nos', 'o', 'os', 'ou', 'para', 'pela', 'pelo',
+    'por', 'pra', 'qual', 'quais', 'quando', 'que', 'quem', 'se', 'sem', 'ser', 'seu', 'sua', 'sobre', 'so',
+    'tem', 'um', 'uma', 'umas', 'uns', 'voce', 'sao', 'onde', 'tambem', 'ter', 'vai',
+}
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+# Regras de um stemmer leve para português (inspirado no RSLP), aplicadas sobre texto sem acentos.
+# Cada etapa remove no máximo um sufixo, sempre deixando um radical com pelo menos 3 letras.
+_PLURAL = [('oes', 'ao'), ('aes', 'ao'), ('ais', 'al'), ('eis', 'el'), ('ois', 'ol'), ('ns', 'm'),
+           ('res', 'r'), ('zes', 'z'), ('ses', 's'), ('s', '')]
+_ADVERB = [('mente', '')]
+_DEGREE = [('zinho', ''), ('zinha', ''), ('inho', ''), ('inha', ''), ('issimo', ''), ('issima', '')]
+_NOUN = [('amento', ''), ('imento', ''), ('mento', ''), ('acao', ''), ('icao', ''), ('idade', ''),
+         ('ismo', ''), ('ista', ''), ('avel', ''), ('ivel', ''), ('ncia', '')]
+_VERB = [('aram', ''), ('eram', ''), ('iram', ''), ('ando', ''), ('endo', ''), ('indo', ''), ('ava', ''),
+         ('ar', ''), ('er', ''), ('ir', ''), ('ou', '')]
+_VOWEL = [('a', ''), ('e', ''), ('o', '')]
+
+MIN_STEM = 3
+
+
+def fold_accents(text: str) -> str:
+    """
+        Converte o texto para minúsculas e remove acentos (ex: 'Calendário' -> 'calendario').
+    """
+    normalized = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in normalized if not unicodedata.combining(c))
+
+
+def tokenize(text: str, drop_stopwords: bool = True) -> list:
+    """
+        Separa o texto em palavras sem acento, opcionalmente removendo stopwords.
+    """
+    words = _WORD.findall(fold_accents(text))
+    if drop_stopwords:
+        words = [w for w in words if w not in STOPWORDS]
+    return words
+
+
+def _apply(word: str, rules) -> tuple:
+    for suffix, replacement in rules:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            return word[:-len(suffix)] + replacement, True
+    return word, False
+
+
+def stem(word: str) -> str:
+    """
+        Reduz uma palavra (já sem acentos) ao seu radical aproximado,
+        ex: 'matrículas', 'matricular' e 'matrícula' -> 'matricul'.
+    """
+    if len(word) <= MIN_STEM or word.isdigit():
+        return word
+
+    word, _ = _apply(word, _PLURAL)
+    word, _ = _apply(word, _ADVERB)
+    word, _ = _apply(word, _DEGREE)
+    word, changed = _apply(word, _NOUN)
+    if not changed:
+        word, _ = _apply(word, _VERB)
+    word, _ = _apply(word, _VOWEL)
+    return word
+
+
+def stem_text(text: str) -> str:
+    """
+        Converte um texto para a sequência de radicais usada na indexação.
+    """
+    return ' '.join(stem(w) for w in tokenize(text))
+
+
+def fts_query(text: str):
+    """
+        Monta a expressão MATCH do FTS5 para um texto livre: cada radical vira um prefixo
+        ligado por OR, e o BM25 favorece quem casa mais termos. Retorna None se não sobrar palavra.
+
+        Radicais curtos demais para prefixo ('c'* casaria quase todo documento) entram como
+        termo exato se tiverem duas letras (ex: 'ti', 'rh') e são descartados se tiverem uma.
+    """
+    terms = []
+    for word in tokenize(text):
+        root = stem(word)
+        if len(root) >= MIN_STEM:
+            terms.append(f'"{root}"*')
+        elif len(root) > 1:
+            terms.append(f'"{root}"')
+    return " OR ".join(terms) or None
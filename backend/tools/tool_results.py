@@ -0,0 +1,285 @@
+import os
+import re
+import ast
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+
+from metrics import HISTORY_TOKENS
+from tracing import span
+from tools.content_extractor import estimate_tokens
+
+# Compactação dos resultados de ferramentas guardados no histórico. Com add_history_to_context,
+# as páginas, HTMLs e PDFs inteiros devolvidos pelas ferramentas voltariam ao modelo em cada um
+# dos próximos turnos; depois do turno, cada resultado grande é trocado no histórico por um
+# resumo extrativo (fatos, fonte e uma chave) e o conteúdo completo fica neste banco, de onde a
+# ferramenta recall_tool_result o devolve se o modelo precisar.
+TOOL_RESULTS_DB = os.getenv("TOOL_RESULTS_DB", "tmp/tool_results.db")
+HISTORY_COMPACTION = os.getenv("HISTORY_COMPACTION", "1") == "1"
+COMPACT_MIN_CHARS = int(os.getenv("COMPACT_MIN_CHARS", "1500"))  # Resultados menores ficam como estão
+COMPACT_CHARS = int(os.getenv("COMPACT_CHARS", "1200"))  # Tamanho aproximado do resumo
+RETENTION_DAYS = float(os.getenv("TOOL_RESULTS_RETENTION_DAYS", "7"))
+PRUNE_INTERVAL = 3600
+
+COMPACT_MARK = "[Resultado compactado"
+_KEY = re.compile(r'chave: (tr_[0-9a-f]+)')
+
+# Linhas com datas, horários, valores, contatos ou links: são as que costumam responder perguntas
+_FACT = re.compile(
+    r'\d{1,2}/\d{1,2}|\b\d{1,2}h\d{0,2}\b|\b(19|20)\d{2}\b|R\$|@|https?://|\(\d{2}\)|\d{4,5}-\d{4}'
+    r'|\b(prazo|inscri|matr[ií]cula|edital|vagas?|hor[aá]rio|local|contato|telefone|e-mail)',
+    re.IGNORECASE
+)
+
+
+def _payload(content: str) -> tuple:
+    """
+        Separa o texto e os links de um resultado. As ferramentas devolvem texto ou um dict
+        (que o agno converte para string, em JSON ou na representação do Python).
+    """
+    data = None
+    if content.lstrip().startswith('{'):
+        for parse in (json.loads, ast.literal_eval):
+            try:
+                data = parse(content)
+                break
+            except (ValueError, SyntaxError):
+                continue
+    if not isinstance(data, dict):
+        return content, []
+    if isinstance(data.get('results'), list):
+        # open_links: um resultado por URL, com o endereço como título de seção
+        items = [item for item in data['results'] if isinstance(item, dict)]
+        text = "\n".join(f"# {item.get('url')}\n{_fields(item)[0]}" for item in items)
+        return text, [link for item in items for link in _fields(item)[1]]
+    return _fields(data)
+
+
+def _fields(data: dict) -> tuple:
+    text = data.get('text') or data.get('content') or data.get('error') or ""
+    return str(text), [link for link in data.get('links') or [] if isinstance(link, dict)]
+
+
+def condense(content: str, max_chars: int = COMPACT_CHARS) -> str:
+    """
+        Resumo extrativo de um resultado: as primeiras linhas (título/cabeçalho), os títulos
+        de seção e as linhas com fatos (datas, valores, contatos, links), na ordem original,
+        mais os primeiros links da página.
+    """
+    text, links = _payload(content)
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+
+    kept, size = [], 0
+    for position, line in enumerate(lines):
+        if position >= 3 and not line.startswith('#') and not _FACT.search(line):
+            continue
+        line = line if len(line) <= 300 else line[:297] + "..."
+        if size + len(line) > max_chars:
+            break
+        kept.append(line)
+        size += len(line) + 1
+
+    if links:
+        kept.append("Links: " + "; ".join(f"{link.get('text', '')} ({link.get('url', '')})" for link in links[:8]))
+    return "\n".join(kept)
+
+
+class ToolResultStore:
+    """
+        Resultados completos das ferramentas, endereçados pela chave que aparece no histórico
+        compactado. Resultados iguais têm a mesma chave.
+    """
+    def __init__(self, db_file: str = TOOL_RESULTS_DB, retention_days: float = RETENTION_DAYS):
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._last_prune = 0
+
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS tool_results (
+                key TEXT PRIMARY KEY,
+                tool TEXT,
+                args TEXT,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_tool_results_created ON tool_results (created_at)")
+        self._conn.commit()
+
+    def put(self, tool: str, args: dict, content: str) -> str:
+        """
+            Guarda o resultado completo.
+
+            Returns:
+                str: A chave do resultado (ex: 'tr_3f9a1c2b7d').
+        """
+        key = "tr_" + hashlib.sha1(f"{tool}\n{content}".encode("utf-8")).hexdigest()[:10]
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tool_results (key, tool, args, content, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, tool, json.dumps(args or {}, ensure_ascii=False, default=str), content, time.time())
+            )
+            self._conn.commit()
+            if time.time() - self._last_prune > PRUNE_INTERVAL:
+                self._last_prune = time.time()
+                self._conn.execute("DELETE FROM tool_results WHERE created_at < ?",
+                                   (time.time() - self.retention_days * 86400,))
+                self._conn.commit()
+        return key
+
+    def get(self, key: str):
+        """
+            Returns:
+                dict | None: {tool, args, content} ou None se a chave não existir (ou já tiver expirado).
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT tool, args, content FROM tool_results WHERE key = ?", (key,)).fetchone()
+        if not row:
+            return None
+        return {"tool": row[0], "args": json.loads(row[1]), "content": row[2]}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> ToolResultStore:
+    """
+        Retorna o banco de resultados compartilhado (criado na primeira chamada).
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ToolResultStore()
+    return _store
+
+
+def _source(args: dict) -> str:
+    for key in ("url", "path", "query", "name", "area", "day"):
+        if args.get(key):
+            return f"{key}={args[key]}"
+    return ""
+
+
+def compact_messages(messages: list, tools: list = None) -> tuple:
+    """
+        Troca, nas mensagens de um turno, o conteúdo dos resultados de ferramentas grandes
+        pelo resumo com a chave do conteúdo completo. Mensagens repetidas do histórico e
+        resultados já compactados são ignorados.
+
+        Args:
+            messages (list): Mensagens do turno (agno Message).
+            tools (list): Execuções de ferramentas do turno (ToolExecution), compactadas também
+                para não gravar o resultado completo duas vezes no banco de sessões.
+
+        Returns:
+            tuple: (tokens estimados dos resultados antes, tokens depois)
+    """
+    before = after = 0
+    compacted = {}
+    for message in messages or []:
+        content = message.content
+        if message.role != "tool" or message.from_history or not isinstance(content, str):
+            continue
+        if len(content) < COMPACT_MIN_CHARS or content.startswith(COMPACT_MARK):
+            continue
+
+        args = message.tool_args or {}
+        key = get_store().put(message.tool_name, args, content)
+        source = _source(args)
+        message.content = (
+            f"{COMPACT_MARK} de {message.tool_name}{f' ({source})' if source else ''} | chave: {key}]\n"
+            f"{condense(content)}\n"
+            f"(Conteúdo completo: recall_tool_result(key=\"{key}\"))"
+        )
+        compacted[message.tool_call_id] = message.content
+        before += estimate_tokens(content)
+        after += estimate_tokens(message.content)
+
+    for execution in tools or []:
+        if execution.tool_call_id in compacted:
+            execution.result = compacted[execution.tool_call_id]
+    return before, after
+
+
+def compact_tool_results(run_output):
+    """
+        Post-hook do agno (post_hooks): compacta os resultados de ferramentas do turno que
+        terminou, antes de ele ser gravado na sessão e reaproveitado como histórico.
+    """
+    if not HISTORY_COMPACTION:
+        return
+    with span("compact_history") as current:
+        before, after = compact_messages(run_output.messages, run_output.tools)
+        if current:
+            current.set(tool_tokens_before=before, tool_tokens_after=after)
+    if before:
+        HISTORY_TOKENS.inc(before, stage="original")
+        HISTORY_TOKENS.inc(after, stage="compacted")
+
+
+def history_report(session) -> list:
+    """
+        Para cada turno da sessão: tokens de entrada medidos e os tokens dos resultados de
+        ferramentas que ele deixa no histórico, compactados e como seriam sem compactação.
+
+        Returns:
+            list: [{turn, prompt, input_tokens, tool_tokens, tool_tokens_uncompacted}]
+    """
+    rows = []
+    for number, run in enumerate(session.runs or [], start=1):
+        compacted = original = 0
+        for message in run.messages or []:
+            if message.role != "tool" or message.from_history or not isinstance(message.content, str):
+                continue
+            compacted += estimate_tokens(message.content)
+            match = _KEY.search(message.content) if message.content.startswith(COMPACT_MARK) else None
+            full = get_store().get(match.group(1)) if match else None
+            original += estimate_tokens(full["content"]) if full else estimate_tokens(message.content)
+
+        prompt = run.input.input_content if run.input else None
+        rows.append({
+            "turn": number,
+            "prompt": prompt if isinstance(prompt, str) else None,
+            "input_tokens": getattr(run.metrics, "input_tokens", None) if run.metrics else None,
+            "tool_tokens": compacted,
+            "tool_tokens_uncompacted": original,
+        })
+    return rows
+
+
+if __name__ == '__main__':
+    from agno.db.sqlite import SqliteDb
+    from agno.db.base import SessionType
+
+    parser = argparse.ArgumentParser(description="Compactação dos resultados de ferramentas no histórico.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report = commands.add_parser("report", help="Tokens por turno de uma sessão, com e sem compactação.")
+    report.add_argument("session_id")
+    report.add_argument("--db", default=os.getenv("AGENT_DB", "tmp/agent.db"))
+    show = commands.add_parser("show", help="Mostra o resultado completo guardado para uma chave.")
+    show.add_argument("key")
+    args = parser.parse_args()
+
+    if args.command == "show":
+        result = get_store().get(args.key)
+        print(json.dumps(result, ensure_ascii=False, indent=2) if result else "Chave não encontrada.")
+    else:
+        session = SqliteDb(db_file=args.db).get_session(session_id=args.session_id, session_type=SessionType.AGENT)
+        if session is None:
+            raise SystemExit("Sessão não encontrada.")
+        # Cada turno recebe como histórico os resultados dos turnos anteriores (até num_history_runs)
+        print(f"{'turno':>5} {'entrada':>9} {'ferr. (compactado)':>19} {'ferr. (original)':>17}  pergunta")
+        for row in history_report(session):
+            print(f"{row['turn']:>5} {row['input_tokens'] if row['input_tokens'] is not None else '-':>9} "
+                  f"{row['tool_tokens']:>19} {row['tool_tokens_uncompacted']:>17}  {(row['prompt'] or '')[:60]}")
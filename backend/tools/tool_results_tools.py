@@ -0,0 +1,34 @@
+from agno.tools import tool
+from tools.tool_results import get_store
+
+MAX_CHARS = 8000  # Trecho devolvido por chamada (~2000 tokens); o restante vem com next_cursor
+
+@tool(name='recall_tool_result',
+      description='HISTÓRICO: Resultados de ferramentas de turnos anteriores aparecem compactados no histórico ("[Resultado compactado ... | chave: tr_...]"). Use esta ferramenta com a chave para reler o conteúdo completo quando o resumo não bastar, EM VEZ de abrir a página ou o PDF de novo. Se vier "next_cursor", chame de novo com cursor=next_cursor para o restante.')
+def recall_tool_result(key: str, cursor: int = 0) -> dict:
+    """
+        Recupera o resultado completo de uma ferramenta a partir da chave do histórico compactado.
+
+        Args:
+            key (str): Chave do resultado (ex: 'tr_3f9a1c2b7d').
+            cursor (int): Posição de continuação ("next_cursor") devolvida por uma chamada anterior.
+
+        Returns:
+            dict: {"tool", "args", "content", "next_cursor"} ou {"error": "<mensagem>"}.
+    """
+    try:
+        result = get_store().get(key.strip())
+        if result is None:
+            return {"error": f"Resultado '{key}' não encontrado (pode ter expirado). Execute a ferramenta original novamente."}
+
+        content = result["content"]
+        end = cursor + MAX_CHARS
+        return {
+            "tool": result["tool"],
+            "args": result["args"],
+            "content": content[cursor:end],
+            "next_cursor": end if end < len(content) else None,
+        }
+
+    except Exception as e:
+        return {"error": f"Erro ao recuperar o resultado: {str(e)}"}
@@ -1,46 +1,216 @@
-import requests
+import os
+import time
+import contextvars
 from agno.tools import tool
 from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, wait
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-
-from selenium.webdriver.firefox.service import Service as FirefoxService
-from selenium.webdriver.firefox.options import Options as FirefoxOptions
-from webdriver_manager.firefox import GeckoDriverManager
+from tools.http_client import fetch
+from tools.http_cache import cached_fetch
+from tools.browser_pool import render_page, BrowserPoolExhausted
+from tools.content_extractor import extract_content, PARSER, DEFAULT_MAX_TOKENS, CHARS_PER_TOKEN, DOCUMENT_LINK
+from tools.pdf_tools import read_pdf
+from metrics import OPEN_LINKS
+from tracing import span
 
 # Código base do site do Instituto Federal - Campus Barbacena
 BASE_URL = 'https://www.ifsudestemg.edu.br'
-HEADERS = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36'
+
+# open_links: várias URLs em uma chamada de ferramenta, baixadas em paralelo
+OPEN_LINKS_MAX_URLS = int(os.getenv("OPEN_LINKS_MAX_URLS", "8"))
+OPEN_LINKS_WORKERS = int(os.getenv("OPEN_LINKS_WORKERS", "4"))        # Downloads simultâneos por chamada
+OPEN_LINKS_BUDGET = float(os.getenv("OPEN_LINKS_BUDGET", "20"))       # Segundos até devolver o que ficou pronto
+OPEN_LINKS_MAX_TOKENS = int(os.getenv("OPEN_LINKS_MAX_TOKENS", "1000"))  # Orçamento de cada URL
+
+# Mapeamento de Tipos (Tradução amigável do sistema Plone usado pelo site do IF)
+PORTAL_TYPES = {
+    'Página': 'Document',
+    'Evento': 'Event',
+    'Arquivo': 'File',
+    'Pasta': 'Folder',
+    'Link': 'Link',
+    'Ato de Pessoal': 'ato-de-pessoal',
+    'Notícia': 'collective.nitf.content',
+    'Contrato': 'contrato',
+    'Convocação': 'convocacao',
+    'Edital': 'edital',
+    'Licitação': 'licitacao',
+    'Oportunidade': 'oportunidade',
+    'Multimídia': 'sc.embedder'
 }
 
+def date_range_start(date_range: str):
+    """
+        Converte o filtro amigável de data ('Ontem', 'Última Semana', 'Último Mês', 'Sempre')
+        na data inicial correspondente, ou None quando não há filtro.
+    """
+    today = datetime.now()
+    dr_lower = date_range.lower()
+
+    if 'sempre' in dr_lower:
+        return None
+    if 'ontem' in dr_lower:
+        return today - timedelta(days=1)
+    if 'semana' in dr_lower:
+        return today - timedelta(weeks=1)
+    if 'mês' in dr_lower or 'mes' in dr_lower:
+        return today - timedelta(days=30)
+    return None
+
+# O parsing das páginas fica em funções separadas, usadas pelas ferramentas daqui e pelas
+# versões assíncronas de tools/async_tools.py (que só trocam a forma de baixar a página)
+HIGHLIGHTS_URL = "https://www.ifsudestemg.edu.br/noticias/barbacena"
+SEARCH_URL = "https://www.ifsudestemg.edu.br/barbacena/@@busca"
+
+def full_url(url: str) -> str:
+    """
+        Aceita URL absoluta ou relativa ao domínio do site.
+    """
+    if url.startswith("http://") or url.startswith("http"):
+        return url
+    return f"{BASE_URL.rstrip('/')}/{url.lstrip('/')}"
+
+def highlights_from_html(html: str) -> str:
+    soup = BeautifulSoup(html, PARSER)
+
+    # Procura os itens de notícia (ajustado para a estrutura comum do Plone/Portal Padrão)
+    news_items = soup.find_all('h2', class_='tileHeadline')
+    
+    if not news_items:
+        return "Não foi possível encontrar notícias recentes no layout atual da página."
+
+    results = ["Últimas Notícias do Campus Barbacena:"]
+    for item in news_items[:5]: # Limite das 5 mais recentes
+        title = item.get_text(strip=True)
+        link_tag = item.find('a', href=True)
+        link = link_tag['href'] if link_tag else "Link não disponível"
+        results.append(f"- {title} (Link: {link})")
+    
+    return "\n".join(results)
+
+def navigation_from_html(html: str) -> str:
+    soup = BeautifulSoup(html, PARSER)
+
+    # Focar no conteúdo principal e menus, ignorando rodapés pesados
+    nav_elements = soup.find_all(['nav', 'div'], {'id': ['content', 'portal-column-one', 'viewlet-above-content']})
+    
+    links = []
+    for area in nav_elements:
+        for a in area.find_all('a', href=True):
+            texto = a.get_text(strip=True)
+            href = a['href']
+            if texto and len(texto) > 3:
+                links.append(f"[{texto}]({href})")
+
+    return "\n".join(list(set(links))[:50]) # Retorna os primeiros 50 links únicos
+
+def simple_search_from_html(html: str) -> str:
+    soup = BeautifulSoup(html, PARSER)
+    results = []
+
+    # Pega os resultados
+    for dt in soup.select('dl.searchResults dt'):
+        # Para cada resultado, extrai o link para obter o título e a URL
+        a_tag = dt.find('a')
+        if a_tag:
+            title = a_tag.get_text(strip=True)
+            link = a_tag['href']
+            results.append(f"- {title}: {link}")
+            
+    if not results:
+        return "Nenhum resultado encontrado."
+        
+    return "\n".join(results[:10]) # Limita a 10 resultados para não estourar contexto
+
+def search_params(query: str, item_types: list = None, date_range: str = None, sort_by: str = None) -> list:
+    """
+        Parâmetros da busca do Plone para os filtros amigáveis de site_search.
+    """
+    # Lista de tuplas para ser possível enviar múltiplos valores ao request.
+    params = [('SearchableText', query)]
+
+    # Adiciona filtros de tipo (portal_type:list)
+    if item_types:
+        for item in item_types:
+            # Busca insensível a maiúsculas/minúsculas
+            mapped_val = next((v for k, v in PORTAL_TYPES.items() if k.lower() == item.lower()), None)
+            if mapped_val:
+                params.append(('portal_type:list', mapped_val))
+
+    if date_range:
+        start_date = date_range_start(date_range)
+            
+        if start_date:
+            date_str = start_date.strftime('%Y/%m/%d')
+            # Parâmetros Plone
+            params.append(('created.query:record:list:date', date_str))
+            params.append(('created.range:record', 'min'))
+
+    # Tradução de termos amigáveis para os campos internos do Plone
+    if sort_by:
+        sb_lower = sort_by.lower()
+        if 'data' in sb_lower or 'recente' in sb_lower:
+            params.append(('sort_on', 'Date')) 
+        elif 'alfabética' in sb_lower or 'alfabetica' in sb_lower:
+            params.append(('sort_on', 'sortable_title'))
+        elif 'relevância' in sb_lower:
+            params.append(('sort_on', 'relevance'))
+    return params
+
+def search_from_html(html: str, query: str) -> str:
+    soup = BeautifulSoup(html, PARSER)
+
+    results = []
+    search_results_container = soup.select('dl.searchResults dt')
+    
+    count_text = soup.select_one('#search-results-number')
+    total = count_text.get_text(strip=True) if count_text else len(search_results_container)
+    
+    header = f"Encontrados {total} itens para '{query}' (Mostrando top 10):"
+    results.append(header)
+
+    # Pega os resultados
+    for dt in search_results_container[:10]:
+        # Para cada resultado, extrai o link para obter o título e a URL
+        a_tag = dt.find('a')
+        if a_tag:
+            title = a_tag.get_text(strip=True)
+            link = a_tag['href']
+
+            # Tenta pegar a descrição 
+            dd = dt.find_next_sibling('dd')
+            desc = dd.get_text(strip=True)[:150] + "..." if dd and dd.get_text(strip=True) else ""
+            
+            entry = f"\n- Título: {title}\n  Link: {link}"
+            if desc:
+                entry += f"\n  Resumo: {desc}"
+            results.append(entry)
+
+    if len(results) == 1: 
+        return "Nenhum resultado encontrado com os filtros selecionados."
+    return "\n".join(results)
+
+def clip_pdf_result(url: str, text: str, max_tokens: int) -> dict:
+    """
+        Resultado de um PDF no open_links: texto do read_pdf limitado ao orçamento da URL.
+    """
+    if text.startswith("Erro"):
+        return {"url": url, "type": "pdf", "error": text}
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return {"url": url, "type": "pdf", "text": text}
+    cut = text.rfind('\n', limit // 2, limit)
+    return {"url": url, "type": "pdf", "text": text[:cut if cut != -1 else limit],
+            "truncated": "Texto cortado; use read_pdf com `query` ou `pages` para ler o restante."}
+
 @tool(name='get_site_highlights', 
       description='PRIMEIRA OPÇÃO para notícias: Retorna automaticamente as 5 notícias mais recentes do Campus Barbacena sem precisar de parâmetros. Use SEMPRE que o usuário perguntar sobre notícias, novidades, destaques, ou "o que há de novo". NÃO requer busca - acessa direto a página de notícias.')
 def get_site_highlights():
     try:
-        url = "https://www.ifsudestemg.edu.br/noticias/barbacena"
-        response = requests.get(url, headers=HEADERS, timeout=15)
+        response = cached_fetch(HIGHLIGHTS_URL, timeout=15)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Procura os itens de notícia (ajustado para a estrutura comum do Plone/Portal Padrão)
-        news_items = soup.find_all('h2', class_='tileHeadline')
-        
-        if not news_items:
-            return "Não foi possível encontrar notícias recentes no layout atual da página."
-
-        results = ["Últimas Notícias do Campus Barbacena:"]
-        for item in news_items[:5]: # Limite das 5 mais recentes
-            title = item.get_text(strip=True)
-            link_tag = item.find('a', href=True)
-            link = link_tag['href'] if link_tag else "Link não disponível"
-            results.append(f"- {title} (Link: {link})")
-        
-        return "\n".join(results)
+        return highlights_from_html(response.text)
     except Exception as e:
         return f"Erro ao aceder às notícias em tempo real: {str(e)}"
 
@@ -49,29 +219,17 @@ def get_site_highlights():
 def get_page_navigation(url: str) -> str:
     try:
         target_url = url if url.startswith('http') else f"{BASE_URL}{url}"
-        response = requests.get(target_url, headers=HEADERS, timeout=10)
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Focar no conteúdo principal e menus, ignorando rodapés pesados
-        nav_elements = soup.find_all(['nav', 'div'], {'id': ['content', 'portal-column-one', 'viewlet-above-content']})
-        
-        links = []
-        for area in nav_elements:
-            for a in area.find_all('a', href=True):
-                texto = a.get_text(strip=True)
-                href = a['href']
-                if texto and len(texto) > 3:
-                    links.append(f"[{texto}]({href})")
-
-        return "\n".join(list(set(links))[:50]) # Retorna os primeiros 50 links únicos
+        response = cached_fetch(target_url, timeout=10)
+        return navigation_from_html(response.text)
     except Exception as e:
         return f"Erro ao navegar: {str(e)}"
 
 @tool(name='open_link', 
-      description='FERRAMENTA PRINCIPAL: Abre qualquer URL e retorna o conteúdo da página formatado + lista completa de links. Use esta ferramenta para: 1) Ler conteúdo de uma página específica quando você tem a URL, 2) Obter detalhes de uma notícia, 3) Acessar páginas institucionais (corpo docente, fale conosco, etc). SEMPRE prefira esta ferramenta quando souber a URL ou tiver recebido uma URL de outra ferramenta.')
-def open_link(url: str) -> dict:
+      description='FERRAMENTA PRINCIPAL: Abre qualquer URL e retorna o conteúdo principal da página em Markdown + os links relevantes. Use esta ferramenta para: 1) Ler conteúdo de uma página específica quando você tem a URL, 2) Obter detalhes de uma notícia, 3) Acessar páginas institucionais (corpo docente, fale conosco, etc). Se o retorno tiver "next_cursor", chame novamente com cursor=next_cursor para ler o restante da página. SEMPRE prefira esta ferramenta quando souber a URL ou tiver recebido uma URL de outra ferramenta.')
+def open_link(url: str, max_tokens: int = DEFAULT_MAX_TOKENS, cursor: int = 0) -> dict:
     """
-        Recupera o conteúdo de uma página web e retorna o texto visível e todos os links encontrados na página.
+        Recupera o conteúdo principal de uma página web (sem menus, cabeçalho e rodapé) em Markdown,
+        junto com os links relevantes do conteúdo, sem duplicatas e ordenados por relevância.
         A URL pode ser fornecida de forma absoluta ou relativa ao domínio padrão do Campus Barbacena.
         A função é utilizada pelo agente de IA para recuperar informações do site institucional, permitindo 
         que o modelo obtenha dados diretamente das páginas para análise do conteúdo publicado em páginas específicas.
@@ -79,64 +237,135 @@ def open_link(url: str) -> dict:
     Args:
         url (str): Endereço da página a ser acessada. Pode ser uma URL completa
                    (iniciando com http/https) ou um caminho relativo ao domínio base.
+        max_tokens (int): Orçamento aproximado de tokens para o texto retornado.
+        cursor (int): Posição de continuação ("next_cursor") devolvida por uma chamada anterior.
 
     Returns:
         dict:
             Em caso de sucesso:
             {
-                "text": "<conteúdo textual da página>",
+                "text": "<conteúdo principal da página em Markdown>",
                 "links": [
                     { "text": "<texto do link>", "url": "<endereço do link>" },
                     ...
-                ]
+                ],
+                "next_cursor": <posição para continuar a leitura ou None>,
+                "tokens": <tokens estimados do retorno>,
+                "tokens_saved": <tokens economizados em relação à página completa>
             }
 
             Em caso de erro: {"error": "<mensagem de erro>"}
     """
     try:
-        # Aceita URL absoluta ou relativa
-        if url.startswith("http://") or url.startswith("http"):
-            full_url = url
-        else:
-            full_url = f"{BASE_URL.rstrip('/')}/{url.lstrip('/')}"
-        
-        response = requests.get(full_url, timeout=15)
+        target_url = full_url(url)
+        response = cached_fetch(target_url, timeout=15)
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Remove scripts e CSS
-        for tag in soup(["script", "style"]):
-            tag.decompose()
-
-        # Coleta os links
-        links = []
-        for a in soup.find_all("a"):
-            text = a.get_text(" ", strip=True)
-            href = a.get("href", "")
-            
-            if not href:
-                continue
-
-            links.append({
-                "text": text if text else None,
-                "url": href
-            })
-
-        # Extrai somente o texto visual
-        text = soup.get_text(separator='\n', strip=True)
-        if not text:
+        # Isola o conteúdo principal e limita o tamanho ao orçamento de tokens
+        content = extract_content(response.text, target_url, max_tokens=max_tokens, cursor=cursor)
+        if not content["text"]:
             return {"error": f"Erro ao acessar conteúdo da URL {url}."}
 
-        return {"text": text, "links": links}
+        return content
             
     except Exception as e:
         return {"error": f"Erro ao acessar a URL {url}."}
 
+def prepare_urls(urls: list) -> tuple:
+    """
+        URLs do open_links sem vazias e repetidas, limitadas a OPEN_LINKS_MAX_URLS.
+
+        Returns:
+            tuple: (URLs a abrir, URLs além do limite)
+    """
+    urls = list(dict.fromkeys(url.strip() for url in urls or [] if url and url.strip()))
+    return urls[:OPEN_LINKS_MAX_URLS], urls[OPEN_LINKS_MAX_URLS:]
+
+def batch_result(urls: list, finished: dict, skipped: list, started: float) -> dict:
+    """
+        Monta o retorno do open_links na ordem pedida.
+
+        Args:
+            finished (dict): URL -> resultado (ou exceção) das que terminaram dentro do prazo.
+    """
+    results, pending = [], []
+    for url in urls:
+        if url not in finished:
+            pending.append(url)
+            OPEN_LINKS.inc(outcome="timeout")
+            continue
+        result = finished[url]
+        if isinstance(result, BaseException):
+            result = {"url": url, "error": f"Erro ao acessar a URL {url}: {result}"}
+        OPEN_LINKS.inc(outcome="error" if "error" in result else "ok")
+        results.append(result)
+
+    output = {"results": results, "elapsed_s": round(time.perf_counter() - started, 2)}
+    if pending:
+        output["pending"] = pending
+    if skipped:
+        output["skipped"] = skipped
+    return output
+
+def _open_one(url: str, max_tokens: int, query: str) -> dict:
+    # Uma URL do open_links: PDF pelo read_pdf (cache de páginas), página pelo open_link
+    target_url = full_url(url)
+    with span("open_links:item", "internal", url=target_url):
+        if not DOCUMENT_LINK.search(target_url.split('?')[0]):
+            return {"url": url, "type": "page", **open_link.entrypoint(url=target_url, max_tokens=max_tokens)}
+
+        text = read_pdf.entrypoint(path=target_url, query=query) if query else read_pdf.entrypoint(path=target_url)
+        return clip_pdf_result(url, text, max_tokens)
+
+@tool(name='open_links',
+      description='VÁRIAS URLs DE UMA VEZ: Abre até 8 URLs (páginas ou PDFs) ao mesmo tempo e devolve o conteúdo principal de cada uma, com o erro de cada URL separado. Use quando já tiver várias URLs para conferir (ex: as notícias de get_site_highlights, páginas candidatas de uma busca, links de get_page_navigation) em vez de chamar open_link uma por uma. Em PDFs, passe `query` com o assunto procurado.')
+def open_links(urls: list[str], max_tokens: int = OPEN_LINKS_MAX_TOKENS, query: str = None) -> dict:
+    """
+        Abre várias páginas ou PDFs em paralelo (no máximo OPEN_LINKS_WORKERS downloads ao mesmo
+        tempo) e devolve o que ficou pronto dentro de OPEN_LINKS_BUDGET segundos. As URLs que não
+        terminaram a tempo vêm em "pending" e continuam baixando em segundo plano, então uma nova
+        chamada as encontra no cache.
+
+        Args:
+            urls (list[str]): URLs absolutas ou relativas ao domínio do site (até OPEN_LINKS_MAX_URLS).
+            max_tokens (int): Orçamento aproximado de tokens do texto de cada URL.
+            query (str): Assunto procurado nos PDFs; devolve só as páginas relevantes (opcional).
+
+        Returns:
+            dict:
+            {
+                "results": [
+                    { "url": "...", "type": "page" | "pdf", "text": "...", "links": [...], "next_cursor": ... },
+                    { "url": "...", "type": "page" | "pdf", "error": "<mensagem de erro>" },
+                    ...
+                ],
+                "pending": ["<URLs que não terminaram dentro do tempo>"],
+                "skipped": ["<URLs além do limite por chamada>"],
+                "elapsed_s": <tempo total em segundos>
+            }
+    """
+    started = time.perf_counter()
+    urls, skipped = prepare_urls(urls)
+    if not urls:
+        return {"error": "Nenhuma URL informada."}
+
+    executor = ThreadPoolExecutor(max_workers=min(OPEN_LINKS_WORKERS, len(urls)), thread_name_prefix="open-links")
+    # Cada tarefa roda em uma cópia do contexto, para os spans entrarem no rastro do turno
+    futures = {
+        executor.submit(contextvars.copy_context().run, _open_one, url, max_tokens, query): url
+        for url in urls
+    }
+    done, _ = wait(futures, timeout=OPEN_LINKS_BUDGET)
+    # Sem cancelar as que ainda estão na fila: as URLs em "pending" terminam de baixar para o cache
+    executor.shutdown(wait=False)
+
+    finished = {futures[future]: future.exception() or future.result() for future in done}
+    return batch_result(urls, finished, skipped, started)
+
 @tool(
     name='open_link_in_selenium',
     description='SEGUNDA ESCOLHA para páginas dinâmicas: Abre URL usando navegador real (Chrome headless ou Firefox headless) para carregar conteúdo JavaScript/AJAX. Use quando: 1) open_link falhou ou retornou conteúdo incompleto, 2) Página usa JavaScript pesado (ex: corpo docente, listas longas), 3) Conteúdo aparece vazio ou cortado. IMPORTANTE: Mais lento que open_link, use apenas quando necessário.')
-def open_link_in_selenium(url: str) -> dict:
+def open_link_in_selenium(url: str, wait_for_selector: str = None, max_tokens: int = DEFAULT_MAX_TOKENS, cursor: int = 0) -> dict:
     """
         Abre uma página web utilizando um navegador real controlado pelo Selenium (Google Chrome ou Firefox em modo headless).
         Esta ferramenta deve ser utilizada quando o conteúdo da página é gerado dinamicamente via JavaScript, 
@@ -144,48 +373,28 @@ def open_link_in_selenium(url: str) -> dict:
 
         Args:
             url (str): URL completa da página que deverá ser aberta no navegador.
+            wait_for_selector (str): Seletor CSS opcional que deve aparecer antes de capturar o HTML.
+                                     Se omitido, espera a rede ficar ociosa.
+            max_tokens (int): Orçamento aproximado de tokens para o texto retornado.
+            cursor (int): Posição de continuação ("next_cursor") devolvida por uma chamada anterior.
 
         Returns:
-            dict: retorna o HTML final do DOM após o carregamento completo da página ou mensagem detalhando o erro ocorrido.
+            dict: conteúdo principal do DOM final em Markdown (mesmo formato de open_link) ou mensagem detalhando o erro ocorrido.
 
         Obs: O navegador é executado em modo headless (sem interface gráfica).
     """
-    # Aceita URL absoluta ou relativa
-    if url.startswith("http://") or url.startswith("http"):
-        full_url = url
-    else:
-        full_url = f"{BASE_URL.rstrip('/')}/{url.lstrip('/')}"
+    target_url = full_url(url)
 
+    # Usa um navegador já iniciado do pool (Chrome ou Firefox); o navegador é
+    # devolvido, ou finalizado em caso de erro, automaticamente ao final
     try:
-        # Configuração do navegador Chrome, executa-o em modo headless (sem interface gráfica)
-        options = Options()
-        options.add_argument('--headless=new')
-
-        # Baixa e inicializa o ChromeDriver compatível com o Google Chrome instalado na máquina
-        driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=options
-        )
-
-    except Exception:
-        options = FirefoxOptions()
-        options.add_argument("--headless")
-
-        driver = webdriver.Firefox(
-            service=FirefoxService(GeckoDriverManager().install()),
-            options=options
-        )
-
-    # Abre a página da url
-    driver.get(full_url)
-
-    # Acessa o DOM atual do navegador (HTML)
-    html = driver.page_source
-
-    # Fecha a janela do navegador e finaliza o processo do ChromeDriver
-    driver.quit()
+        html = render_page(target_url, wait_for_selector=wait_for_selector)
+    except BrowserPoolExhausted as e:
+        return {'error': f"Todos os navegadores estão ocupados, tente novamente em instantes. {e}"}
+    except Exception as e:
+        return {'error': f"Erro ao abrir a URL {url} no navegador: {e}"}
 
-    return {'html': html}
+    return extract_content(html, target_url, max_tokens=max_tokens, cursor=cursor)
 
 """ Teste:
     curl -X POST http://127.0.0.1:5000/chat -H "Content-Type: application/json" -d "{\"prompt\": \"Use a tool site_search_simple com o seguinte parâmetro: query=\\\"refeitório\\\". Mostre o resultado retornado pela tool.\", \"session_id\": \"test_simple_01\"}"
@@ -199,28 +408,9 @@ def site_search_simple(query: str) -> str:
             query (str): O termo a ser pesquisado.
     """
     try:
-        url = "https://www.ifsudestemg.edu.br/barbacena/@@busca"
-        params = {'SearchableText': query}
-        
-        response = requests.get(url, headers=HEADERS, params=params, timeout=10)
+        response = fetch(SEARCH_URL, params={'SearchableText': query}, timeout=10)
         response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        results = []
-    
-        # Pega os resultados
-        for dt in soup.select('dl.searchResults dt'):
-            # Para cada resultado, extrai o link para obter o título e a URL
-            a_tag = dt.find('a')
-            if a_tag:
-                title = a_tag.get_text(strip=True)
-                link = a_tag['href']
-                results.append(f"- {title}: {link}")
-                
-        if not results:
-            return "Nenhum resultado encontrado."
-            
-        return "\n".join(results[:10]) # Limita a 10 resultados para não estourar contexto
+        return simple_search_from_html(response.text)
     except Exception as e:
         return f"Erro na busca: {str(e)}"
 
@@ -235,99 +425,10 @@ def site_search(query: str, item_types: list[str] = None, date_range: str = None
             date_range (str): Filtro de data: 'Ontem', 'Última Semana', 'Último Mês', 'Sempre'.
             sort_by (str): Ordenação: 'Relevância', 'Data (Mais Recente)', 'Alfabética'.
     """
-    base_url = "https://www.ifsudestemg.edu.br/barbacena/@@busca"
-    
-    # Mapeamento de Tipos (Tradução amigável do sistema Plone usado pelo site do IF)
-    type_map = {
-        'Página': 'Document',
-        'Evento': 'Event',
-        'Arquivo': 'File',
-        'Pasta': 'Folder',
-        'Link': 'Link',
-        'Ato de Pessoal': 'ato-de-pessoal',
-        'Notícia': 'collective.nitf.content',
-        'Contrato': 'contrato',
-        'Convocação': 'convocacao',
-        'Edital': 'edital',
-        'Licitação': 'licitacao',
-        'Oportunidade': 'oportunidade',
-        'Multimídia': 'sc.embedder'
-    }
-    
-    # Lista de tuplas para ser possível enviar múltiplos valores ao request.
-    params = [('SearchableText', query)]
-
-    # Adiciona filtros de tipo (portal_type:list)
-    if item_types:
-        for item in item_types:
-            # Busca insensível a maiúsculas/minúsculas
-            mapped_val = next((v for k, v in type_map.items() if k.lower() == item.lower()), None)
-            if mapped_val:
-                params.append(('portal_type:list', mapped_val))
-
-    if date_range and date_range.lower() != 'sempre':
-        today = datetime.now()
-        start_date = None
-        
-        dr_lower = date_range.lower()
-        if 'ontem' in dr_lower:
-            start_date = today - timedelta(days=1)
-        elif 'semana' in dr_lower:
-            start_date = today - timedelta(weeks=1)
-        elif 'mês' in dr_lower or 'mes' in dr_lower:
-            start_date = today - timedelta(days=30)
-            
-        if start_date:
-            date_str = start_date.strftime('%Y/%m/%d')
-            # Parâmetros Plone
-            params.append(('created.query:record:list:date', date_str))
-            params.append(('created.range:record', 'min'))
-
-    # Tradução de termos amigáveis para os campos internos do Plone
-    if sort_by:
-        sb_lower = sort_by.lower()
-        if 'data' in sb_lower or 'recente' in sb_lower:
-            params.append(('sort_on', 'Date')) 
-        elif 'alfabética' in sb_lower or 'alfabetica' in sb_lower:
-            params.append(('sort_on', 'sortable_title'))
-        elif 'relevância' in sb_lower:
-            params.append(('sort_on', 'relevance'))
-    
     try:
-        response = requests.get(base_url, headers=HEADERS, params=params, timeout=15)
+        response = fetch(SEARCH_URL, params=search_params(query, item_types, date_range, sort_by), timeout=15)
         response.raise_for_status()
-
-        soup = BeautifulSoup(response.text, 'html.parser')
-    
-        results = []
-        search_results_container = soup.select('dl.searchResults dt')
-        
-        count_text = soup.select_one('#search-results-number')
-        total = count_text.get_text(strip=True) if count_text else len(search_results_container)
-        
-        header = f"Encontrados {total} itens para '{query}' (Mostrando top 10):"
-        results.append(header)
-
-        # Pega os resultados
-        for dt in search_results_container[:10]:
-            # Para cada resultado, extrai o link para obter o título e a URL
-            a_tag = dt.find('a')
-            if a_tag:
-                title = a_tag.get_text(strip=True)
-                link = a_tag['href']
-
-                # Tenta pegar a descrição 
-                dd = dt.find_next_sibling('dd')
-                desc = dd.get_text(strip=True)[:150] + "..." if dd and dd.get_text(strip=True) else ""
-                
-                entry = f"\n- Título: {title}\n  Link: {link}"
-                if desc:
-                    entry += f"\n  Resumo: {desc}"
-                results.append(entry)
-
-        if len(results) == 1: 
-            return "Nenhum resultado encontrado com os filtros selecionados."
-        return "\n".join(results)
+        return search_from_html(response.text, query)
 
     except Exception as e:
         return f"Erro ao realizar a busca avançada: {str(e)}"
\ No newline at end of file
@@ -0,0 +1,320 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import itertools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Rastreamento de cada turno de chat: uma árvore de spans (turno -> chamada ao LLM ->
+# ferramenta -> HTTP/PDF/navegador) gravada em SQLite ao lado do tmp/agent.db.
+# O span atual fica em uma contextvar, então os módulos só precisam envolver o trecho
+# medido com `span(...)`; fora de um turno (crawler, CLI) os spans não custam nada.
+
+TRACES_DB = os.getenv("TRACES_DB", "tmp/traces.db")
+TRACES_ENABLED = os.getenv("TRACES_ENABLED", "1") == "1"
+RETENTION_DAYS = float(os.getenv("TRACES_RETENTION_DAYS", "7"))
+PRUNE_INTERVAL = 3600  # Segundos entre limpezas dos rastros antigos
+MAX_ATTR_CHARS = 200
+
+_current = contextvars.ContextVar("ifinder_span", default=None)
+
+
+class Span:
+    """
+        Trecho medido de um turno. O span raiz (sem pai) representa o turno inteiro
+        e guarda a lista de todos os spans do rastro.
+    """
+    def __init__(self, name: str, kind: str, parent: "Span" = None, attrs: dict = None):
+        self.name = name
+        self.kind = kind
+        self.root = parent.root if parent else self
+        self.parent_id = parent.span_id if parent else None
+        self.attrs = attrs or {}
+        self.error = None
+        self.started = time.perf_counter()
+        self.duration = None
+
+        if parent is None:
+            self.spans = []
+            self._ids = itertools.count()
+        self.span_id = next(self.root._ids)
+        self.root.spans.append(self)
+
+    def set(self, **attrs):
+        """
+            Adiciona atributos ao span (ex: status HTTP, bytes, tokens).
+        """
+        self.attrs.update(attrs)
+
+    def finish(self):
+        if self.duration is None:
+            self.duration = time.perf_counter() - self.started
+
+
+def _clip(value):
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    text = str(value)
+    return text if len(text) <= MAX_ATTR_CHARS else text[:MAX_ATTR_CHARS] + "..."
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", **attrs):
+    """
+        Mede um trecho dentro do turno atual. Sem turno ativo, não faz nada.
+
+        Args:
+            name (str): Nome exibido no rastro (ex: 'tool:open_link', 'GET www.ifsudestemg.edu.br').
+            kind (str): Categoria: 'llm', 'tool', 'http', 'pdf', 'browser' ou 'internal'.
+            **attrs: Atributos iniciais do span.
+    """
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+
+    current = Span(name, kind, parent, {k: _clip(v) for k, v in attrs.items()})
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = _clip(repr(e))
+        raise
+    finally:
+        current.finish()
+        try:
+            _current.reset(token)
+        except ValueError:  # Generator finalizado em outro contexto
+            _current.set(parent)
+
+
+@contextmanager
+def trace_turn(session_id: str, user_id: str, prompt: str, name: str = "turn"):
+    """
+        Abre o rastro de um turno de chat e o grava no banco ao final.
+        Se já houver um turno ativo, vira apenas um span dentro dele.
+    """
+    if not TRACES_ENABLED:
+        yield None
+        return
+    if _current.get() is not None:
+        with span(name) as nested:
+            yield nested
+        return
+
+    root = Span(name, "turn", attrs={"prompt": _clip(prompt)})
+    root.session_id, root.user_id, root.wall_start = session_id, user_id, time.time()
+    token = _current.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.error = _clip(repr(e))
+        raise
+    finally:
+        root.finish()
+        try:
+            _current.reset(token)
+        except ValueError:
+            _current.set(None)
+        try:
+            get_store().save(root)
+        except Exception as e:
+            print(f"Falha ao gravar rastro: {e}")
+
+
+class TraceStore:
+    """
+        Banco dos rastros (tabelas traces e spans) com limpeza por idade.
+    """
+    def __init__(self, db_file: str = TRACES_DB, retention_days: float = RETENTION_DAYS):
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._last_prune = 0
+
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS traces (
+                id INTEGER PRIMARY KEY,
+                session_id TEXT,
+                user_id TEXT,
+                name TEXT,
+                prompt TEXT,
+                started_at REAL NOT NULL,
+                duration_ms REAL NOT NULL,
+                error TEXT,
+                span_count INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_traces_duration ON traces (duration_ms);
+            CREATE INDEX IF NOT EXISTS idx_traces_session ON traces (session_id, started_at);
+            CREATE INDEX IF NOT EXISTS idx_traces_started ON traces (started_at);
+            CREATE TABLE IF NOT EXISTS spans (
+                trace_id INTEGER NOT NULL REFERENCES traces (id) ON DELETE CASCADE,
+                span_id INTEGER NOT NULL,
+                parent_id INTEGER,
+                name TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                start_ms REAL NOT NULL,
+                duration_ms REAL NOT NULL,
+                attrs TEXT,
+                error TEXT,
+                PRIMARY KEY (trace_id, span_id)
+            );
+        """)
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.commit()
+
+    def save(self, root: Span):
+        rows = []
+        for item in root.spans:
+            item.finish()  # Spans de threads que não terminaram a tempo
+            rows.append((
+                item.span_id, item.parent_id, item.name, item.kind,
+                round((item.started - root.started) * 1000, 2), round(item.duration * 1000, 2),
+                json.dumps(item.attrs, ensure_ascii=False, default=str) if item.attrs else None, item.error,
+            ))
+
+        with self._lock:
+            trace_id = self._conn.execute(
+                "INSERT INTO traces (session_id, user_id, name, prompt, started_at, duration_ms, error, span_count) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (root.session_id, root.user_id, root.name, root.attrs.get("prompt"), root.wall_start,
+                 round(root.duration * 1000, 2), root.error, len(rows))
+            ).lastrowid
+            self._conn.executemany(
+                f"INSERT INTO spans VALUES ({trace_id}, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+            if time.time() - self._last_prune > PRUNE_INTERVAL:
+                self._prune()
+        return trace_id
+
+    def _prune(self):
+        self._last_prune = time.time()
+        cutoff = time.time() - self.retention_days * 86400
+        self._conn.execute("DELETE FROM traces WHERE started_at < ?", (cutoff,))
+        self._conn.commit()
+
+    def _query(self, sql: str, params=()) -> list:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def slowest(self, limit: int = 20, hours: float = None) -> list:
+        """
+            Lista os turnos mais lentos (opcionalmente só das últimas `hours` horas).
+        """
+        sql = "SELECT id, session_id, name, prompt, started_at, duration_ms, error, span_count FROM traces"
+        params = []
+        if hours:
+            sql += " WHERE started_at >= ?"
+            params.append(time.time() - hours * 3600)
+        sql += " ORDER BY duration_ms DESC LIMIT ?"
+        params.append(limit)
+        return self._query(sql, params)
+
+    def session(self, session_id: str) -> list:
+        """
+            Retorna os turnos de uma sessão, em ordem, cada um com a árvore de spans.
+        """
+        traces = self._query(
+            "SELECT id, session_id, name, prompt, started_at, duration_ms, error, span_count "
+            "FROM traces WHERE session_id = ? ORDER BY started_at", (session_id,)
+        )
+        for trace in traces:
+            trace["spans"] = self.tree(trace["id"])
+        return traces
+
+    def tree(self, trace_id: int) -> dict:
+        """
+            Monta a árvore de spans de um rastro, com o tempo próprio (sem os filhos) de cada um.
+        """
+        spans = self._query(
+            "SELECT span_id, parent_id, name, kind, start_ms, duration_ms, attrs, error "
+            "FROM spans WHERE trace_id = ? ORDER BY span_id", (trace_id,)
+        )
+        by_id = {}
+        root = None
+        for item in spans:
+            item["attrs"] = json.loads(item["attrs"]) if item["attrs"] else {}
+            item["children"] = []
+            by_id[item["span_id"]] = item
+            parent = by_id.get(item["parent_id"])
+            if parent:
+                parent["children"].append(item)
+            elif root is None:
+                root = item
+
+        for item in spans:
+            children_ms = sum(child["duration_ms"] for child in item["children"])
+            item["self_ms"] = round(max(item["duration_ms"] - children_ms, 0), 2)
+        return root
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> TraceStore:
+    """
+        Retorna o banco de rastros compartilhado (criado na primeira chamada).
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = TraceStore()
+    return _store
+
+
+def format_flame(node: dict, total_ms: float = None, depth: int = 0, width: int = 40) -> list:
+    """
+        Desenha a árvore de spans como linhas de texto com barras proporcionais à duração.
+    """
+    if node is None:
+        return []
+    total_ms = total_ms or node["duration_ms"] or 1
+    bar = "█" * max(1, round(node["duration_ms"] / total_ms * width))
+    label = node["name"] + (f"  [erro: {node['error']}]" if node["error"] else "")
+    lines = [f"{node['duration_ms'] / 1000:8.2f}s  {bar:<{width}}  {'  ' * depth}{label}"]
+    for child in node["children"]:
+        lines.extend(format_flame(child, total_ms, depth + 1, width))
+    return lines
+
+
+if __name__ == '__main__':
+    # Uso: python tracing.py slowest [--limit 20] [--hours 24]
+    #      python tracing.py session <session_id>
+    parser = argparse.ArgumentParser(description="Consulta os rastros dos turnos de chat.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    slowest_parser = commands.add_parser("slowest", help="Turnos mais lentos.")
+    slowest_parser.add_argument("--limit", type=int, default=20)
+    slowest_parser.add_argument("--hours", type=float, default=None, help="Apenas as últimas N horas.")
+
+    session_parser = commands.add_parser("session", help="Detalhamento dos turnos de uma sessão.")
+    session_parser.add_argument("session_id")
+    args = parser.parse_args()
+
+    store = get_store()
+    if args.command == "slowest":
+        for trace in store.slowest(args.limit, args.hours):
+            when = time.strftime('%d/%m %H:%M', time.localtime(trace["started_at"]))
+            print(f"{trace['duration_ms'] / 1000:8.2f}s  {when}  {trace['session_id']}  {trace['prompt'] or ''}")
+    else:
+        traces = store.session(args.session_id)
+        if not traces:
+            sys.exit(f"Nenhum rastro para a sessão {args.session_id}")
+        for trace in traces:
+            print(f"\n{trace['prompt'] or ''}")
+            print("\n".join(format_flame(trace["spans"])))
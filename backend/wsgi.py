@@ -0,0 +1,25 @@
+"""
+    Ponto de entrada para servidores WSGI de produção:
+
+        gunicorn -c gunicorn.conf.py wsgi:app
+
+    AGENT_FACTORY (opcional, 'modulo:atributo') troca o ChatAgent por outra implementação,
+    usado pelo teste de carga em benchmarks/load_test.py.
+"""
+import os
+import importlib
+from startup import phase, log_report
+
+with phase("import"):
+    from main import create_app
+    from agent_core import ChatAgent
+
+
+def _load_factory(spec: str):
+    module, _, attr = spec.partition(':')
+    return getattr(importlib.import_module(module), attr)
+
+
+factory = os.getenv("AGENT_FACTORY")
+app = create_app(agent_factory=_load_factory(factory) if factory else ChatAgent)
+log_report()
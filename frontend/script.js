@@ -20,9 +20,19 @@ const state = {
     sessionId: localStorage.getItem('if_agent_current_session_id'),
     isSidebarOpen: false,
     isLoading: false, // Pode ser usado para travar interface se necessário
-    isAnonymous: false
+    isAnonymous: false,
+    // Paginação do histórico (barra lateral) e das mensagens da conversa aberta
+    remoteHistory: [],
+    historyCursor: null,
+    historyDone: false,
+    historyLoading: false,
+    messagesCursor: null,
+    messagesLoading: false
 };
 
+const HISTORY_PAGE_SIZE = 20;
+const MESSAGES_PAGE_SIZE = 30;
+
 /**
  * Elementos da Interface do Usuário (UI)
  * Mapeamento centralizado dos elementos do DOM para acesso rápido.
@@ -33,6 +43,7 @@ const elements = {
     closeSidebarBtn: document.getElementById('closeSidebarBtn'),
     newChatBtn: document.getElementById('newChatBtn'),
     historyList: document.getElementById('historyList'),
+    historySection: document.querySelector('.history_section'),
     anonymousChatBtn: document.getElementById('anonymousChatBtn'),
     chatArea: document.getElementById('chatArea'),
     messagesContainer: document.getElementById('messagesContainer'),
@@ -68,7 +79,8 @@ async function init() {
         console.log('[IFinder] userId encontrado no localStorage:', state.userId);
     }
 
-    // Carrega o histórico de sessões anteriores do localStorage
+    // Exibe o histórico local e busca a primeira página de sessões no servidor
+    loadMoreHistory();
     loadHistory();
 
     // Tenta restaurar a última sessão ativa
@@ -156,12 +168,13 @@ async function loadSession(sessionId) {
 
     showWelcomeScreen(false);
     elements.messagesContainer.innerHTML = '<div class="history_empty_state"><span class="loader_spinner"></span></div>';
+    state.messagesCursor = null;
 
     try {
         const response = await fetch('/sessions/get', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ session_id: sessionId, user_id: state.userId })
+            body: JSON.stringify({ session_id: sessionId, user_id: state.userId, limit: MESSAGES_PAGE_SIZE })
         });
 
         if (!response.ok) {
@@ -178,6 +191,9 @@ async function loadSession(sessionId) {
         // Renderiza as mensagens (campo 'messages' ou 'chat' para compatibilidade)
         const messages = data.messages || data.chat || [];
         renderChat(messages);
+
+        // Mensagens mais antigas são carregadas ao rolar até o topo
+        state.messagesCursor = data.next_cursor ?? null;
     } catch (error) {
         console.warn('Falha ao carregar sessão:', error);
         if (state.sessionId === sessionId) {
@@ -188,6 +204,97 @@ async function loadSession(sessionId) {
     }
 }
 
+/**
+ * Carrega a página anterior de mensagens da conversa aberta e a insere no topo,
+ * mantendo a posição de leitura.
+ */
+async function loadOlderMessages() {
+    if (state.messagesCursor === null || state.messagesLoading) return;
+
+    const sessionId = state.sessionId;
+    state.messagesLoading = true;
+
+    try {
+        const response = await fetch('/sessions/get', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                session_id: sessionId,
+                user_id: state.userId,
+                limit: MESSAGES_PAGE_SIZE,
+                before: state.messagesCursor
+            })
+        });
+
+        if (!response.ok) throw new Error('Erro ao carregar mensagens anteriores');
+
+        const data = await response.json();
+        if (state.sessionId !== sessionId) return; // Usuário trocou de conversa no meio tempo
+
+        const previousHeight = elements.chatArea.scrollHeight;
+        const messages = data.messages || [];
+        for (let i = messages.length - 1; i >= 0; i--) {
+            addMessageToUI(messages[i].role, messages[i].content, false, true);
+        }
+
+        // Compensa a altura inserida para o conteúdo visível não "pular"
+        elements.chatArea.style.scrollBehavior = 'auto';
+        elements.chatArea.scrollTop += elements.chatArea.scrollHeight - previousHeight;
+        elements.chatArea.style.scrollBehavior = '';
+
+        state.messagesCursor = data.next_cursor ?? null;
+    } catch (error) {
+        console.warn('Falha ao carregar mensagens anteriores:', error);
+    } finally {
+        state.messagesLoading = false;
+    }
+}
+
+/**
+ * Busca a próxima página de sessões do usuário no servidor (chamada sob demanda,
+ * conforme a barra lateral é rolada).
+ */
+async function loadMoreHistory() {
+    if (state.historyDone || state.historyLoading || !state.userId) return;
+
+    state.historyLoading = true;
+
+    try {
+        const response = await fetch('/sessions/list', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ user_id: state.userId, limit: HISTORY_PAGE_SIZE, cursor: state.historyCursor })
+        });
+
+        if (!response.ok) throw new Error('Erro ao carregar histórico do servidor');
+
+        const data = await response.json();
+        (data.sessions || []).forEach(session => {
+            state.remoteHistory.push({
+                id: session.session_id,
+                title: session.summary || `Conversa de ${new Date(session.created_at * 1000).toLocaleDateString('pt-BR')}`,
+                timestamp: (session.updated_at || session.created_at) * 1000
+            });
+        });
+
+        state.historyCursor = data.next_cursor;
+        state.historyDone = !data.next_cursor;
+    } catch (error) {
+        console.warn('Falha ao carregar histórico:', error);
+        state.historyDone = true;
+    } finally {
+        state.historyLoading = false;
+    }
+
+    loadHistory();
+
+    // Continua carregando enquanto a lista ainda não preenche a barra lateral
+    const section = elements.historySection;
+    if (!state.historyDone && section.scrollHeight <= section.clientHeight) {
+        loadMoreHistory();
+    }
+}
+
 /**
  * Envia uma mensagem do usuário para o agente.
  */
@@ -231,39 +338,114 @@ async function sendMessage() {
 
     // Exibe indicador de digitação
     const loadingId = addLoadingIndicator();
+    let streamingMessage = null;
+    let answer = '';
 
     try {
-        // Envia requisição para o backend
-        const response = await fetch('/chat', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({
-                prompt: text,
-                user_id: state.isAnonymous ? 'anonymous' : state.userId,
-                session_id: state.sessionId
-            })
+        // Envia requisição para o backend e renderiza a resposta conforme chega (SSE)
+        await streamChat({
+            prompt: text,
+            user_id: state.isAnonymous ? 'anonymous' : state.userId,
+            session_id: state.sessionId
+        }, {
+            tool_start: (data) => {
+                updateLoadingIndicator(loadingId, TOOL_LABELS[data.tool] || 'Consultando o site...');
+            },
+            tool_end: () => {
+                updateLoadingIndicator(loadingId, 'Analisando informações...');
+            },
+            token: (data) => {
+                // Substitui o indicador pela mensagem no primeiro trecho da resposta
+                if (!streamingMessage) {
+                    removeMessageFromUI(loadingId);
+                    streamingMessage = addStreamingMessage();
+                }
+                answer += data.content;
+                streamingMessage.innerHTML = DOMPurify.sanitize(marked.parse(answer));
+                scrollToBottom();
+            },
+            done: (data) => {
+                removeMessageFromUI(loadingId);
+                if (!streamingMessage) {
+                    throw new Error('Resposta vazia do agente');
+                }
+                addSourcesToMessage(streamingMessage, data.sources, answer);
+            },
+            error: (data) => {
+                throw new Error(data.error || 'Erro na comunicação com o agente');
+            }
         });
 
-        if (!response.ok) throw new Error('Erro na comunicação com o agente');
-
-        const data = await response.json();
-
-        // Remove indicador de carregamento
-        removeMessageFromUI(loadingId);
-
-        // Adiciona resposta do agente
-        addMessageToUI('model', data.response);
-
     } catch (error) {
         removeMessageFromUI(loadingId);
         showToast('Ocorreu um erro ao processar sua mensagem.', 'error');
-        addMessageToUI('model', '**Erro:** Não foi possível obter uma resposta agora. Tente novamente.', false);
+        if (!streamingMessage) {
+            addMessageToUI('model', '**Erro:** Não foi possível obter uma resposta agora. Tente novamente.', false);
+        }
     } finally {
         elements.sendBtn.disabled = false;
         elements.userPrompt.focus();
     }
 }
 
+/**
+ * Textos exibidos enquanto cada ferramenta do agente está em execução.
+ */
+const TOOL_LABELS = {
+    open_link: 'Lendo página do site...',
+    open_link_in_selenium: 'Abrindo página no navegador...',
+    get_page_navigation: 'Explorando menus do site...',
+    get_site_highlights: 'Buscando notícias recentes...',
+    site_search: 'Pesquisando no site...',
+    site_search_simple: 'Pesquisando no site...',
+    local_search: 'Pesquisando no índice local...',
+    read_pdf: 'Lendo documento PDF...',
+    find_pdf_links: 'Procurando documentos...'
+};
+
+/**
+ * Envia a mensagem para /chat/stream e despacha cada evento SSE recebido para o handler correspondente.
+ * @param {Object} body - Corpo da requisição (prompt, user_id, session_id).
+ * @param {Object} handlers - Funções por nome de evento (tool_start, tool_end, token, done, error).
+ */
+async function streamChat(body, handlers) {
+    const response = await fetch('/chat/stream', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body)
+    });
+
+    if (!response.ok || !response.body) throw new Error('Erro na comunicação com o agente');
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+
+        // Eventos SSE são separados por uma linha em branco
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let eventName = 'message';
+            let data = '';
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event:')) eventName = line.slice(6).trim();
+                else if (line.startsWith('data:')) data += line.slice(5).trim();
+            });
+
+            const handler = handlers[eventName];
+            if (handler) handler(data ? JSON.parse(data) : {});
+        }
+    }
+}
+
 /**
  * =================================================================================
  * Gerenciamento de Sessão (Frontend Logic)
@@ -354,16 +536,20 @@ function updateLocalSessionTitle(id, newTitle) {
     // Se for anônimo, ignoramos o histórico local
     if (state.isAnonymous) return;
 
+    const remote = state.remoteHistory.find(h => h.id === id);
+    if (remote) remote.title = newTitle;
+
     const history = getLocalHistory();
     const index = history.findIndex(h => h.id === id);
-    if (index !== -1) {
+    if (index === -1) {
+        if (remote) loadHistory();
+    } else {
         if (history[index].title !== newTitle) {
             history[index].title = newTitle;
             localStorage.setItem('if_agent_history_v1', JSON.stringify(history));
 
             // Atualiza a lista visualmente
-            const localHistory = getLocalHistory();
-            renderHistoryList(localHistory);
+            loadHistory();
         }
     }
 }
@@ -411,6 +597,11 @@ function deleteSession(id) {
     history = history.filter(h => h.id !== id);
     localStorage.setItem('if_agent_history_v1', JSON.stringify(history));
 
+    // A sessão continua no servidor; guarda o ID para não exibi-la novamente
+    const hidden = getHiddenSessions();
+    hidden.push(id);
+    localStorage.setItem('if_agent_hidden_sessions_v1', JSON.stringify(hidden));
+
     // Se a sessão apagada era a atual, reseta a interface
     if (state.sessionId === id) {
         startNewChat();
@@ -420,12 +611,45 @@ function deleteSession(id) {
     }
 }
 
+/**
+ * Obtém os IDs de sessões removidas pelo usuário.
+ */
+function getHiddenSessions() {
+    try {
+        const item = localStorage.getItem('if_agent_hidden_sessions_v1');
+        return item ? JSON.parse(item) : [];
+    } catch {
+        return [];
+    }
+}
+
+/**
+ * Junta o histórico local com as páginas já carregadas do servidor,
+ * do mais recente para o mais antigo.
+ */
+function getMergedHistory() {
+    const hidden = new Set(getHiddenSessions());
+    const merged = new Map();
+
+    getLocalHistory().forEach(item => merged.set(item.id, { ...item }));
+    state.remoteHistory.forEach(item => {
+        if (hidden.has(item.id)) return;
+        const local = merged.get(item.id);
+        if (local) {
+            local.timestamp = Math.max(local.timestamp || 0, item.timestamp);
+        } else {
+            merged.set(item.id, { ...item });
+        }
+    });
+
+    return [...merged.values()].sort((a, b) => (b.timestamp || 0) - (a.timestamp || 0));
+}
+
 /**
  * Carrega a lista de histórico na interface (wrapper para renderHistoryList)
  */
 function loadHistory() {
-    const localHistory = getLocalHistory();
-    renderHistoryList(localHistory);
+    renderHistoryList(getMergedHistory());
 }
 
 /**
@@ -438,6 +662,10 @@ function loadHistory() {
  * Renderiza a lista de histórico na barra lateral.
  */
 function renderHistoryList(historyItems) {
+    if ((!historyItems || historyItems.length === 0) && state.historyLoading) {
+        return; // Mantém o "Carregando..." até a primeira página do servidor chegar
+    }
+
     if (!historyItems || historyItems.length === 0) {
         elements.historyList.innerHTML = '<div class="history_empty_state"><p>Nenhuma conversa.</p></div>';
         return;
@@ -482,7 +710,7 @@ function renderHistoryList(historyItems) {
  */
 function updateHistoryActiveState(activeId) {
     // Re-renderização total garante consistência de dados
-    renderHistoryList(getLocalHistory());
+    renderHistoryList(getMergedHistory());
 }
 
 /**
@@ -501,8 +729,9 @@ function renderChat(messages) {
  * @param {string} role - 'user' ou 'model'.
  * @param {string} content - O texto da mensagem.
  * @param {boolean} animate - Se deve animar a entrada (fade-in).
+ * @param {boolean} prepend - Se deve inserir no topo (mensagens antigas), sem rolar a tela.
  */
-function addMessageToUI(role, content, animate = true) {
+function addMessageToUI(role, content, animate = true, prepend = false) {
     // Validação: Não exibe mensagens vazias
     if (!content || String(content).trim() === '') {
         return;
@@ -530,6 +759,11 @@ function addMessageToUI(role, content, animate = true) {
         </div>
     `;
 
+    if (prepend) {
+        elements.messagesContainer.prepend(msgDiv);
+        return;
+    }
+
     elements.messagesContainer.appendChild(msgDiv);
     scrollToBottom();
 }
@@ -560,6 +794,57 @@ function addLoadingIndicator() {
     return id;
 }
 
+/**
+ * Atualiza o texto de progresso exibido no indicador de "digitando...".
+ */
+function updateLoadingIndicator(id, label) {
+    const el = document.getElementById(id);
+    if (!el) return;
+
+    let status = el.querySelector('.tool_progress');
+    if (!status) {
+        status = document.createElement('div');
+        status.className = 'tool_progress';
+        el.querySelector('.message_content').appendChild(status);
+    }
+    status.textContent = label;
+    scrollToBottom();
+}
+
+/**
+ * Cria uma mensagem vazia do agente que será preenchida conforme a resposta chega.
+ * @returns {HTMLElement} O elemento de conteúdo da mensagem.
+ */
+function addStreamingMessage() {
+    const msgDiv = document.createElement('div');
+    msgDiv.className = 'message';
+    msgDiv.innerHTML = `
+        <div class="message_avatar">
+            <i class="ph ph-robot"></i>
+        </div>
+        <div class="message_content"></div>
+    `;
+    elements.messagesContainer.appendChild(msgDiv);
+    scrollToBottom();
+    return msgDiv.querySelector('.message_content');
+}
+
+/**
+ * Adiciona ao final da mensagem as fontes consultadas que não foram citadas na resposta.
+ */
+function addSourcesToMessage(contentEl, sources, answer) {
+    const extra = (sources || []).filter(url => url.startsWith('http') && !answer.includes(url));
+    if (extra.length === 0) return;
+
+    const list = document.createElement('div');
+    list.className = 'message_sources';
+    list.innerHTML = '<span>Fontes consultadas:</span>' + extra
+        .map(url => `<a href="${escapeHtml(url)}" target="_blank" rel="noopener">${escapeHtml(url)}</a>`)
+        .join('');
+    contentEl.appendChild(list);
+    scrollToBottom();
+}
+
 /**
  * Remove uma mensagem específica (usado para remover loading).
  */
@@ -573,6 +858,7 @@ function removeMessageFromUI(id) {
  */
 function clearChat() {
     elements.messagesContainer.innerHTML = '';
+    state.messagesCursor = null;
     elements.userPrompt.value = '';
     resizeTextArea(elements.userPrompt);
 }
@@ -711,6 +997,25 @@ function setupEventListeners() {
     elements.anonymousChatBtn.addEventListener('click', () => {
         startAnonymousChat();
     });
+
+    // Paginação sob demanda: mais sessões ao chegar no fim da barra lateral
+    // e mensagens antigas ao chegar no topo da conversa
+    elements.historySection.addEventListener('scroll', () => {
+        const section = elements.historySection;
+        if (section.scrollTop + section.clientHeight >= section.scrollHeight - 50) {
+            loadMoreHistory();
+        }
+    });
+
+    let lastChatScrollTop = 0;
+    elements.chatArea.addEventListener('scroll', () => {
+        const scrollTop = elements.chatArea.scrollTop;
+        // Só ao rolar para cima (a rolagem automática para o fim não dispara a carga)
+        if (scrollTop < lastChatScrollTop && scrollTop < 80) {
+            loadOlderMessages();
+        }
+        lastChatScrollTop = scrollTop;
+    });
 }
 
 // Inicia a aplicação quando o DOM estiver pronto